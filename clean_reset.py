@@ -8,6 +8,12 @@ def clean_slate():
     if os.path.exists("dream_sorter.db"):
         os.remove("dream_sorter.db")
         print("✅ Database deleted.")
+
+    # 1b. Delete derived indexes (rebuilt from the DB)
+    for derived in ("dream_sorter.ivf.npz", "dream_galaxy.pkl"):
+        if os.path.exists(derived):
+            os.remove(derived)
+            print(f"✅ {derived} deleted.")
     
     # 2. Delete Thumbs
     thumbs_path = os.path.join("DreamBox", ".thumbs")
@@ -0,0 +1,67 @@
+import time
+import numpy as np
+
+class IVFIndex:
+    """
+    Inverted-file coarse quantizer for the 512-d CLIP space (pure NumPy).
+    Spherical k-means centroids partition the library into `nlist` cells;
+    a query only scores the rows living in its `nprobe` closest cells.
+    The row -> cell labels live beside the vectors in VectorIndex.
+    """
+    def __init__(self, centroids):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+
+    @property
+    def nlist(self): return len(self.centroids)
+
+    @staticmethod
+    def default_nlist(n):
+        return int(min(4096, max(16, 4 * np.sqrt(n))))
+
+    @classmethod
+    def train(cls, matrix, nlist=None, iters=12, sample=100_000, seed=0):
+        rng = np.random.default_rng(seed)
+        n = len(matrix)
+        nlist = min(nlist or cls.default_nlist(n), n)
+        x = matrix[rng.choice(n, sample, replace=False)] if n > sample else matrix
+        cents = x[rng.choice(len(x), nlist, replace=False)].copy()
+        for _ in range(iters):
+            labels = cls(cents).assign(x)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=nlist)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums = np.add.reduceat(x[order], starts[counts > 0], axis=0)
+            cents[counts > 0] = sums
+            empty = np.flatnonzero(counts == 0)
+            if len(empty): cents[empty] = x[rng.choice(len(x), len(empty), replace=False)]
+            cents /= np.linalg.norm(cents, axis=1, keepdims=True) + 1e-10
+        return cls(cents)
+
+    def assign(self, vecs, chunk=65536):
+        vecs = np.atleast_2d(vecs)
+        out = np.empty(len(vecs), dtype=np.int32)
+        for i in range(0, len(vecs), chunk):
+            out[i:i + chunk] = np.argmax(vecs[i:i + chunk] @ self.centroids.T, axis=1)
+        return out
+
+    def probe(self, q, nprobe):
+        nprobe = min(nprobe, self.nlist)
+        sims = self.centroids @ q
+        return np.argpartition(-sims, nprobe - 1)[:nprobe]
+
+    # --- 💾 PERSISTENCE ---
+    def save(self, path, ids, labels):
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(tmp, centroids=self.centroids, ids=ids, labels=labels, built_at=time.time())
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        """-> (IVFIndex, ids, labels) or None"""
+        if not path.exists(): return None
+        try:
+            data = np.load(path)
+            return cls(data["centroids"]), data["ids"], data["labels"]
+        except Exception as e:
+            print(f"⚠️ [ANN] Ignoring unreadable index {path.name}: {e}")
+            return None
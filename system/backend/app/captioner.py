@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import deque
+import numpy as np
+
+from .config import DREAM_BOX, CAPTION_ENABLED, CAPTION_PROMPT, CAPTION_BULK_WORKERS, CAPTION_BATCH, CAPTION_IDLE_S, CAPTION_REFRESH_S
+from .db import read_conn, db_writer
+from .fingerprint import fingerprint
+from .models import ai
+from .ollama_engine import ollama_ai
+from . import lexical
+
+def prompt_key(prompt):
+    return hashlib.sha1(" ".join((prompt or "").split()).encode()).hexdigest()[:16]
+
+class Captioner:
+    """
+    Vision captions from Ollama, cached in `captions` by (content fingerprint, prompt).
+    Two lanes share the Ollama semaphore: user questions run immediately, while the bulk
+    lane walks uncaptioned images with fewer workers than Ollama slots and pauses whenever
+    a user request is pending. The backlog is derived from the table, so it resumes
+    after a restart. Captions written with CAPTION_PROMPT are also embedded with the
+    multilingual text model and kept as a matrix for hybrid search.
+    """
+    def __init__(self, prompt=CAPTION_PROMPT, workers=CAPTION_BULK_WORKERS):
+        self.prompt, self.key = prompt, prompt_key(prompt)
+        self.workers = workers
+        self._version = 0 # see .version
+        self._bumped, self._dirty = 0.0, False
+        self.done = self.errors = self.hits = 0
+        self._lock = threading.Lock()
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._pending = [] # (asset_id, vec) not yet stacked
+        self._loaded = False
+        self._backlog = deque()
+        self._failed = set() # fingerprints that failed this session
+        self._user = 0
+        self._user_idle = None
+        self._tasks = []
+
+    # --- 🧠 CACHE ---
+    def cached(self, fp, prompt):
+        with read_conn() as conn:
+            row = conn.execute("SELECT caption FROM captions WHERE fingerprint = ? AND prompt_hash = ?", (fp, prompt_key(prompt))).fetchone()
+        return row['caption'] if row else None
+
+    def _asset(self, rel_path):
+        """-> (asset_id, fingerprint, thumb_path); hashes the file when the row predates fingerprints."""
+        with read_conn() as conn:
+            row = conn.execute("SELECT id, fingerprint, thumb_path FROM assets WHERE path = ?", (rel_path,)).fetchone()
+        asset_id, fp, thumb = (row['id'], row['fingerprint'], row['thumb_path']) if row else (None, None, None)
+        return asset_id, fp or fingerprint(DREAM_BOX / rel_path), thumb
+
+    def _store(self, asset_id, fp, prompt, text):
+        searchable = prompt_key(prompt) == self.key
+        vec = None
+        if searchable:
+            emb = ai.encode_text([text]) # list input: captions stay out of the query-text LRU
+            if emb is not None: vec = np.asarray(emb.detach().cpu().numpy(), dtype=np.float32).reshape(-1)
+        db_writer.execute("""
+            INSERT OR REPLACE INTO captions (fingerprint, prompt_hash, prompt, caption, model, vector, created_at) VALUES (?,?,?,?,?,?,?)
+        """, (fp, prompt_key(prompt), prompt, text, ollama_ai.vision_model, vec.tobytes() if vec is not None else None, int(time.time())))
+        if searchable: lexical.set_caption(fp, text)
+        if vec is not None and asset_id is not None:
+            with self._lock:
+                self._pending.append((asset_id, vec))
+                self._dirty = True
+                self._bump()
+
+    def _bump(self):
+        """Caller holds _lock. Advance the version if captions are waiting and the last bump is old enough."""
+        now = time.monotonic()
+        if self._dirty and now - self._bumped >= CAPTION_REFRESH_S:
+            self._version += 1
+            self._bumped, self._dirty = now, False
+
+    @property
+    def version(self):
+        """
+        Part of the /search cache key. A caption arriving after a quiet spell moves it at once; during bulk
+        captioning it moves at most every CAPTION_REFRESH_S, so the result cache keeps hitting in between.
+        """
+        with self._lock:
+            self._bump()
+            return self._version
+
+    # --- 🙋 USER LANE ---
+    async def ask_stream(self, rel_path, prompt):
+        """Answer chunks for one image; a cached answer comes back as a single chunk."""
+        asset_id, fp, thumb = await asyncio.to_thread(self._asset, rel_path)
+        text = await asyncio.to_thread(self.cached, fp, prompt)
+        if text is not None:
+            self.hits += 1
+            yield text
+            return
+        self._enter_user()
+        try:
+            chunks = []
+            async for chunk in ollama_ai.describe_stream(str(DREAM_BOX / rel_path), prompt, thumb):
+                chunks.append(chunk)
+                yield chunk
+            text = "".join(chunks).strip()
+            if text:
+                await asyncio.to_thread(self._store, asset_id, fp, prompt, text)
+                await asyncio.to_thread(db_writer.flush, 5) # so an immediate repeat is already a hit
+        finally: self._leave_user()
+
+    async def ask(self, rel_path, prompt):
+        try: return "".join([c async for c in self.ask_stream(rel_path, prompt)])
+        except Exception as e: return f"Vision Error: {e}"
+
+    def _enter_user(self):
+        self._user += 1
+        if self._user_idle: self._user_idle.clear()
+
+    def _leave_user(self):
+        self._user -= 1
+        if self._user == 0 and self._user_idle: self._user_idle.set()
+
+    # --- 🐢 BULK LANE ---
+    def _uncaptioned(self):
+        db_writer.flush(timeout=5) # captions stored a moment ago must not come back
+        with read_conn() as conn:
+            rows = conn.execute("""
+                SELECT a.id, a.path, a.fingerprint, a.thumb_path FROM assets a
+                WHERE a.type = 'image' AND a.dup_of IS NULL AND a.fingerprint IS NOT NULL
+                AND NOT EXISTS (SELECT 1 FROM captions c WHERE c.fingerprint = a.fingerprint AND c.prompt_hash = ?)
+                ORDER BY a.id DESC LIMIT ?
+            """, (self.key, CAPTION_BATCH + len(self._failed))).fetchall()
+        return [tuple(r) for r in rows if r['fingerprint'] not in self._failed][:CAPTION_BATCH]
+
+    async def _bulk(self, refill):
+        while True:
+            await self._user_idle.wait()
+            if not ai.ready or not ollama_ai.available or not ollama_ai.vision_model: # captions need the text encoder too
+                await asyncio.sleep(CAPTION_IDLE_S)
+                continue
+            async with refill:
+                if not self._backlog: self._backlog.extend(await asyncio.to_thread(self._uncaptioned))
+            if not self._backlog:
+                await asyncio.sleep(CAPTION_IDLE_S)
+                continue
+            asset_id, path, fp, thumb = self._backlog.popleft()
+            try:
+                text = "".join([c async for c in ollama_ai.describe_stream(str(DREAM_BOX / path), self.prompt, thumb)]).strip()
+                if not text: raise RuntimeError("empty caption")
+                await asyncio.to_thread(self._store, asset_id, fp, self.prompt, text)
+                self.done += 1
+            except Exception as e:
+                self.errors += 1
+                self._failed.add(fp)
+                print(f"⚠️ [CAPTION] {path}: {e}")
+
+    def start(self):
+        """Spawn the bulk workers on the running event loop (no-op when DREAM_CAPTIONS=0)."""
+        self._user_idle = asyncio.Event()
+        if self._user == 0: self._user_idle.set()
+        if not CAPTION_ENABLED: return
+        refill = asyncio.Lock()
+        self._tasks = [asyncio.create_task(self._bulk(refill)) for _ in range(self.workers)]
+        print(f"📝 [CAPTION] {self.workers} background worker(s) | prompt {self.key}")
+
+    async def stop(self):
+        for t in self._tasks: t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # --- 🔎 HYBRID SEARCH ---
+    def _load(self):
+        with read_conn() as conn:
+            rows = conn.execute("""
+                SELECT a.id, c.vector FROM captions c JOIN assets a ON a.fingerprint = c.fingerprint
+                WHERE c.prompt_hash = ? AND c.vector IS NOT NULL AND a.dup_of IS NULL
+            """, (self.key,)).fetchall()
+        self._pending = [(r[0], np.frombuffer(r[1], dtype=np.float32)) for r in rows] + self._pending
+        self._ids, self._matrix = np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.float32)
+        self._loaded = True
+
+    def scores(self, q_vec, min_score):
+        """Cosine of the query against every searchable caption -> {asset_id: score >= min_score}."""
+        with self._lock:
+            if not self._loaded: self._load()
+            if self._pending:
+                vecs = np.stack([v for _, v in self._pending])
+                vecs = vecs / (np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-10)
+                self._ids = np.concatenate([self._ids, np.array([i for i, _ in self._pending], dtype=np.int64)])
+                self._matrix = np.vstack([self._matrix, vecs]) if self._matrix.size else vecs
+                self._pending = []
+            if not len(self._ids): return {}
+            q = q_vec / (np.linalg.norm(q_vec) + 1e-10)
+            s = self._matrix @ q
+            keep = np.flatnonzero(s >= min_score)
+            return dict(zip(self._ids[keep].tolist(), s[keep].tolist()))
+
+    def stats(self):
+        with read_conn() as conn:
+            total = conn.execute("SELECT count(*) FROM captions WHERE prompt_hash = ?", (self.key,)).fetchone()[0]
+        return {"enabled": CAPTION_ENABLED, "workers": len(self._tasks), "captioned": total, "done": self.done, "errors": self.errors,
+                "cache_hits": self.hits, "user_active": self._user, "searchable": len(self._ids) + len(self._pending), "model": ollama_ai.vision_model}
+
+captioner = Captioner()
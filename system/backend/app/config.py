@@ -13,8 +13,109 @@ THUMB_DIR.mkdir(parents=True, exist_ok=True)
 
 # Settings
 BATCH_SIZE = 32
+# ⚡ Encoder micro-batch per accelerator (DREAM_BATCH_SIZE overrides all)
+DEVICE_BATCH_SIZE = {"cuda": 64, "mps": 32, "cpu": 16}
+# 🧠 Neural Cores
+VISION_MODEL = "clip-ViT-B-32"
+TEXT_MODEL = "clip-ViT-B-32-multilingual-v1"
+# shared: CLIP's own text tower encodes queries (English only, no second model in RAM)
+TEXT_TOWER = os.environ.get("DREAM_TEXT_TOWER", "multilingual").lower()
+# auto: fp16 on cuda/mps, fp32 on cpu | fp32 | fp16 | int8 (dynamic quantization, cpu only)
+NEURAL_PRECISION = os.environ.get("DREAM_PRECISION", "auto").lower()
+# lean: load the text tower on first query and evict it after TEXT_IDLE_EVICT_S without one
+NEURAL_LEAN = os.environ.get("DREAM_LEAN", "0") == "1"
+TEXT_IDLE_EVICT_S = 300
+# 🏭 Staged Scan Pipeline
+SCAN_DECODE_WORKERS = int(os.environ.get("DREAM_DECODE_WORKERS", 0)) or max(1, (os.cpu_count() or 2) - 1)
+SCAN_QUEUE_BATCHES = 2  # each inter-stage queue holds at most this many micro-batches
+# 🧵 Process-pool scan for CPU-only hosts: N worker processes, each with its own models and torch threads
+SCAN_PROCESSES = int(os.environ.get("DREAM_SCAN_PROCESSES", 0))  # 0 = the threaded pipeline in one process
+SCAN_PROCESS_THREADS = int(os.environ.get("DREAM_SCAN_THREADS", 0)) or max(1, (os.cpu_count() or 1) // max(1, SCAN_PROCESSES))
+WATCH_DEBOUNCE_S = 2.0  # quiet period before journaled watcher events are processed
+RECONCILE_INTERVAL_S = 6 * 3600  # periodic full walk to catch anything the watcher missed (0 = never)
+# 🛡️ A full walk that would purge more than this share of the library is held until the next walk agrees
+PURGE_MAX_FRACTION = float(os.environ.get("DREAM_PURGE_MAX_FRACTION", 0.2))
+PURGE_GUARD_MIN_ROWS = 25  # below this many vanished rows the fraction check stays out of the way
+JOB_BACKOFF_BASE_S = 60        # failed file retry delay: base * 2^attempts...
+JOB_BACKOFF_MAX_S = 24 * 3600  # ...capped at one day
+# 🖼️ Thumbnail Pyramid (content-addressed WebP per width + one JPEG fallback)
+THUMB_WIDTHS = (64, 200, 400, 1024)
+THUMB_FALLBACK_WIDTH = 400
+THUMB_WEBP_QUALITY = 70
+THUMB_JPEG_QUALITY = 60
+THUMB_MAX_AGE_S = 365 * 24 * 3600  # content-addressed files never change -> immutable
+# 🖼️ Working resolution: images are decoded (JPEG draft/DCT scaling) straight to this long edge
+# and shared by CLIP, face detection and the thumbnail pyramid (>= its largest level)
+SCAN_WORKING_SIZE = 1024
+FACE_CROP_MIN_PX = 112      # face crops smaller than this on the working image are re-cut from a larger decode
+# 🎞️ Video keyframes
+VIDEO_BACKEND = os.environ.get("DREAM_VIDEO_BACKEND", "auto").lower()  # auto (ffmpeg if installed) | ffmpeg | cv2
+VIDEO_FRAMES = 3            # frames sampled per video (the middle one becomes the thumbnail)
+VIDEO_FRAME_WIDTH = 640     # frames are decoded/downscaled to this before CLIP and face detection
+VIDEO_BUDGET_S = 5.0        # per-file extraction budget; whatever was decoded by then is used
+VIDEO_SCENES = os.environ.get("DREAM_VIDEO_SCENES", "0") == "1"  # sample by scene change instead of evenly
+VIDEO_SCENE_THRESHOLD = 0.3
 IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif'}
 AUDIO_EXTS = {'.mp3', '.wav', '.flac', '.m4a', '.ogg'}
 VIDEO_EXTS = {'.mp4', '.mov', '.webm', '.mkv'}
 TEXT_EXTS = {'.txt', '.md', '.log'}
-IGNORE_DIRS = {'.thumbs', '.git', 'node_modules', 'system', '__pycache__'}
\ No newline at end of file
+IGNORE_DIRS = {'.thumbs', '.git', 'node_modules', 'system', '__pycache__'}
+
+# 🗿 Face Backend: "mediapipe" (BlazeFace + CLIP crops) or "onnx" (buffalo_l SCRFD + ArcFace)
+FACE_BACKEND = os.environ.get("DREAM_FACE_BACKEND", "mediapipe").lower()
+FACE_MODEL_DIR = Path(__file__).parent / "models" / "buffalo_l"
+FACE_ONNX_THREADS = int(os.environ.get("DREAM_FACE_THREADS", 0)) or min(4, os.cpu_count() or 1)
+FACE_DET_SIZE = 640
+FACE_THUMB_SIZE = 128           # face-crop thumbnails for the Hall of Faces
+FACE_CLUSTER_MIN_SIZE = 3       # unnamed clusters smaller than this stay hidden
+FACE_CLUSTER_PAGE = 60          # clusters returned by /faces/unidentified
+
+# 🗄️ SQLite
+SQLITE_CACHE_MB = 64
+SQLITE_MMAP_MB = 256
+WRITER_BATCH_ROWS = 500   # commit after this many queued rows...
+WRITER_FLUSH_MS = 250     # ...or this long after the first one, whichever comes first
+WRITER_FLUSH_TIMEOUT_S = 60  # longest a scan / layout / backfill step waits on db_writer.flush()
+READ_POOL_SIZE = 4
+
+# 🌌 Galaxy Layout
+GALAXY_STATE_PATH = DB_PATH.with_name("dream_galaxy.pkl")
+GALAXY_SCALE = 15
+GALAXY_MIN_STARS = 10
+GALAXY_REFIT_MIN_NEW = 500      # full relayout once this many stars were placed incrementally...
+GALAXY_REFIT_FRACTION = 0.2     # ...and they exceed this share of the fitted library
+GALAXY_DRIFT_RATIO = 1.5        # or new stars sit this much further from centroids than the fit did
+GALAXY_OFFPEAK_HOURS = (2, 5)   # local hours for deferred relayouts (None = run as soon as flagged)
+
+# 🧭 Vector Search (ANN)
+ANN_PATH = DB_PATH.with_suffix(".ivf.npz")
+ANN_MIN_SIZE = int(os.environ.get("DREAM_ANN_MIN_SIZE", 50_000))  # below this, exact search is fast enough
+ANN_NPROBE = int(os.environ.get("DREAM_ANN_NPROBE", 16))  # recall/latency knob: cells scanned per query
+
+# 📑 Search Paging
+SEARCH_PAGE_SIZE = 120      # rows hydrated per /search response
+SEARCH_RANK_CACHE = 64      # ranked id lists kept for follow-up pages...
+SEARCH_RANK_TTL_S = 600     # ...for this long
+SEARCH_RESULT_CACHE = 256   # (query, threshold, nprobe, index version) -> ranked list
+TEXT_EMBED_CACHE = 1024     # normalized query text -> embedding
+# 🔤 Lexical Search (SQLite FTS5 over paths, camera/audio tags and captions)
+LEXICAL_LIMIT = 500         # FTS hits fused per query
+RRF_K = 60                  # reciprocal rank fusion: score = sum(1 / (k + rank)) over vector + FTS lists
+
+# 🦙 Ollama
+OLLAMA_URL = os.environ.get("DREAM_OLLAMA_URL", "http://localhost:11434").rstrip("/")
+OLLAMA_CONNECT_TIMEOUT_S = 3
+OLLAMA_RESCAN_S = 30            # while Ollama is down, /ai/status probes it at most this often
+OLLAMA_READ_TIMEOUT_S = 120     # per chunk when streaming, whole answer otherwise
+OLLAMA_CONCURRENCY = int(os.environ.get("DREAM_OLLAMA_CONCURRENCY", 2))  # generations in flight; the rest wait their turn
+OLLAMA_IMAGE_WIDTH = 1024       # describe sends this pyramid level, never the original
+
+# 📝 Background Captions
+CAPTION_ENABLED = os.environ.get("DREAM_CAPTIONS", "1") != "0"
+CAPTION_PROMPT = "Describe this photo in one or two sentences: who or what is in it, where it is, and the mood."
+CAPTION_BULK_WORKERS = max(1, OLLAMA_CONCURRENCY - 1)  # always leave an Ollama slot for user questions
+CAPTION_BATCH = 32          # uncaptioned images fetched per backlog refill
+CAPTION_IDLE_S = 60         # re-check interval when Ollama is down or everything is captioned
+CAPTION_REFRESH_S = 30      # new captions move the /search cache key at most this often
+CAPTION_FLOOR = 0.5         # query-caption cosine below this adds nothing...
+CAPTION_WEIGHT = 0.5        # ...above it, (cosine - floor) * weight is added to the image score
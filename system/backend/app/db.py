@@ -1,16 +1,192 @@
 import sqlite3
 import os
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from .config import DB_PATH, DREAM_BOX
+from queue import Queue, Empty
+from .config import DB_PATH, DREAM_BOX, SQLITE_CACHE_MB, SQLITE_MMAP_MB, WRITER_BATCH_ROWS, WRITER_FLUSH_MS, READ_POOL_SIZE
+
+# ⚙️ Per-connection tuning (journal_mode=WAL is persistent and set once in init_db)
+PRAGMAS = {
+    "synchronous": "NORMAL",              # WAL + NORMAL: durable at checkpoints, no fsync per commit
+    "cache_size": -SQLITE_CACHE_MB * 1024,  # negative = KiB
+    "mmap_size": SQLITE_MMAP_MB * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": 10000,
+}
+
+def _tune(conn):
+    for k, v in PRAGMAS.items(): conn.execute(f"PRAGMA {k}={v}")
+    return conn
 
 def get_conn():
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=10)
     conn.row_factory = sqlite3.Row
-    return conn
+    return _tune(conn)
+
+# --- 📖 READERS ---
+class ReadPool:
+    """Recycled read-only connections for request handlers (WAL lets them run beside the writer)."""
+    def __init__(self, size=READ_POOL_SIZE):
+        self.size = size
+        self._idle = Queue()
+
+    def _open(self):
+        conn = sqlite3.connect(f"{DB_PATH.as_uri()}?mode=ro", uri=True, timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return _tune(conn)
+
+    @contextmanager
+    def connection(self):
+        try: conn = self._idle.get_nowait()
+        except Empty: conn = self._open()
+        try: yield conn
+        finally:
+            conn.rollback() # end the read snapshot so the next user sees fresh data
+            if self._idle.qsize() < self.size: self._idle.put(conn)
+            else: conn.close()
+
+read_pool = ReadPool()
+
+def read_conn():
+    return read_pool.connection()
+
+# --- ✍️ SINGLE WRITER ---
+class DBWriter:
+    """
+    One thread owns the write connection. Statements are queued, consecutive identical
+    statements are folded into executemany, and the transaction commits every
+    WRITER_BATCH_ROWS rows or WRITER_FLUSH_MS milliseconds, whichever comes first.
+    on_commit callbacks run on the writer thread after the commit, with its connection;
+    on_error(params, error) runs there for every row that did not make it in.
+    """
+    def __init__(self, batch_rows=WRITER_BATCH_ROWS, flush_ms=WRITER_FLUSH_MS):
+        self.batch_rows = batch_rows
+        self.flush_s = flush_ms / 1000
+        self._q = Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.commits = 0
+        self.rows = 0
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive(): return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive(): return
+            self._thread = threading.Thread(target=self._run, daemon=True, name="sqlite-writer")
+            self._thread.start()
+
+    def execute(self, sql, params=(), on_commit=None, on_error=None):
+        self.executemany(sql, [params], on_commit, on_error)
+
+    def executemany(self, sql, seq, on_commit=None, on_error=None):
+        seq = list(seq)
+        if not seq and not on_commit: return
+        self._ensure_started()
+        self._q.put((sql, seq, on_commit, on_error))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is committed."""
+        if not self._thread: return True
+        done = threading.Event()
+        self._q.put((None, [], lambda conn: done.set(), None))
+        return done.wait(timeout)
+
+    def stats(self):
+        return {"queued": self._q.qsize(), "commits": self.commits, "rows": self.rows}
+
+    def _commit(self, conn, pending):
+        groups = [] # (sql, params, on_error per row)
+        for sql, seq, _, err in pending:
+            if sql and groups and groups[-1][0] == sql: groups[-1][1].extend(seq); groups[-1][2].extend([err] * len(seq))
+            elif sql: groups.append((sql, list(seq), [err] * len(seq)))
+        failed = []
+        if not conn.in_transaction: conn.execute("BEGIN") # keeps RELEASE below from committing each group
+        for sql, seq, errs in groups:
+            conn.execute("SAVEPOINT grp")
+            try: conn.executemany(sql, seq)
+            except sqlite3.Error:
+                conn.execute("ROLLBACK TO grp") # executemany is not atomic: undo the rows before the bad one
+                for params, err in zip(seq, errs): # isolate the offending row
+                    try: conn.execute(sql, params)
+                    except sqlite3.Error as e:
+                        print(f"❌ DB Write Error: {e} | {sql.split()[0]} {params[0] if params else ''}")
+                        failed.append((err, params, e))
+            conn.execute("RELEASE grp")
+        try: conn.commit()
+        except sqlite3.Error as e:
+            print(f"❌ DB Commit Error: {e} | {sum(len(seq) for _, seq, _ in groups)} rows rolled back")
+            self._abort(conn, pending, e)
+            return
+        self.commits += 1
+        self.rows += sum(len(seq) for _, seq, _ in groups)
+        self._report(failed)
+        self._hooks(conn, [item for item in pending if item[0] is not None]) # barriers fire in _run
+
+    def _abort(self, conn, pending, error):
+        """Nothing in this batch committed: roll back and report every row."""
+        try: conn.rollback()
+        except sqlite3.Error: pass
+        self._report([(err, params, error) for sql, seq, _, err in pending if sql for params in seq])
+
+    @staticmethod
+    def _report(failed):
+        for err, params, e in failed:
+            if err:
+                try: err(params, e)
+                except Exception as ex: print(f"⚠️ DB Error Hook Error: {ex}")
+
+    @staticmethod
+    def _hooks(conn, items):
+        for _, _, cb, _ in items:
+            if cb:
+                try: cb(conn)
+                except Exception as e: print(f"⚠️ DB Commit Hook Error: {e}")
+
+    def _run(self):
+        conn = get_conn()
+        pending, rows, deadline = [], 0, None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._q.get(timeout=timeout)
+                pending.append(item)
+                rows += len(item[1])
+                if deadline is None: deadline = time.monotonic() + self.flush_s
+                barrier = item[0] is None
+            except Empty: barrier = True
+            if pending and (barrier or rows >= self.batch_rows or time.monotonic() >= deadline):
+                try: self._commit(conn, pending)
+                except Exception as e:
+                    print(f"❌ DB Writer Error: {e}")
+                    self._abort(conn, pending, e)
+                finally:
+                    # flush() barriers always fire, whatever happened above: their callers block on them
+                    self._hooks(conn, [item for item in pending if item[0] is None])
+                    pending, rows, deadline = [], 0, None
+
+db_writer = DBWriter()
+
+# --- 🔤 FULL-TEXT MIRROR (assets_fts.rowid = assets.id; canonical rows only, copies are grouped under them) ---
+FTS_FIELDS = ("exif.Make", "exif.Model", "exif.LensModel", "title", "artist", "album")
+FTS_INDEX_SQL = f"""
+    INSERT INTO assets_fts (rowid, path, meta, caption)
+    SELECT id, path, {" || ' ' || ".join(f"COALESCE(json_extract(metadata, '$.{k}'), '')" for k in FTS_FIELDS)},
+        (SELECT caption FROM captions c WHERE c.fingerprint = assets.fingerprint AND c.vector IS NOT NULL LIMIT 1)
+    FROM assets WHERE dup_of IS NULL AND (metadata IS NULL OR json_valid(metadata))"""
+
+def _ensure_columns(conn, table, columns):
+    """Additive migrations: ALTER TABLE for any column an older database lacks."""
+    have = {r[1] for r in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+    for name, decl in columns.items():
+        if name not in have: conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
 
 def init_db():
     print(f"🏛️ Initializing Database at {DB_PATH}")
     with get_conn() as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+
         # 1. Create Tables (Master Schema v2.0)
         conn.execute('''CREATE TABLE IF NOT EXISTS assets (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -47,6 +223,81 @@ def init_db():
             PRIMARY KEY (identity_id, asset_path)
         )''')
 
+        # 🗿 Extra face exemplars per identity (identities.face_vector stays the primary one)
+        conn.execute('''CREATE TABLE IF NOT EXISTS identity_exemplars (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            identity_id INTEGER,
+            vector BLOB,
+            source_path TEXT,
+            created_at INTEGER
+        )''')
+        _ensure_columns(conn, "identity_exemplars", {"space": "TEXT DEFAULT 'clip'"}) # embedding space: clip | arcface
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_exemplars_identity ON identity_exemplars(identity_id)")
+
+        # 🙂 Every detected face + incremental face clusters (Hall of Faces)
+        conn.execute('''CREATE TABLE IF NOT EXISTS faces (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            asset_path TEXT,
+            frame INTEGER DEFAULT 0,
+            x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER,
+            score REAL,
+            embedding BLOB,
+            space TEXT,
+            identity_id INTEGER,
+            cluster_id INTEGER,
+            thumb TEXT
+        )''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_faces_asset ON faces(asset_path)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_faces_cluster ON faces(cluster_id, identity_id)")
+        conn.execute('''CREATE TABLE IF NOT EXISTS face_clusters (
+            id INTEGER PRIMARY KEY,
+            space TEXT,
+            centroid BLOB,
+            size INTEGER DEFAULT 0,
+            cover_thumb TEXT,
+            identity_id INTEGER,
+            updated_at INTEGER
+        )''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_face_clusters_open ON face_clusters(identity_id, size)")
+
+        # 📝 Vision captions, keyed by content so renames/duplicates reuse them
+        conn.execute('''CREATE TABLE IF NOT EXISTS captions (
+            fingerprint TEXT,
+            prompt_hash TEXT,
+            prompt TEXT,
+            caption TEXT,
+            model TEXT,
+            vector BLOB,
+            created_at INTEGER,
+            PRIMARY KEY (fingerprint, prompt_hash)
+        )''')
+
+        # 🧬 Content fingerprints: rename detection + duplicate grouping (dup_of -> canonical asset id)
+        _ensure_columns(conn, "assets", {"size": "INTEGER", "mtime": "REAL", "fingerprint": "TEXT", "content_hash": "TEXT", "dup_of": "INTEGER"})
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_fingerprint ON assets(fingerprint)")
+
+        # 🔎 Search filters pushed into SQL (recency listing, FTS and person lists; see routes.filter_sql)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_ts_real ON assets(ts_real)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_ts_inferred ON assets(ts_inferred)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_type_ts ON assets(type, COALESCE(ts_real, ts_inferred))")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_cluster ON assets(cluster_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_identity_links_path ON identity_links(asset_path)")
+
+        # 📋 Durable scan jobs (resume after restart, exponential backoff for poison files)
+        conn.execute('''CREATE TABLE IF NOT EXISTS scan_jobs (
+            path TEXT PRIMARY KEY,
+            state TEXT,
+            attempts INTEGER DEFAULT 0,
+            error TEXT,
+            queued_at REAL,
+            started_at REAL,
+            finished_at REAL,
+            duration_ms REAL,
+            next_attempt_at REAL
+        )''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_jobs_state ON scan_jobs(state, next_attempt_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_jobs_finished ON scan_jobs(state, finished_at)") # jobs.stats(): latest done / failed
+
         # 🚀 PATH HARMONIZATION
         print("🧼 Harmonizing Paths...")
         try:
@@ -71,6 +322,11 @@ def init_db():
                             conn.execute("DELETE FROM assets WHERE id = ?", (r_id,))
         except Exception as e:
             print(f"⚠️ Path Cleanse Skipped: {e}")
-        
+
+        # 🔤 Lexical index: filenames, camera, audio tags, captions (backfilled once for older libraries)
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS assets_fts USING fts5(path, meta, caption, tokenize='unicode61 remove_diacritics 2')")
+        if not conn.execute("SELECT 1 FROM assets_fts LIMIT 1").fetchone():
+            conn.execute(FTS_INDEX_SQL)
+
         conn.commit()
     print("✅ Database Ready (v2.0 Schema)")
@@ -0,0 +1,89 @@
+import threading
+import time
+import numpy as np
+
+from .config import THUMB_DIR
+from .db import read_conn, db_writer
+from .face_engine import face_ai
+
+class FaceClusterer:
+    """
+    Incremental leader clustering of unnamed faces. Each cluster keeps a running-mean
+    centroid; a new face joins the most similar centroid above the backend's
+    cluster_threshold or founds a new cluster. Nothing is ever refit, so scanning
+    cost is one matmul per face and /faces/unidentified is a single indexed read.
+    Cluster ids are allocated here (not by SQLite) so the async writer can insert them.
+    """
+    def __init__(self, space=None):
+        self.space = space or face_ai.space
+        self.threshold = face_ai.cluster_threshold
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def _load(self):
+        with read_conn() as conn:
+            rows = conn.execute("SELECT id, centroid, size FROM face_clusters WHERE space = ? AND identity_id IS NULL", (self.space,)).fetchall()
+            top = conn.execute("SELECT max(id) FROM face_clusters").fetchone()[0]
+        self.ids = [r['id'] for r in rows]
+        self.sizes = [r['size'] for r in rows]
+        self.centroids = np.stack([np.frombuffer(r['centroid'], dtype=np.float32) for r in rows]) if rows else None
+        self.next_id = (top or 0) + 1
+        self.loaded = True
+
+    def assign(self, embeddings, covers):
+        """embeddings: (N, D) face vectors; covers: face thumb per face. Returns a cluster id per face."""
+        with self._lock:
+            if not self.loaded: self._load()
+            out, touched = [], {}
+            for emb, cover in zip(np.asarray(embeddings, dtype=np.float32), covers):
+                emb = emb / (np.linalg.norm(emb) + 1e-10)
+                if self.centroids is not None and self.centroids.shape[1] == emb.size:
+                    sims = self.centroids @ emb
+                    row = int(sims.argmax())
+                    if sims[row] >= self.threshold:
+                        n = self.sizes[row]
+                        c = self.centroids[row] * n + emb
+                        self.centroids[row] = c / (np.linalg.norm(c) + 1e-10)
+                        self.sizes[row] = n + 1
+                        out.append(self.ids[row]); touched[row] = touched.get(row)
+                        continue
+                row = len(self.ids)
+                self.ids.append(self.next_id); self.sizes.append(1); self.next_id += 1
+                self.centroids = emb[None].copy() if self.centroids is None else np.vstack([self.centroids, emb])
+                out.append(self.ids[row]); touched[row] = cover
+            now = int(time.time())
+            db_writer.executemany("""
+                INSERT INTO face_clusters (id, space, centroid, size, cover_thumb, updated_at) VALUES (?,?,?,?,?,?)
+                ON CONFLICT(id) DO UPDATE SET centroid = excluded.centroid, size = excluded.size, updated_at = excluded.updated_at
+            """, [(self.ids[r], self.space, self.centroids[r].tobytes(), self.sizes[r], cover, now) for r, cover in touched.items()])
+            return out
+
+    def drop(self, cluster_id):
+        """A cluster was named: it leaves the pool, so later faces found a fresh cluster instead of joining it anonymously."""
+        with self._lock:
+            if not self.loaded or cluster_id not in self.ids: return
+            row = self.ids.index(cluster_id)
+            del self.ids[row], self.sizes[row]
+            self.centroids = np.delete(self.centroids, row, axis=0) if self.ids else None
+
+    def forget(self, paths):
+        """Faces of assets that vanished or changed: drop rows + crops, shrink their clusters."""
+        if not paths: return
+        with read_conn() as conn:
+            rows = conn.execute(f"SELECT id, cluster_id, thumb FROM faces WHERE asset_path IN ({','.join('?' * len(paths))})", list(paths)).fetchall()
+        if not rows: return
+        shrink = {}
+        for r in rows:
+            if r['cluster_id'] is not None: shrink[r['cluster_id']] = shrink.get(r['cluster_id'], 0) + 1
+            if r['thumb']:
+                try: (THUMB_DIR / r['thumb']).unlink()
+                except OSError: pass
+        with self._lock:
+            if self.loaded:
+                pos = {cid: i for i, cid in enumerate(self.ids)}
+                for cid, n in shrink.items():
+                    if cid in pos: self.sizes[pos[cid]] = max(0, self.sizes[pos[cid]] - n)
+        db_writer.executemany("UPDATE face_clusters SET size = MAX(0, size - ?) WHERE id = ?", [(n, cid) for cid, n in shrink.items()])
+        db_writer.executemany("DELETE FROM faces WHERE id = ?", [(r['id'],) for r in rows])
+
+face_clusters = FaceClusterer()
@@ -0,0 +1,28 @@
+import hashlib
+import os
+
+SAMPLE_BYTES = 64 * 1024
+CHUNK_BYTES = 1024 * 1024
+
+def fingerprint(path, size=None):
+    """
+    Cheap content identity: blake2b over the size plus head/middle/tail samples.
+    Survives renames and moves; small files are hashed whole.
+    """
+    size = os.path.getsize(path) if size is None else size
+    h = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        if size <= 3 * SAMPLE_BYTES:
+            h.update(f.read())
+        else:
+            for offset in (0, size // 2 - SAMPLE_BYTES // 2, size - SAMPLE_BYTES):
+                f.seek(offset)
+                h.update(f.read(SAMPLE_BYTES))
+    return h.hexdigest()
+
+def full_hash(path):
+    """Whole-file blake2b, only computed to confirm a fingerprint collision."""
+    h = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b""): h.update(chunk)
+    return h.hexdigest()
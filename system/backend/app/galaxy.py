@@ -0,0 +1,131 @@
+import pickle
+import threading
+import time
+import numpy as np
+
+from .config import GALAXY_STATE_PATH, GALAXY_SCALE, GALAXY_MIN_STARS, GALAXY_REFIT_MIN_NEW, GALAXY_REFIT_FRACTION, GALAXY_DRIFT_RATIO, GALAXY_OFFPEAK_HOURS, WRITER_FLUSH_TIMEOUT_S
+from .db import read_conn, db_writer
+from .vector_index import vector_index
+
+class GalaxyEngine:
+    """
+    Keeps the fitted UMAP reducer and KMeans model on disk so a scan only has to
+    place its *new* stars (reducer.transform + nearest centroid). A full refit runs
+    on first use, when the new points drift away from the fitted centroids, or when
+    enough new points piled up — the latter two are deferred to the off-peak window.
+    """
+    def __init__(self, path=GALAXY_STATE_PATH):
+        self.path = path
+        self.state = None
+        self.pending_full = False
+        self._lock = threading.Lock()
+        self._load_state()
+
+    # --- 💾 STATE ---
+    def _load_state(self):
+        if not self.path.exists(): return
+        try:
+            with open(self.path, "rb") as f: self.state = pickle.load(f)
+            self.pending_full = self.state.get("pending_full", False)
+        except Exception as e:
+            print(f"⚠️ [GALAXY] Discarding unreadable layout state: {e}")
+            self.state = None
+
+    def _save_state(self):
+        if not self.state: return
+        self.state["pending_full"] = self.pending_full
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as f: pickle.dump(self.state, f)
+        tmp.replace(self.path)
+
+    # --- 🗓️ SCHEDULING ---
+    @staticmethod
+    def is_offpeak(now=None):
+        if GALAXY_OFFPEAK_HOURS is None: return True
+        start, end = GALAXY_OFFPEAK_HOURS
+        hour = time.localtime(now).tm_hour
+        return start <= hour < end if start <= end else (hour >= start or hour < end)
+
+    def schedule_full(self):
+        self.pending_full = True
+        self._save_state()
+
+    def status(self):
+        s = self.state or {}
+        return {"fitted_count": s.get("fitted_count", 0), "fitted_at": s.get("fitted_at"), "placed_since_fit": s.get("placed_since_fit", 0), "pending_full": self.pending_full}
+
+    # --- 🌌 LAYOUT ---
+    def update(self, full=False):
+        """Place unmapped stars; refit everything when required. Returns number of stars written."""
+        with self._lock:
+            if full or self.state is None: return self._refit()
+            with read_conn() as conn:
+                rows = conn.execute("SELECT id, vector FROM assets WHERE vector IS NOT NULL AND x IS NULL").fetchall()
+            if not rows: return 0
+            ids, vecs = self._decode(rows)
+            placed = self._place(ids, vecs)
+
+            s = self.state
+            s["placed_since_fit"] = s.get("placed_since_fit", 0) + len(ids)
+            if s["placed_since_fit"] > max(GALAXY_REFIT_MIN_NEW, GALAXY_REFIT_FRACTION * s["fitted_count"]) or placed["drift"] > GALAXY_DRIFT_RATIO:
+                print(f"🌌 [GALAXY] Layout stale ({s['placed_since_fit']} new, drift {placed['drift']:.2f}) -> full relayout scheduled")
+                self.pending_full = True
+            self._save_state()
+            print(f"✅ [GALAXY] Placed {len(ids)} new stars incrementally.")
+            return len(ids)
+
+    @staticmethod
+    def _decode(rows):
+        ids = [r['id'] for r in rows]
+        vecs = np.array([np.frombuffer(r['vector'], dtype=np.float32) for r in rows])
+        return ids, vecs
+
+    def _refit(self):
+        import umap
+        from sklearn.cluster import KMeans
+
+        with read_conn() as conn:
+            rows = conn.execute("SELECT id, vector FROM assets WHERE vector IS NOT NULL").fetchall()
+        if len(rows) < GALAXY_MIN_STARS: return 0
+        ids, vecs = self._decode(rows)
+        t0 = time.time()
+        reducer = umap.UMAP(n_components=3, n_neighbors=min(len(rows)-1, 15), min_dist=0.1, metric='cosine')
+        projs = reducer.fit_transform(vecs)
+        kmeans = KMeans(n_clusters=max(1, min(12, len(rows) // 20)), n_init='auto').fit(vecs)
+        self._write(ids, projs, kmeans.labels_)
+
+        self.state = {
+            "reducer": reducer,
+            "centroids": kmeans.cluster_centers_.astype(np.float32),
+            "baseline_dist": float(np.sqrt(kmeans.inertia_ / len(rows))),
+            "fitted_count": len(rows),
+            "placed_since_fit": 0,
+            "fitted_at": int(time.time()),
+        }
+        self.pending_full = False
+        self._save_state()
+        print(f"✅ [GALAXY] Mapped {len(ids)} stars in {time.time() - t0:.1f}s (full refit).")
+        return len(ids)
+
+    def _place(self, ids, vecs):
+        s = self.state
+        projs = s["reducer"].transform(vecs)
+        c = s["centroids"]
+        sq = (vecs ** 2).sum(1)[:, None] - 2 * vecs @ c.T + (c ** 2).sum(1)[None, :]
+        dists = np.sqrt(np.maximum(sq, 0))
+        labels = np.argmin(dists, axis=1)
+        self._write(ids, projs, labels)
+        nearest = dists[np.arange(len(ids)), labels]
+        return {"drift": float(np.sqrt(np.mean(nearest ** 2)) / (s["baseline_dist"] + 1e-10))}
+
+    @staticmethod
+    def _write(ids, projs, labels):
+        rows = [(float(p[0]) * GALAXY_SCALE, float(p[1]) * GALAXY_SCALE, float(p[2]) * GALAXY_SCALE, int(l), int(i))
+                for i, p, l in zip(ids, projs, labels)]
+        db_writer.executemany("UPDATE assets SET x=?, y=?, z=?, cluster_id=? WHERE id=?", rows)
+        if not db_writer.flush(timeout=WRITER_FLUSH_TIMEOUT_S): # runs under self._lock: never wait on the writer forever
+            print(f"⚠️ [GALAXY] Writer did not confirm {len(rows)} positions in {WRITER_FLUSH_TIMEOUT_S}s; cluster filter stale until the next full layout or restart")
+            return
+        vector_index.set_clusters([r[4] for r in rows], [r[3] for r in rows]) # cluster filter column
+
+galaxy = GalaxyEngine()
@@ -0,0 +1,110 @@
+import threading
+import time
+import numpy as np
+from PIL import Image, ImageOps
+
+from .config import DREAM_BOX, WRITER_FLUSH_TIMEOUT_S
+from .db import read_conn, db_writer
+from .face_engine import face_ai
+
+class IdentityIndex:
+    """
+    Pre-normalized face exemplars of every named identity, stacked into one matrix.
+    An identity may own several exemplars (rows in identity_exemplars; identities.face_vector
+    for identities taught before exemplars existed); a face scores as its best one. Rebuilt lazily after
+    invalidate() — called whenever teach/untag/restore touch identities.
+    Only exemplars in the active face backend's embedding space are loaded.
+    """
+    def __init__(self, space=None):
+        self.space = space or face_ai.space
+        self._lock = threading.Lock()
+        self._stale = True
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.owner = np.zeros(0, dtype=np.int64)  # exemplar row -> index into ids/names
+        self.ids, self.names = [], []
+
+    def invalidate(self):
+        self._stale = True
+
+    def _load(self):
+        with read_conn() as conn:
+            # identities.face_vector predates exemplars and is always a CLIP vector
+            rows = conn.execute("""
+                SELECT i.id, i.name, i.face_vector AS vector FROM identities i
+                WHERE ? = 'clip' AND i.face_vector IS NOT NULL AND NOT EXISTS (SELECT 1 FROM identity_exemplars e WHERE e.identity_id = i.id AND e.space = 'clip')
+                UNION ALL
+                SELECT i.id, i.name, e.vector FROM identity_exemplars e JOIN identities i ON i.id = e.identity_id WHERE e.space = ?
+            """, (self.space, self.space)).fetchall()
+        vecs, owner, ids, names, slot = [], [], [], [], {}
+        for r in rows:
+            if not r['vector']: continue
+            v = np.frombuffer(r['vector'], dtype=np.float32)
+            if vecs and v.size != vecs[0].size: continue # embedding space changed; skip stale exemplars
+            if r['id'] not in slot:
+                slot[r['id']] = len(ids)
+                ids.append(r['id']); names.append(r['name'])
+            vecs.append(v); owner.append(slot[r['id']])
+        if vecs:
+            m = np.stack(vecs)
+            self.matrix = m / (np.linalg.norm(m, axis=1, keepdims=True) + 1e-10)
+        else:
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.owner = np.array(owner, dtype=np.int64)
+        self.ids, self.names = ids, names
+        self._stale = False
+
+    def __len__(self):
+        self.ensure_loaded()
+        return len(self.ids)
+
+    def ensure_loaded(self):
+        if self._stale:
+            with self._lock:
+                if self._stale: self._load()
+
+    def match(self, embeddings, threshold):
+        """
+        embeddings: (N, D) face vectors, any norm. One matmul against every exemplar.
+        Returns one (identity_id, name, score) per face, or None below threshold.
+        """
+        self.ensure_loaded()
+        matrix, owner, ids, names = self.matrix, self.owner, self.ids, self.names  # snapshot vs concurrent reload
+        emb = np.asarray(embeddings, dtype=np.float32)
+        if not len(ids) or not len(emb) or emb.shape[1] != matrix.shape[1]: return [None] * len(emb)
+        emb = emb / (np.linalg.norm(emb, axis=1, keepdims=True) + 1e-10)
+        scores = emb @ matrix.T                                  # (N faces, E exemplars)
+        per_id = np.full((len(emb), len(ids)), -np.inf, dtype=np.float32)
+        np.maximum.at(per_id.T, owner, scores.T)                 # best exemplar per identity
+        best = per_id.argmax(axis=1)
+        top = per_id[np.arange(len(emb)), best]
+        return [(ids[b], names[b], float(s)) if s > threshold else None for b, s in zip(best, top)]
+
+    def backfill(self):
+        """
+        Switching face backends leaves identities without exemplars in the new space:
+        re-embed them from the photos they were taught with (exemplar sources, else the cover).
+        """
+        with read_conn() as conn:
+            todo = conn.execute("""
+                SELECT DISTINCT i.id, i.name, COALESCE(e.source_path, i.cover_path) AS source FROM identities i
+                LEFT JOIN identity_exemplars e ON e.identity_id = i.id
+                WHERE COALESCE(e.source_path, i.cover_path) IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM identity_exemplars x WHERE x.identity_id = i.id AND x.space = ? AND x.source_path IS COALESCE(e.source_path, i.cover_path))
+            """, (self.space,)).fetchall()
+        added = 0
+        for r in todo:
+            try:
+                img = ImageOps.exif_transpose(Image.open(DREAM_BOX / r['source'])).convert("RGB")
+                faces = [f for f in face_ai.detect(np.array(img)) if f.get("embedding") is not None]
+                if not faces: continue
+                largest = max(faces, key=lambda f: (f['bbox'][2]-f['bbox'][0]) * (f['bbox'][3]-f['bbox'][1]))
+                db_writer.execute("INSERT INTO identity_exemplars (identity_id, vector, source_path, created_at, space) VALUES (?,?,?,?,?)",
+                                  (r['id'], np.asarray(largest['embedding'], dtype=np.float32).tobytes(), r['source'], int(time.time()), self.space))
+                added += 1
+            except Exception as e: print(f"⚠️ [FACE] Backfill skipped {r['source']}: {e}")
+        if added:
+            db_writer.flush(timeout=WRITER_FLUSH_TIMEOUT_S)
+            self.invalidate()
+            print(f"🗿 [FACE] Re-embedded {added} exemplars into {self.space} space")
+
+identity_index = IdentityIndex()
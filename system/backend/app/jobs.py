@@ -0,0 +1,74 @@
+import time
+
+from .config import DREAM_BOX, JOB_BACKOFF_BASE_S, JOB_BACKOFF_MAX_S
+from .db import read_conn, db_writer
+
+class JobQueue:
+    """
+    Durable per-file scan state in `scan_jobs`: queued -> in_progress -> done | failed.
+    Survives restarts (unfinished jobs are resumed) and keeps poison files on an
+    exponential backoff instead of retrying them on every watcher event.
+    All writes go through the shared DB writer, so they commit alongside the assets.
+    """
+    def admit(self, paths):
+        """Drop paths still cooling down after a failure, mark the rest queued. Returns admitted paths."""
+        if not paths: return []
+        now = time.time()
+        with read_conn() as conn:
+            cooling = {r['path'] for r in conn.execute("SELECT path FROM scan_jobs WHERE state = 'failed' AND next_attempt_at > ?", (now,)).fetchall()}
+        admitted = [p for p in paths if self.rel(p) not in cooling]
+        db_writer.executemany("""
+            INSERT INTO scan_jobs (path, state, queued_at) VALUES (?, 'queued', ?)
+            ON CONFLICT(path) DO UPDATE SET state = 'queued', queued_at = excluded.queued_at
+        """, [(self.rel(p), now) for p in admitted])
+        if len(admitted) < len(paths): print(f"⏳ [JOBS] {len(paths) - len(admitted)} failing files still in backoff")
+        return admitted
+
+    def started(self, path):
+        db_writer.execute("UPDATE scan_jobs SET state = 'in_progress', started_at = ? WHERE path = ?", (time.time(), self.rel(path)))
+
+    def finished(self, ctxs):
+        """Done only once the asset row committed; a row the writer rejected is left to DatabaseStep's jobs.failed."""
+        now = time.time()
+        db_writer.executemany("""
+            UPDATE scan_jobs SET state = 'done', error = NULL, finished_at = ?, duration_ms = ?, next_attempt_at = NULL
+            WHERE path = ? AND EXISTS (SELECT 1 FROM assets WHERE assets.path = scan_jobs.path)
+        """, [(now, round((now - ctx.started_at) * 1000, 1), ctx.rel_path) for ctx in ctxs])
+
+    def failed(self, path, error):
+        now = time.time()
+        db_writer.execute("""
+            UPDATE scan_jobs SET state = 'failed', attempts = attempts + 1, error = ?, finished_at = ?,
+                next_attempt_at = ? + MIN(?, ? * (1 << MIN(attempts, 20)))
+            WHERE path = ?
+        """, (str(error)[:500], now, now, JOB_BACKOFF_MAX_S, JOB_BACKOFF_BASE_S, self.rel(path)))
+
+    def forget(self, rels):
+        db_writer.executemany("DELETE FROM scan_jobs WHERE path = ?", [(r,) for r in rels])
+
+    def resumable(self):
+        """Jobs a previous process queued or started but never finished."""
+        with read_conn() as conn:
+            return [r['path'] for r in conn.execute("SELECT path FROM scan_jobs WHERE state IN ('queued', 'in_progress')").fetchall()]
+
+    def stats(self):
+        now = time.time()
+        with read_conn() as conn:
+            states = dict(conn.execute("SELECT state, count(*) FROM scan_jobs GROUP BY state").fetchall())
+            backoff = conn.execute("SELECT count(*) FROM scan_jobs WHERE state = 'failed' AND next_attempt_at > ?", (now,)).fetchone()[0]
+            avg_ms = conn.execute("SELECT avg(duration_ms) FROM (SELECT duration_ms FROM scan_jobs WHERE state = 'done' ORDER BY finished_at DESC LIMIT 500)").fetchone()[0]
+            recent = conn.execute("SELECT path, attempts, error, next_attempt_at FROM scan_jobs WHERE state = 'failed' ORDER BY finished_at DESC LIMIT 10").fetchall()
+        return {
+            "queued": states.get("queued", 0), "in_progress": states.get("in_progress", 0),
+            "done": states.get("done", 0), "failed": states.get("failed", 0), "in_backoff": backoff,
+            "avg_ms": round(avg_ms, 1) if avg_ms else None,
+            "recent_failures": [dict(r) for r in recent],
+        }
+
+    @staticmethod
+    def rel(path):
+        p = str(path).replace("\\", "/")
+        root = str(DREAM_BOX).replace("\\", "/") + "/"
+        return p[len(root):] if p.startswith(root) else p
+
+jobs = JobQueue()
@@ -0,0 +1,57 @@
+"""
+🔤 LEXICAL SEARCH
+SQLite FTS5 mirror of what CLIP cannot see: path components, camera / lens, audio tags and
+the background caption (see FTS_INDEX_SQL in db.py). Writes go through the shared writer so
+they commit with the asset rows they describe; queries are prefix term matches ranked by bm25
+and fused with the vector ranking by reciprocal rank.
+"""
+import re
+
+from .config import LEXICAL_LIMIT, RRF_K
+from .db import db_writer, FTS_INDEX_SQL
+
+FTS_WEIGHTS = (1.0, 2.0, 0.5) # bm25 column weights: path, meta, caption
+_TERM = re.compile(r"\w+")
+
+# --- ✍️ SYNC ---
+def index(paths):
+    """(Re)index these asset paths; queued behind the writes that created or moved them."""
+    paths = [(p,) for p in paths]
+    if not paths: return
+    db_writer.executemany("DELETE FROM assets_fts WHERE rowid = (SELECT id FROM assets WHERE path = ?)", paths)
+    db_writer.executemany(FTS_INDEX_SQL + " AND path = ?", paths)
+
+def forget(ids):
+    db_writer.executemany("DELETE FROM assets_fts WHERE rowid = ?", [(i,) for i in ids])
+
+def set_caption(fp, caption):
+    db_writer.execute("UPDATE assets_fts SET caption = ? WHERE rowid IN (SELECT id FROM assets WHERE fingerprint = ? AND dup_of IS NULL)", (caption, fp))
+
+# --- 🔎 QUERY ---
+def is_exact(q):
+    """"IMG_1234" (quoted): lexical only, no model call."""
+    q = (q or "").strip()
+    return len(q) > 2 and q[0] == q[-1] == '"'
+
+def match_query(q):
+    """Every term as a quoted prefix ("canon"* "r5"*): all must match, FTS syntax in the input is inert."""
+    terms = _TERM.findall((q or "").lower())
+    return " ".join(f'"{t}"*' for t in terms) if terms else None
+
+def search(conn, q, limit=LEXICAL_LIMIT, where="", params=()):
+    """-> [(asset_id, type)] best bm25 first. where: extra ' AND ...' over assets `a` (search filters)."""
+    mq = match_query(q)
+    if not mq: return []
+    rows = conn.execute(f"""
+        SELECT a.id, a.type FROM assets_fts JOIN assets a ON a.id = assets_fts.rowid
+        WHERE assets_fts MATCH ? AND a.is_captured = 0{where}
+        ORDER BY bm25(assets_fts, {", ".join(map(str, FTS_WEIGHTS))}) LIMIT ?
+    """, (mq, *params, limit)).fetchall()
+    return [(r[0], r[1]) for r in rows]
+
+def rrf(*rankings, k=RRF_K):
+    """Reciprocal rank fusion of id lists (best first) -> ids ordered by sum(1 / (k + rank))."""
+    fused = {}
+    for ranking in rankings:
+        for rank, i in enumerate(ranking, 1): fused[i] = fused.get(i, 0.0) + 1.0 / (k + rank)
+    return sorted(fused, key=lambda i: -fused[i])
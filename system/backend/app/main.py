@@ -1,3 +1,6 @@
+import asyncio
+import os
+import threading
 import uvicorn
 import logging
 from fastapi import FastAPI, Response
@@ -8,33 +11,67 @@ from rich.panel import Panel
 from rich.console import Console
 
 # --- CONFIG & APP IMPORTS ---
-from .config import DREAM_BOX, THUMB_DIR, BASE_DIR
-from .db import init_db
+from .config import DREAM_BOX, THUMB_DIR, BASE_DIR, THUMB_MAX_AGE_S
+from .db import init_db, db_writer
 from .models import ai
-from .routes import router
+from .routes import router, media_router
+from . import thumbs
+from .vector_index import vector_index
+from .identity_index import identity_index
+from .face_engine import face_ai
+from .ollama_engine import ollama_ai
+from .captioner import captioner
 from .scanner import start_watcher
+from . import scan_pool
 
 console = Console()
 
+class ThumbStaticFiles(StaticFiles):
+    """Content-addressed thumbs are immutable; legacy path-named ones revalidate via ETag."""
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        name = os.path.basename(full_path)
+        immutable = thumbs.is_addressed(name) or thumbs.is_addressed(name.rsplit("_", 1)[0] + ".jpg")
+        response.headers["Cache-Control"] = f"public, max-age={THUMB_MAX_AGE_S}, immutable" if immutable else "no-cache"
+        return response
+
 class EndpointFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
         msg = record.getMessage()
-        return all(x not in msg for x in ["/api/scan/progress", "/api/stats", "/api/discovery", "/api/galaxy/all"])
+        return all(x not in msg for x in ["/api/scan/progress", "/api/stats", "/api/discovery", "/api/galaxy/all", "/api/galaxy/points", "/api/health"])
 
 logging.getLogger("uvicorn.access").addFilter(EndpointFilter())
 
+def warm_up(state):
+    """Heavy startup off the event loop: the API and frontend answer while the models load."""
+    ai.load()
+    vector_index.load()
+    if face_ai.space != "clip": threading.Thread(target=identity_index.backfill, daemon=True).start()
+    state["observer"] = start_watcher()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     console.print(Panel.fit(
-        f"[bold cyan]🎭 DREAM THEATER KERNEL v7.7.0[/bold cyan]\n[dim]Omni-Platform Intelligence: {ai.device.upper()}[/dim]",
+        "[bold cyan]🎭 DREAM THEATER KERNEL v7.7.0[/bold cyan]\n[dim]Omni-Platform Intelligence: warming up in the background[/dim]",
         border_style="blue"
     ))
-    ai.load()
     init_db()
-    observer = start_watcher()
+    state = {}
+    threading.Thread(target=warm_up, args=(state,), daemon=True, name="warm-up").start()
+    ollama_scan = asyncio.create_task(ollama_ai.scan_models()) # off the import path, never blocks startup
+    captioner.start()
     yield
-    observer.stop()
-    observer.join()
+    await captioner.stop()
+    ollama_scan.cancel() # still probing when shutdown comes early; it must not outlive the client
+    try: await ollama_scan
+    except asyncio.CancelledError: pass
+    await ollama_ai.close()
+    observer = state.get("observer")
+    if observer:
+        observer.stop()
+        observer.join()
+    scan_pool.shutdown() # no-op unless DREAM_SCAN_PROCESSES spawned workers
+    db_writer.flush(timeout=10)
 
 app = FastAPI(lifespan=lifespan)
 
@@ -56,7 +93,8 @@ app.add_middleware(
 )
 
 app.include_router(router, prefix="/api")
-app.mount("/thumbs", StaticFiles(directory=str(THUMB_DIR)), name="thumbs")
+app.include_router(media_router) # /thumbs/{id}?w= must be matched before the static mount
+app.mount("/thumbs", ThumbStaticFiles(directory=str(THUMB_DIR)), name="thumbs")
 app.mount("/raw", StaticFiles(directory=str(DREAM_BOX)), name="raw")
 
 frontend_dist = BASE_DIR / "system" / "frontend-app" / "dist"
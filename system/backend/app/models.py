@@ -1,43 +1,146 @@
-from sentence_transformers import SentenceTransformer
-import torch
+import gc
+import os
+import threading
+import time
 from rich.console import Console
-from rich.status import Status
+
+from .config import BATCH_SIZE, DEVICE_BATCH_SIZE, TEXT_EMBED_CACHE, VISION_MODEL, TEXT_MODEL, TEXT_TOWER, NEURAL_PRECISION, NEURAL_LEAN, TEXT_IDLE_EVICT_S
+from .cache import LRUCache
 
 console = Console()
 
 class NeuralCore:
+    """
+    CLIP vision + multilingual text encoders. Nothing heavy happens at import: torch is
+    pulled in on first use of `device`, sentence_transformers only inside load(), which
+    main runs on a background thread. `loaded` is set once load() has finished (or failed).
+
+    Memory knobs (config / env): DREAM_PRECISION picks fp16 on accelerators or int8 dynamic
+    quantization on CPU; DREAM_LEAN=1 loads the multilingual text tower on the first query
+    and evicts it when idle; DREAM_TEXT_TOWER=shared encodes queries with CLIP's own text tower.
+    """
     def __init__(self):
-        # 🛡️ SMART DEVICE DETECTION (Omni-Platform)
-        if torch.cuda.is_available():
-            self.device = "cuda"
-        elif torch.backends.mps.is_available():
-            self.device = "mps" # 🍎 Apple Silicon (M1/M2/M3/M4)
-        else:
-            self.device = "cpu"
-            
+        self._device = None
         self.vision_model = None
         self.text_model = None
-        console.print(f"[bold cyan]⚙️  AI Accelerator:[/bold cyan] [green]{self.device.upper()}[/green]")
+        self.text_cache = LRUCache(TEXT_EMBED_CACHE) # search-as-you-type repeats the same strings
+        self.lean = NEURAL_LEAN # scan worker processes force this on (they only embed images)
+        self.state = "cold" # cold -> loading -> ready | error
+        self.timings = {}   # phase -> seconds, for /health and the startup benchmark
+        self.loaded = threading.Event()
+        self._text_lock = threading.Lock()
+        self._text_used = 0.0
+
+    @property
+    def device(self):
+        if self._device is None:
+            # 🛡️ SMART DEVICE DETECTION (Omni-Platform)
+            import torch
+            if torch.cuda.is_available():
+                self._device = "cuda"
+            elif torch.backends.mps.is_available():
+                self._device = "mps" # 🍎 Apple Silicon (M1/M2/M3/M4)
+            else:
+                self._device = "cpu"
+        return self._device
+
+    @property
+    def batch_size(self):
+        return int(os.environ.get("DREAM_BATCH_SIZE", 0)) or DEVICE_BATCH_SIZE.get(self.device, BATCH_SIZE)
+
+    @property
+    def precision(self):
+        p = NEURAL_PRECISION
+        if p == "auto": return "fp16" if self.device in ("cuda", "mps") else "fp32"
+        if p == "fp16" and self.device == "cpu": return "fp32" # half matmuls on CPU are slower, not faster
+        if p == "int8" and self.device != "cpu": return "fp16" # dynamic quantization kernels are CPU-only
+        return p
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def _build(self, name):
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(name, device=self.device)
+        if self.precision == "fp16": model.half()
+        elif self.precision == "int8":
+            import torch
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model.eval()
 
     def load(self):
-        with Status(f"[bold yellow]🚀 Initializing Neural Cores on {self.device.upper()}...", spinner="dots") as status:
-            try:
-                status.update("[bold blue]📦 Loading Vision Engine (CLIP)...[/bold blue]")
-                self.vision_model = SentenceTransformer("clip-ViT-B-32", device=self.device)
-                
-                status.update("[bold magenta]🇹🇭 Loading Thai Intelligence (Multilingual)...[/bold magenta]")
-                self.text_model = SentenceTransformer("clip-ViT-B-32-multilingual-v1", device=self.device)
-                
-                console.print(f"✅ [bold green]Neural Cores Online ({self.device.upper()})[/bold green]")
-            except Exception as e:
-                console.log(f"❌ [bold red]AI Load Error:[/bold red] {e}")
+        self.state = "loading"
+        try:
+            t0 = time.perf_counter()
+            import sentence_transformers # noqa: F401 (timed separately from the weights)
+            console.print(f"[bold cyan]⚙️  AI Accelerator:[/bold cyan] [green]{self.device.upper()}[/green] [dim](batch {self.batch_size}, {self.precision})[/dim]")
+            self.timings["import_s"] = round(time.perf_counter() - t0, 2)
+
+            console.print("[bold blue]📦 Loading Vision Engine (CLIP)...[/bold blue]")
+            t0 = time.perf_counter()
+            self.vision_model = self._build(VISION_MODEL)
+            self.timings["vision_s"] = round(time.perf_counter() - t0, 2)
+
+            if TEXT_TOWER != "shared" and not self.lean: self._load_text()
+
+            self.state = "ready"
+            console.print(f"✅ [bold green]Neural Cores Online ({self.device.upper()})[/bold green] [dim]{self.timings}[/dim]")
+        except Exception as e:
+            self.state = "error"
+            console.log(f"❌ [bold red]AI Load Error:[/bold red] {e}")
+        finally:
+            self.loaded.set()
+
+    # --- 🇹🇭 TEXT TOWER (resident, shared, or on demand) ---
+    def _load_text(self):
+        console.print("[bold magenta]🇹🇭 Loading Thai Intelligence (Multilingual)...[/bold magenta]")
+        t0 = time.perf_counter()
+        self.text_model = self._build(TEXT_MODEL)
+        self.timings["text_s"] = round(time.perf_counter() - t0, 2)
+
+    def _text_encoder(self):
+        if TEXT_TOWER == "shared": return self.vision_model
+        self._text_used = time.monotonic()
+        if self.text_model is None and self.lean and self.vision_model is not None:
+            with self._text_lock:
+                if self.text_model is None:
+                    self._load_text()
+                    threading.Thread(target=self._evict_when_idle, daemon=True, name="text-evictor").start()
+        return self.text_model
+
+    def _evict_when_idle(self):
+        while True:
+            time.sleep(min(30, TEXT_IDLE_EVICT_S))
+            if time.monotonic() - self._text_used < TEXT_IDLE_EVICT_S: continue
+            with self._text_lock:
+                self.text_model = None
+            gc.collect()
+            if self._device == "cuda":
+                import torch
+                torch.cuda.empty_cache()
+            console.print(f"💤 [dim]Text tower evicted after {TEXT_IDLE_EVICT_S}s idle[/dim]")
+            return
+
+    def info(self):
+        return {"state": self.state, "device": self._device, "precision": self.precision if self._device else None,
+                "text_tower": TEXT_TOWER, "lean": self.lean, "text_loaded": self.text_model is not None, "timings": self.timings}
 
     def encode_image(self, images):
         if not self.vision_model: return None
-        return self.vision_model.encode(images, batch_size=len(images), convert_to_tensor=True, show_progress_bar=False).cpu().numpy()
+        return self.vision_model.encode(images, batch_size=min(len(images), self.batch_size), convert_to_tensor=True, show_progress_bar=False).float().cpu().numpy() # fp32 out, whatever precision ran
 
     def encode_text(self, text):
-        if not self.text_model: return None
-        return self.text_model.encode(text, convert_to_tensor=True, show_progress_bar=False)
+        if not isinstance(text, str):
+            model = self._text_encoder()
+            return model.encode(text, batch_size=self.batch_size, convert_to_tensor=True, show_progress_bar=False) if model else None
+        key = " ".join(text.split())
+        vec = self.text_cache.get(key) # cache hits never wake an evicted tower
+        if vec is None:
+            model = self._text_encoder()
+            if not model: return None
+            vec = model.encode(key, convert_to_tensor=True, show_progress_bar=False)
+            self.text_cache.put(key, vec)
+        return vec
 
-ai = NeuralCore()
\ No newline at end of file
+ai = NeuralCore()
@@ -1,46 +1,81 @@
-import requests
+import asyncio
+import base64
+import io
 import json
-import os
+import time
+import httpx
+from PIL import Image, ImageOps
+
+from .config import OLLAMA_URL, OLLAMA_CONNECT_TIMEOUT_S, OLLAMA_RESCAN_S, OLLAMA_READ_TIMEOUT_S, OLLAMA_CONCURRENCY, OLLAMA_IMAGE_WIDTH
+from . import thumbs
 
 class OllamaEngine:
-    def __init__(self, base_url="http://localhost:11434"):
+    """
+    Async Ollama client: one pooled httpx connection set, bounded timeouts, and a
+    semaphore so a queue of llava calls cannot pile onto the GPU at once.
+    Nothing talks to the network at import; call scan_models() from the app lifespan.
+    """
+    def __init__(self, base_url=OLLAMA_URL, concurrency=OLLAMA_CONCURRENCY):
         self.base_url = base_url
         self.vision_model = None
         self.chat_model = None
         self.available = False
         self.models = []
-        self.scan_models()
+        self.concurrency = concurrency
+        self._client = None
+        self._slots = None
+        self.scanned_at = 0.0
+
+    def client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(OLLAMA_READ_TIMEOUT_S, connect=OLLAMA_CONNECT_TIMEOUT_S),
+                limits=httpx.Limits(max_connections=self.concurrency + 2, max_keepalive_connections=self.concurrency + 2),
+            )
+            self._slots = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    async def close(self):
+        if self._client: await self._client.aclose()
+        self._client = None
 
-    def scan_models(self):
+    async def scan_models(self):
+        self.scanned_at = time.monotonic()
         try:
-            res = requests.get(f"{self.base_url}/api/tags", timeout=2)
+            res = await self.client().get("/api/tags", timeout=2)
             if res.status_code == 200:
                 self.models = [m['name'] for m in res.json()['models']]
                 print(f"🦙 [OLLAMA] Found models: {self.models}")
-                
+
                 # Heuristic to pick best models
                 # Vision: llava > llama3.2-vision > minicpm
                 for m in self.models:
                     if 'llava' in m or 'vision' in m or 'minicpm' in m:
                         self.vision_model = m
                         break
-                
+
                 # Chat: llama3 > mistral > gemma > qwen
                 for m in self.models:
                     if 'llama3' in m or 'mistral' in m or 'gemma' in m or 'qwen' in m:
                         self.chat_model = m
                         break
-                
+
                 # Fallback
                 if not self.chat_model and self.models: self.chat_model = self.models[0]
                 if not self.vision_model: self.vision_model = self.chat_model # Risky fallback but better than None
-                
+
                 self.available = True
                 print(f"✅ [OLLAMA] Active | Chat: {self.chat_model} | Vision: {self.vision_model}")
             else:
                 print("⚠️ [OLLAMA] Service found but returned error.")
-        except:
-            print("❌ [OLLAMA] Not detected on localhost:11434")
+        except Exception:
+            print(f"❌ [OLLAMA] Not detected on {self.base_url}")
+
+    async def rescan(self, min_interval=OLLAMA_RESCAN_S):
+        """Probe again if Ollama is still missing and the last probe is old enough (it may have started after us)."""
+        if self.available or time.monotonic() - self.scanned_at < min_interval: return
+        await self.scan_models()
 
     def list_models(self):
         return self.models
@@ -51,42 +86,60 @@ class OllamaEngine:
         elif type == 'vision': self.vision_model = name
         return True
 
-    def chat(self, messages):
+    async def _stream(self, endpoint, payload, pick):
+        """POST with stream=True and yield text chunks as Ollama emits its NDJSON lines."""
+        client = self.client()
+        async with self._slots:
+            async with client.stream("POST", endpoint, json={**payload, "stream": True}) as res:
+                if res.status_code != 200:
+                    raise RuntimeError(f"HTTP {res.status_code}: {(await res.aread()).decode(errors='replace')[:200]}")
+                async for line in res.aiter_lines():
+                    if not line: continue
+                    msg = json.loads(line)
+                    if msg.get("error"): raise RuntimeError(msg["error"])
+                    chunk = pick(msg)
+                    if chunk: yield chunk
+                    if msg.get("done"): break
+
+    def chat_stream(self, messages):
         """
         messages: [{'role': 'user', 'content': '...'}]
         """
-        if not self.available or not self.chat_model: return "Ollama not available."
-        
-        try:
-            res = requests.post(f"{self.base_url}/api/chat", json={
-                "model": self.chat_model,
-                "messages": messages,
-                "stream": False
-            })
-            return res.json()['message']['content']
-        except Exception as e:
-            return f"Brain Error: {e}"
-
-    def describe(self, image_path, prompt="Describe this image in detail."):
+        return self._stream("/api/chat", {"model": self.chat_model, "messages": messages}, lambda m: m.get("message", {}).get("content"))
+
+    async def describe_stream(self, image_path, prompt="Describe this image in detail.", thumb=None):
         """
-        image_path: Absolute path to image
+        image_path: Absolute path to image; thumb: its thumb_path, so a pyramid level can stand in for the original
         """
+        b64 = await asyncio.to_thread(self.encode_image, image_path, thumb)
+        async for chunk in self._stream("/api/generate", {"model": self.vision_model, "prompt": prompt, "images": [b64]}, lambda m: m.get("response")):
+            yield chunk
+
+    async def chat(self, messages):
+        if not self.available or not self.chat_model: return "Ollama not available."
+        try: return "".join([c async for c in self.chat_stream(messages)])
+        except Exception as e: return f"Brain Error: {e}"
+
+    async def describe(self, image_path, prompt="Describe this image in detail.", thumb=None):
         if not self.available or not self.vision_model: return "Vision model not found."
-        
-        try:
-            import base64
-            with open(image_path, "rb") as f:
-                b64 = base64.b64encode(f.read()).decode('utf-8')
-            
-            res = requests.post(f"{self.base_url}/api/generate", json={
-                "model": self.vision_model,
-                "prompt": prompt,
-                "images": [b64],
-                "stream": False
-            })
-            return res.json()['response']
-        except Exception as e:
-            return f"Vision Error: {e}"
+        try: return "".join([c async for c in self.describe_stream(image_path, prompt, thumb)])
+        except Exception as e: return f"Vision Error: {e}"
+
+    @staticmethod
+    def encode_image(image_path, thumb=None, width=OLLAMA_IMAGE_WIDTH):
+        """
+        Base64 JPEG of at most width px: decoded from the nearest pyramid level when the
+        asset has one, else from the original (JPEG draft mode keeps that decode cheap).
+        """
+        level, _ = thumbs.pick(thumb, width) if thumbs.is_addressed(thumb) else (None, None)
+        src = level if level and level.suffix == ".webp" else image_path
+        with Image.open(src) as img:
+            img.draft("RGB", (width, width))
+            img = ImageOps.exif_transpose(img).convert("RGB")
+        img.thumbnail((width, width))
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=85)
+        return base64.b64encode(buf.getvalue()).decode('utf-8')
 
 # Singleton
 ollama_ai = OllamaEngine()
@@ -1,28 +1,52 @@
-from fastapi import APIRouter, BackgroundTasks, Body, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Body, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from pathlib import Path
+import asyncio
 import json
-import torch
+import time
 import numpy as np
 import os
-from sentence_transformers import util
 from pydantic import BaseModel
 from typing import List, Optional
 from urllib.parse import quote
 
-from .config import DREAM_BOX, THUMB_DIR
-from .db import get_conn
+from .config import DREAM_BOX, THUMB_DIR, FACE_CLUSTER_MIN_SIZE, FACE_CLUSTER_PAGE, SEARCH_PAGE_SIZE, SEARCH_RANK_CACHE, SEARCH_RANK_TTL_S, SEARCH_RESULT_CACHE, CAPTION_FLOOR, CAPTION_WEIGHT, LEXICAL_LIMIT
+from .db import get_conn, read_conn, db_writer
 from .models import ai
 from .face_engine import face_ai
 from .ollama_engine import ollama_ai
-from .scanner import process_scan, scan_status, thumb_name, get_backslash
+from .vector_index import vector_index
+from .identity_index import identity_index
+from .captioner import captioner
+from .scanner import process_scan, recalculate_galaxy, scan_status, thumb_name, get_backslash
+from .galaxy import galaxy
+from .jobs import jobs
+from . import thumbs, lexical
+from .face_clusters import face_clusters
+from .cache import LRUCache
 from PIL import Image, ImageOps
-import cv2
 import traceback
+import secrets
 
 router = APIRouter()
+media_router = APIRouter() # mounted at the root, ahead of the /thumbs static files
+
+@router.get("/health")
+async def health(response: Response):
+    """Liveness is any answer at all; readiness (200 vs 503) means models loaded and the watcher is up."""
+    ready = ai.ready and scan_status.get("watcher", False)
+    if not ready: response.status_code = 503
+    return {
+        "ready": ready,
+        "models": ai.info(),
+        "watcher": scan_status.get("watcher", False),
+        "index": {"loaded": vector_index.loaded, "size": vector_index.size},
+        "ollama": ollama_ai.available,
+    }
 
 @router.get("/ai/status")
 async def get_ai_status():
+    await ollama_ai.rescan() # Ollama may have started after us; probed at most every OLLAMA_RESCAN_S
     return {
         "available": ollama_ai.available,
         "chat_model": ollama_ai.chat_model,
@@ -34,7 +58,7 @@ async def get_ai_status():
 async def backup_system():
     try:
         backup_path = DREAM_BOX / "_dream_memory.json"
-        with get_conn() as conn:
+        with read_conn() as conn:
             # 1. Export Identities
             ids = [dict(r) for r in conn.execute("SELECT name, vector, face_vector, count, cover_path FROM identities").fetchall()]
             for i in ids:
@@ -43,8 +67,11 @@ async def backup_system():
             
             # 2. Export Links
             links = [dict(r) for r in conn.execute("SELECT identity_links.asset_path, identities.name FROM identity_links JOIN identities ON identity_links.identity_id = identities.id").fetchall()]
+
+            # 3. Export Face Exemplars
+            exemplars = [{"name": r['name'], "vector": r['vector'].hex(), "source_path": r['source_path'], "space": r['space']} for r in conn.execute("SELECT identities.name, e.vector, e.source_path, e.space FROM identity_exemplars e JOIN identities ON e.identity_id = identities.id").fetchall() if r['vector']]
             
-            data = {"identities": ids, "links": links, "version": "7.7.0", "timestamp": int(time.time())}
+            data = {"identities": ids, "links": links, "exemplars": exemplars, "version": "7.7.0", "timestamp": int(time.time())}
             
             with open(backup_path, 'w') as f:
                 json.dump(data, f, indent=2)
@@ -75,26 +102,61 @@ async def restore_system():
                 row = conn.execute("SELECT id FROM identities WHERE name = ?", (l['name'],)).fetchone()
                 if row:
                     conn.execute("INSERT OR IGNORE INTO identity_links (identity_id, asset_path) VALUES (?,?)", (row['id'], l['asset_path']))
+
+            # 3. Restore Face Exemplars (skip ones already present)
+            for e in data.get('exemplars', []):
+                row = conn.execute("SELECT id FROM identities WHERE name = ?", (e['name'],)).fetchone()
+                space = e.get('space', 'clip')
+                if row and not conn.execute("SELECT 1 FROM identity_exemplars WHERE identity_id = ? AND source_path IS ? AND space = ?", (row['id'], e.get('source_path'), space)).fetchone():
+                    conn.execute("INSERT INTO identity_exemplars (identity_id, vector, source_path, created_at, space) VALUES (?,?,?,?,?)", (row['id'], bytes.fromhex(e['vector']), e.get('source_path'), int(time.time()), space))
             
             conn.commit()
+        result_cache.clear()
+        identity_index.invalidate()
         return {"status": "restored"}
     except Exception as e: return {"status": "error", "msg": str(e)}
 
 @router.post("/ai/ask")
 async def ask_ai(req: dict = Body(...)):
+    """
+    {"prompt", "image_path"?, "stream"?}. With stream=true the answer arrives as
+    server-sent events: `data: {"token": "..."}` per chunk, then `data: {"done": true}`.
+    """
     prompt = req.get('prompt', '')
     image_path = req.get('image_path')
-    
+
     # 1. Vision Mode
     if image_path and ollama_ai.vision_model:
         # Resolve path
         full_path = DREAM_BOX / image_path
-        if full_path.exists():
-            return {"response": ollama_ai.describe(str(full_path), prompt)}
-        return {"response": "Image not found."}
-    
+        if not full_path.exists(): return {"response": "Image not found."}
+        # User lane of the captioner: cached per (content, prompt), preempts the bulk backlog
+        if not req.get('stream'): return {"response": await captioner.ask(image_path, prompt)}
+        return sse_response(captioner.ask_stream(image_path, prompt), "Vision Error")
+
     # 2. Chat Mode
-    return {"response": ollama_ai.chat([{'role': 'user', 'content': prompt}])}
+    messages = [{'role': 'user', 'content': prompt}]
+    if not req.get('stream'): return {"response": await ollama_ai.chat(messages)}
+    if not ollama_ai.available or not ollama_ai.chat_model: return {"response": "Ollama not available."}
+    return sse_response(ollama_ai.chat_stream(messages), "Brain Error")
+
+def sse_response(chunks, error_label):
+    async def events():
+        try:
+            async for chunk in chunks: yield f"data: {json.dumps({'token': chunk})}\n\n"
+        except Exception as e: yield f"data: {json.dumps({'token': f'{error_label}: {e}'})}\n\n"
+        yield f"data: {json.dumps({'done': True})}\n\n"
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Every column except the vector blob: search/galaxy never need it in Python
+ASSET_COLUMNS = "id, path, type, ts_real, ts_inferred, time_confidence, time_source, metadata, thumb_path, x, y, z, cluster_id, is_captured, face_count"
+VISUAL_TYPES = ("image", "video")
+
+def fetch_assets(conn, ids):
+    """Hydrate only the requested ids -> {id: row dict}."""
+    if not ids: return {}
+    rows = conn.execute(f"SELECT {ASSET_COLUMNS} FROM assets WHERE id IN ({','.join('?' * len(ids))})", list(ids)).fetchall()
+    return {r['id']: dict(r) for r in rows}
 
 def web_path(p):
     return str(p).replace(get_backslash(), "/")
@@ -113,6 +175,7 @@ def map_asset(r, tag_map={}, id_map={}):
             "src": r['time_source'] or "os",
             "display_path": rel_path,
             "thumb": f"/thumbs/{thumb}" if thumb else None,
+            "thumb_url": f"/thumbs/{r['id']}" if thumb else None, # + ?w= for a sized WebP
             "raw_url": f"/raw/{quote(rel_path.replace(get_backslash(), '/'))}",
             "metadata": json.loads(r['metadata'] if r['metadata'] else "{}"),
             "tags": tag_map.get(rel_path, []),
@@ -134,6 +197,7 @@ class SearchResult(BaseModel):
     type: str
     display_path: str
     thumb: Optional[str]
+    thumb_url: Optional[str] = None
     raw_url: Optional[str]
     metadata: Optional[dict]
     tags: Optional[List[str]]
@@ -147,14 +211,30 @@ class SearchResult(BaseModel):
     z: Optional[float]
     cluster_id: Optional[int]
 
+# --- 🖼️ SIZED THUMBNAILS ---
+@media_router.get("/thumbs/{asset_id:int}")
+def get_thumb(asset_id: int, request: Request, w: Optional[int] = None):
+    """Nearest pyramid level for ?w= as WebP when the client accepts it, else the JPEG fallback."""
+    with read_conn() as conn:
+        row = conn.execute("SELECT thumb_path FROM assets WHERE id = ?", (asset_id,)).fetchone()
+    if not row or not row['thumb_path']: raise HTTPException(status_code=404, detail="No thumbnail")
+    f, media_type = thumbs.pick(row['thumb_path'], w, webp="image/webp" in request.headers.get("accept", ""))
+    if not f: raise HTTPException(status_code=404, detail="No thumbnail")
+    # id -> file can change on re-scan, so revalidate daily; the ETag makes that a 304
+    headers = {"Cache-Control": "public, max-age=86400", "Vary": "Accept"}
+    response = FileResponse(f, media_type=media_type, headers=headers, stat_result=os.stat(f))
+    if request.headers.get("if-none-match") == response.headers.get("etag"):
+        return Response(status_code=304, headers={**headers, "ETag": response.headers["etag"]})
+    return response
+
 # ... (Previous endpoints) ...
 @router.get("/scan/progress")
-async def get_progress(): return scan_status
+async def get_progress(): return {**scan_status, "jobs": await asyncio.to_thread(jobs.stats), "writer": db_writer.stats()}
 
 @router.get("/stats")
 async def get_stats():
     try:
-        with get_conn() as conn:
+        with read_conn() as conn:
             total = conn.execute("SELECT count(*) FROM assets").fetchone()[0]
             counts = dict(conn.execute("SELECT type, count(*) FROM assets GROUP BY type").fetchall())
             tagged = conn.execute("SELECT count(DISTINCT asset_path) FROM identity_links").fetchone()[0]
@@ -172,7 +252,7 @@ async def start_scan(bt: BackgroundTasks):
 
 @router.get("/identities")
 async def list_identities():
-    with get_conn() as conn:
+    with read_conn() as conn:
         # 🛡️ JOIN to get the REAL thumb_path (SSOT)
         rows = conn.execute("""
             SELECT i.name, i.count, a.thumb_path 
@@ -183,7 +263,7 @@ async def list_identities():
 
 @router.get("/discovery")
 async def get_discovery():
-    with get_conn() as conn:
+    with read_conn() as conn:
         # 🛡️ Subquery to ensure we get a non-null thumb for the cluster
         rows = conn.execute("""
             SELECT 
@@ -200,89 +280,255 @@ async def get_discovery():
     return [{"id": r[0], "label": r[1] or f"Sector {r[0]}", "thumb": f"/thumbs/{r[2]}" if r[2] else None, "count": r[3]} for r in rows]
 
 @router.get("/galaxy/all")
-async def get_all_stars():
-    with get_conn() as conn:
-        rows = conn.execute("SELECT * FROM assets WHERE x IS NOT NULL LIMIT 2000").fetchall()
-    return [map_asset(dict(r)) for r in rows if map_asset(dict(r))]
+async def get_all_stars(limit: int = 2000, offset: int = 0):
+    """Verbose JSON page of placed stars; /galaxy/points is the compact full-library feed."""
+    with read_conn() as conn:
+        rows = conn.execute(f"SELECT {ASSET_COLUMNS} FROM assets WHERE x IS NOT NULL AND dup_of IS NULL ORDER BY id LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+    return [a for a in (map_asset(dict(r)) for r in rows) if a]
+
+# 🌠 Packed point cloud: 20 bytes per star, little-endian
+STAR_DTYPE = np.dtype([("x", "<f4"), ("y", "<f4"), ("z", "<f4"), ("id", "<u4"), ("cluster", "<u2"), ("type", "u1"), ("flags", "u1")])
+STAR_TYPES = {"image": 0, "video": 1, "audio": 2}  # anything else -> 255
+STAR_FLAG_THUMB, STAR_FLAG_CAPTURED = 1, 2         # thumb -> GET /thumbs/{id}?w=64
+STAR_CHUNK = 50_000
+
+def _star_filters(cluster, bbox):
+    where, params = ["x IS NOT NULL", "dup_of IS NULL"], []
+    if cluster:
+        ids = [int(c) for c in cluster.split(",") if c.strip()]
+        where.append(f"cluster_id IN ({','.join('?' * len(ids))})"); params += ids
+    if bbox:
+        x0, y0, z0, x1, y1, z1 = (float(v) for v in bbox.split(","))
+        where.append("x BETWEEN ? AND ? AND y BETWEEN ? AND ? AND z BETWEEN ? AND ?"); params += [x0, x1, y0, y1, z0, z1]
+    return " AND ".join(where), params
+
+@router.get("/galaxy/points")
+def get_star_points(lod: int = 0, cluster: Optional[str] = None, bbox: Optional[str] = None):
+    """
+    Every placed star as a stream of STAR_DTYPE records (see X-Star-Format).
+    lod: keep about this many stars via a stable id hash, so zooming in only adds points.
+    cluster: comma-separated cluster ids. bbox: x0,y0,z0,x1,y1,z1 in layout space.
+    Metadata is fetched lazily per star from /galaxy/star/{id}.
+    """
+    try: where, params = _star_filters(cluster, bbox)
+    except ValueError: raise HTTPException(status_code=400, detail="cluster must be ints, bbox must be 6 floats")
+    with read_conn() as conn:
+        total = conn.execute(f"SELECT count(*) FROM assets WHERE {where}", params).fetchone()[0]
+    if lod and total > lod:
+        where += " AND ((id * 2654435761) & 4294967295) < ?"  # Knuth multiplicative hash -> uniform, deterministic sample
+        params = params + [int(lod / total * 4294967296)]
+
+    # Every column comes out of SQLite already numeric, so a chunk converts in one np.array call
+    type_code = "CASE type " + " ".join(f"WHEN '{t}' THEN {c}" for t, c in STAR_TYPES.items()) + " ELSE 255 END"
+    sql = f"""SELECT x, y, z, id, CASE WHEN cluster_id >= 0 THEN cluster_id ELSE 65535 END, {type_code},
+                     (CASE WHEN thumb_path IS NOT NULL THEN {STAR_FLAG_THUMB} ELSE 0 END) | (CASE WHEN is_captured THEN {STAR_FLAG_CAPTURED} ELSE 0 END)
+              FROM assets WHERE {where} ORDER BY id"""
+
+    def stream():
+        with read_conn() as conn:
+            cur = conn.cursor()
+            cur.row_factory = None # plain tuples: sqlite3.Row costs more than the query here
+            cur.execute(sql, params)
+            while rows := cur.fetchmany(STAR_CHUNK):
+                cols = np.array(rows, dtype=np.float64)
+                buf = np.empty(len(rows), dtype=STAR_DTYPE)
+                for i, name in enumerate(STAR_DTYPE.names): buf[name] = cols[:, i]
+                yield buf.tobytes()
+
+    fmt = ",".join(f"{name}:{STAR_DTYPE[name].str}" for name in STAR_DTYPE.names)
+    return StreamingResponse(stream(), media_type="application/octet-stream", headers={"X-Star-Count": str(total), "X-Star-Format": fmt, "Cache-Control": "no-store"})
+
+@router.get("/galaxy/star/{asset_id}")
+async def get_star(asset_id: int):
+    with read_conn() as conn:
+        row = fetch_assets(conn, [asset_id]).get(asset_id)
+        if not row: raise HTTPException(status_code=404, detail="Star not found")
+        names = [r[0] for r in conn.execute("SELECT i.name FROM identity_links l JOIN identities i ON i.id = l.identity_id WHERE l.asset_path = ?", (row['path'],)).fetchall()]
+    return map_asset(row, id_map={row['path']: names})
+
+@router.get("/galaxy/layout")
+async def get_galaxy_layout(): return galaxy.status()
+
+@router.post("/galaxy/relayout")
+async def relayout_galaxy(bt: BackgroundTasks, when: str = "offpeak"):
+    """Full UMAP/KMeans refit: now, or deferred to the off-peak window (default)."""
+    if when == "now": bt.add_task(recalculate_galaxy, True)
+    else: galaxy.schedule_full()
+    return {"status": "scheduled" if when != "now" else "started", **galaxy.status()}
 
 # --- 🔱 ADAPTIVE SEARCH ENGINE ---
-@router.get("/search", response_model=List[SearchResult])
-async def search(q: str = "", threshold: float = 0.15):
+# Ranked [(id, score)] per query: page 2+ is a slice, not a re-rank
+rank_cache = LRUCache(SEARCH_RANK_CACHE, ttl=SEARCH_RANK_TTL_S)
+# Repeat queries skip encoding + scoring. The index version is part of the key, so new
+# scans invalidate implicitly; identity edits (teach/untag/restore) clear it explicitly.
+result_cache = LRUCache(SEARCH_RESULT_CACHE)
+
+def text_vector(q):
+    return ai.encode_text(q).detach().cpu().numpy().astype(np.float32).reshape(-1)
+
+def search_filter(type=None, since=None, until=None, identity=None, cluster_id=None, min_faces=None, max_faces=None):
+    """/search params -> filter dict holding only the constraints given (hashable values: it joins the cache key)."""
+    f = {}
+    if type: f["types"] = tuple(sorted({t.strip() for t in type.split(",") if t.strip()}))
+    if since is not None or until is not None: f["ts"] = (since, until)
+    if identity is not None: f["identity"] = identity
+    if cluster_id is not None: f["cluster_id"] = cluster_id
+    if min_faces is not None or max_faces is not None: f["faces"] = (min_faces, max_faces)
+    return f
+
+def filter_sql(f, alias="a"):
+    """Filter dict -> (" AND ..." clause over assets `alias`, params). Served by the idx_assets_* indexes."""
+    sql, params = [], []
+    ts, faces = f"COALESCE({alias}.ts_real, {alias}.ts_inferred)", f"COALESCE({alias}.face_count, 0)"
+    if "types" in f: sql.append(f"{alias}.type IN ({','.join('?' * len(f['types']))})"); params += f["types"]
+    for col, (lo, hi) in ((ts, f.get("ts", (None, None))), (faces, f.get("faces", (None, None)))):
+        if lo is not None: sql.append(f"{col} >= ?"); params.append(lo)
+        if hi is not None: sql.append(f"{col} <= ?"); params.append(hi)
+    if "identity" in f: sql.append(f"{alias}.path IN (SELECT asset_path FROM identity_links WHERE identity_id = ?)"); params.append(f["identity"])
+    if "cluster_id" in f: sql.append(f"{alias}.cluster_id = ?"); params.append(f["cluster_id"])
+    return "".join(f" AND {s}" for s in sql), params
+
+def index_filter(conn, f):
+    """Filter dict -> VectorIndex.search kwargs: column filters as-is, the person as an id set."""
+    kw = {"ts_range": f.get("ts"), "cluster_id": f.get("cluster_id"), "faces": f.get("faces")}
+    if "identity" in f:
+        kw["ids"] = [r[0] for r in conn.execute("SELECT a.id FROM identity_links l JOIN assets a ON a.path = l.asset_path WHERE l.identity_id = ?", (f["identity"],))]
+    return kw
+
+def allowed(f, types):
+    """The types a result list may hold under the filter (empty = skip that list)."""
+    return tuple(t for t in types if t in f["types"]) if "types" in f else tuple(types)
+
+def rank_assets(q, threshold, nprobe, semantic=True, filters=None):
+    """
+    Full ranked list for a query -> [(asset_id, score or None)], audio first. Ids only, nothing hydrated.
+    Vector, FTS (filenames, camera, audio tags, captions) and named-person rankings are merged by
+    reciprocal rank; semantic=False (quoted query, or models still loading) ranks by FTS alone.
+    filters (search_filter): pushed into SQL and into the vector index before anything is scored.
+    """
     q_lower = (q or "").strip().lower()
-    
-    with get_conn() as conn:
-        links = conn.execute("SELECT asset_path, name FROM identity_links JOIN identities ON identity_links.identity_id = identities.id").fetchall()
-        tag_map = {}
-        id_map = {}
-        for p, n in links: 
-            tag_map.setdefault(p, []).append(n)
-            id_map.setdefault(p, []).append(n)
-
+    f = filters or {}
+    with read_conn() as conn:
+        where, params = filter_sql(f)
         # 🕒 RECENCY MODE
         if not q_lower or q_lower == "everything":
-            img_rows = conn.execute("SELECT * FROM assets WHERE type='image' AND is_captured = 0 ORDER BY COALESCE(ts_real, ts_inferred) DESC LIMIT 500").fetchall()
-            aud_rows = conn.execute("SELECT * FROM assets WHERE type='audio' ORDER BY ts_inferred DESC LIMIT 12").fetchall()
-            return [map_asset(dict(r), tag_map, id_map) for r in aud_rows if map_asset(dict(r), tag_map, id_map)] + \
-                   [map_asset(dict(r), tag_map, id_map) for r in img_rows if map_asset(dict(r), tag_map, id_map)]
-
-        # 🧬 SEMANTIC SEARCH
-        id_rows = conn.execute("SELECT name, vector FROM identities").fetchall()
-        target_vec, matched_name = None, None
-        for name, vec_blob in id_rows:
-            if name.lower() in q_lower:
-                matched_name = name
-                id_v = torch.tensor(np.frombuffer(vec_blob, dtype=np.float32)).to(ai.device)
-                t_v = ai.encode_text(q); target_vec = (id_v * 0.7) + (t_v * 0.3); target_vec = target_vec / target_vec.norm()
-                break
-        if target_vec is None: target_vec = ai.encode_text(q)
-        
-        # 🛡️ SAFETY FIX: Filter out NULL vectors
-        all_assets = conn.execute("SELECT * FROM assets WHERE is_captured = 0 AND vector IS NOT NULL").fetchall()
-
-    if not all_assets: return []
-    
-    img_results, aud_results = [], []
-    db_v = torch.tensor(np.array([np.frombuffer(r['vector'], dtype=np.float32) for r in all_assets])).to(ai.device)
-    if len(target_vec.shape) == 1: target_vec = target_vec.unsqueeze(0)
-    scores = util.cos_sim(target_vec, db_v)[0].cpu().tolist()
-    
+            aud_types, img_types = allowed(f, ("audio",)), allowed(f, VISUAL_TYPES) if "types" in f else ("image",)
+            aud = conn.execute(f"SELECT id FROM assets a WHERE type='audio'{where} ORDER BY ts_inferred DESC LIMIT 12", params).fetchall() if aud_types else []
+            img = conn.execute(f"""
+                SELECT id FROM assets a WHERE type IN ({','.join('?' * len(img_types))}) AND is_captured = 0 AND dup_of IS NULL{where}
+                ORDER BY COALESCE(ts_real, ts_inferred) DESC LIMIT 500
+            """, (*img_types, *params)).fetchall() if img_types else []
+            return [(r[0], None) for r in list(aud) + list(img)]
+
+        # 🔤 LEXICAL: filename / camera / artist terms resolve in the FTS index in milliseconds
+        lex = lexical.search(conn, q, where=where, params=params)
+        if not semantic: return [(i, None) for i, t in lex if t == "audio"] + [(i, None) for i, t in lex if t != "audio"]
+        pushdown = index_filter(conn, f)
+
+        # 🙂 A named person in the query: their linked photos are one more ranking
+        ident = conn.execute("SELECT id, name, vector FROM identities WHERE vector IS NOT NULL AND name != '' AND instr(?, lower(name)) > 0 ORDER BY length(name) DESC LIMIT 1", (q_lower,)).fetchone()
+        people = [r[0] for r in conn.execute(f"""
+            SELECT a.id FROM identity_links l JOIN assets a ON a.path = l.asset_path
+            WHERE l.identity_id = ? AND a.dup_of IS NULL AND a.is_captured = 0{where} ORDER BY COALESCE(a.ts_real, a.ts_inferred) DESC LIMIT ?
+        """, (ident['id'], *params, LEXICAL_LIMIT)).fetchall()] if ident else []
+
+    # 🧬 SEMANTIC SEARCH
+    target_vec, matched_name = None, None
+    if ident:
+        matched_name = ident['name']
+        id_v = np.frombuffer(ident['vector'], dtype=np.float32)
+        t_v = text_vector(q); target_vec = (id_v * 0.7) + (t_v * 0.3); target_vec = target_vec / np.linalg.norm(target_vec)
+    if target_vec is None: target_vec = text_vector(q)
+    q_vec = target_vec.astype(np.float32).reshape(-1)
+
     # 📉 ADAPTIVE THRESHOLD: Start strict, loosen if needed
     current_th = 0.22 if matched_name else threshold
-    
+
+    # 🧭 Resident index: filters mask the rows first, then one matmul over what is left
+    aud_types, vis_types = allowed(f, ("audio",)), allowed(f, VISUAL_TYPES)
+    aud_hits = vector_index.search(q_vec, 12, min_score=0.2, types=aud_types, nprobe=nprobe, **pushdown) if aud_types else []
+    vis_hits = vector_index.search(q_vec, 500, min_score=0.1, types=vis_types, boost={"image": 1.2}, nprobe=nprobe, **pushdown) if vis_types else []
+    aud_lex, vis_lex = [i for i, t in lex if t == "audio"], [i for i, t in lex if t in VISUAL_TYPES]
+    if not aud_hits and not vis_hits and not lex and not people: return []
+
     # Debug: Print top 3 scores
-    print(f"🔍 Search '{q}': Top scores = {sorted(scores, reverse=True)[:3]}")
+    print(f"🔍 Search '{q}': Top scores = {[round(s, 3) for _, s in vis_hits[:3]]}")
+
+    # 📝 HYBRID: visual hits whose caption also matches the query text move up
+    cap = captioner.scores(q_vec, CAPTION_FLOOR)
+    if cap:
+        vis_hits = sorted(((i, s + CAPTION_WEIGHT * (cap[i] - CAPTION_FLOOR)) if i in cap else (i, s) for i, s in vis_hits), key=lambda h: -h[1])
+
+    img_hits = [h for h in vis_hits if h[1] >= current_th]
+    # 🚨 FALLBACK: If nothing found, settle for images above the mercy threshold (already scored)
+    if not img_hits and not vis_lex and not people:
+        print(f"⚠️ No matches for '{q}' at {current_th}. Falling back to 0.1...")
+        img_hits = [h for h in vis_hits if vector_index.type_of(h[0]) == "image"]
+
+    # 🔀 FUSION: reciprocal rank over each list; the cosine stays the displayed score
+    scores = dict(aud_hits + img_hits)
+    audio = lexical.rrf([i for i, _ in aud_hits], aud_lex)
+    visual = lexical.rrf([i for i, _ in img_hits], vis_lex, people)
+    return [(i, scores.get(i)) for i in audio + visual]
+
+def hydrate(page):
+    """Map one page of (id, score) -> API records; tags/identities only for these paths."""
+    with read_conn() as conn:
+        rows = fetch_assets(conn, [i for i, _ in page])
+        paths = [r['path'] for r in rows.values()]
+        links = conn.execute(f"SELECT asset_path, name FROM identity_links JOIN identities ON identity_links.identity_id = identities.id WHERE asset_path IN ({','.join('?' * len(paths))})", paths).fetchall() if paths else []
+    id_map = {}
+    for p, n in links: id_map.setdefault(p, []).append(n)
+    out = []
+    for asset_id, score in page:
+        r = rows.get(asset_id)
+        if not r: continue
+        if score is not None: r['score'] = score
+        mapped = map_asset(r, id_map, id_map)
+        if mapped: out.append(mapped)
+    return out
 
-    for idx, r in enumerate(all_assets):
-        s = scores[idx] * (1.2 if r['type'] == 'image' else 1.0)
-        
-        # Audio logic
-        if r['type'] == 'audio':
-            if s >= 0.2:
-                item = dict(r); item['score'] = s
-                mapped = map_asset(item, tag_map, id_map)
-                if mapped: aud_results.append(mapped)
-        # Image logic
-        else:
-            if s >= current_th:
-                item = dict(r); item['score'] = s
-                mapped = map_asset(item, tag_map, id_map)
-                if mapped: img_results.append(mapped)
-    
-    # 🚨 FALLBACK: If nothing found, try again with very low threshold
-    if not img_results:
-        print(f"⚠️ No matches for '{q}' at {current_th}. Retrying with 0.1...")
-        for idx, r in enumerate(all_assets):
-            if r['type'] == 'image':
-                s = scores[idx] * 1.2
-                if s >= 0.1: # Mercy threshold
-                    item = dict(r); item['score'] = s
-                    mapped = map_asset(item, tag_map, id_map)
-                    if mapped: img_results.append(mapped)
-
-    img_results.sort(key=lambda x: x['score'], reverse=True)
-    aud_results.sort(key=lambda x: x['score'], reverse=True)
-    
-    return aud_results[:12] + img_results[:500]
+@router.get("/search", response_model=List[SearchResult])
+async def search(response: Response, q: str = "", threshold: float = 0.15, nprobe: Optional[int] = None, cursor: Optional[str] = None, limit: int = SEARCH_PAGE_SIZE,
+                 type: Optional[str] = None, since: Optional[int] = None, until: Optional[int] = None, identity: Optional[int] = None,
+                 cluster_id: Optional[int] = None, min_faces: Optional[int] = None, max_faces: Optional[int] = None):
+    """
+    One page of the ranked results. The X-Next-Cursor header (absent on the last page)
+    continues the same ranking: pass it back as ?cursor= with the same q. A quoted q
+    ("IMG_0042") is matched against filenames/tags/captions only, without the models.
+    Filters: type (comma list), since/until (epoch seconds), identity (id), cluster_id, min_faces/max_faces.
+    """
+    filters = search_filter(type, since, until, identity, cluster_id, min_faces, max_faces)
+    semantic = (q or "").strip().lower() not in ("", "everything") and not lexical.is_exact(q)
+    warming = semantic and not ai.ready # models still loading: FTS results only, 503 if there are none
+    token, offset = None, 0
+    if cursor:
+        try: token, offset = cursor.rsplit(".", 1); offset = int(offset)
+        except ValueError: raise HTTPException(status_code=400, detail="Bad cursor")
+    ranked = rank_cache.get(token) if token else None
+    if ranked is None:  # first page, or the cached ranking expired: rank again under a fresh token
+        key = (" ".join((q or "").split()), threshold, nprobe, semantic and not warming, tuple(sorted(filters.items())), vector_index.version, captioner.version)
+        ranked = result_cache.get(key)
+        if ranked is None:
+            ranked = rank_assets(q, threshold, nprobe, semantic and not warming, filters)
+            if warming and not ranked: raise HTTPException(status_code=503, detail=f"Neural cores {ai.state}", headers={"Retry-After": "5"})
+            result_cache.put(key, ranked)
+        token = secrets.token_urlsafe(8)
+        rank_cache.put(token, ranked)
+
+    limit = max(1, limit)
+    page = ranked[offset:offset + limit]
+    response.headers["X-Total-Count"] = str(len(ranked))
+    if offset + limit < len(ranked): response.headers["X-Next-Cursor"] = f"{token}.{offset + limit}"
+    return hydrate(page)
+
+@router.get("/ai/captions")
+async def caption_stats():
+    return await asyncio.to_thread(captioner.stats)
+
+@router.get("/search/cache")
+async def search_cache_stats():
+    return {"text_embeddings": ai.text_cache.stats(), "results": result_cache.stats(), "pages": rank_cache.stats(), "index_version": vector_index.version}
 
 @router.post("/identities/teach")
 async def teach_identity(req: dict = Body(...)):
@@ -315,23 +561,32 @@ async def teach_identity(req: dict = Body(...)):
                             largest = max(faces, key=lambda f: (f['bbox'][2]-f['bbox'][0]) * (f['bbox'][3]-f['bbox'][1]))
                             x1, y1, x2, y2 = largest['bbox']
                             
-                            # CLIP Encode Crop
-                            face_crop = img.crop((x1, y1, x2, y2))
-                            embedding = ai.encode_image([face_crop])[0]
+                            if largest.get('embedding') is not None:
+                                # Backend-native face embedding (ArcFace)
+                                embedding = np.asarray(largest['embedding'], dtype=np.float32)
+                            else:
+                                # CLIP Encode Crop
+                                face_crop = img.crop((x1, y1, x2, y2))
+                                embedding = ai.encode_image([face_crop])[0]
                             
                             face_vec_blob = embedding.tobytes()
-                            print(f"🗿 [TEACH] Captured CLIP-Face Vector for {name}")
+                            print(f"🗿 [TEACH] Captured {face_ai.space.upper()}-Face Vector for {name}")
                 except Exception as e:
                     print(f"⚠️ Face Teach Error: {e}")
                     traceback.print_exc()
 
                 # Update DB (Keep existing vector if face extraction fails)
-                if face_vec_blob:
+                if face_vec_blob and face_ai.space == "clip": # face_vector is the legacy CLIP-space slot
                     conn.execute("UPDATE identities SET vector=?, face_vector=?, count=?, cover_path=? WHERE id=?", (mv.tobytes(), face_vec_blob, len(rows), anchors[0], id_id))
                 else:
                     conn.execute("UPDATE identities SET vector=?, count=?, cover_path=? WHERE id=?", (mv.tobytes(), len(rows), anchors[0], id_id))
+                if face_vec_blob:
+                    # Every taught face stays an exemplar, so later teaches add angles instead of replacing them
+                    conn.execute("INSERT INTO identity_exemplars (identity_id, vector, source_path, created_at, space) VALUES (?,?,?,?,?)", (id_id, face_vec_blob, anchors[0], int(time.time()), face_ai.space))
             
             conn.commit()
+        result_cache.clear()
+        identity_index.invalidate()
         return {"status": "learned", "id": id_id}
     except Exception as e: return {"status": "error", "msg": str(e)}
 
@@ -346,34 +601,33 @@ async def untag_identity(req: dict = Body(...)):
             if not row: return {"status": "error", "msg": "Identity not found"}
             id_id = row['id']
             
-            # Remove Link
+            # Remove Link (and any face exemplar taught from that photo)
             conn.execute("DELETE FROM identity_links WHERE identity_id = ? AND asset_path = ?", (id_id, path))
+            conn.execute("DELETE FROM identity_exemplars WHERE identity_id = ? AND source_path = ?", (id_id, path))
             
             # Update Count
             count = conn.execute("SELECT count(*) FROM identity_links WHERE identity_id = ?", (id_id,)).fetchone()[0]
             conn.execute("UPDATE identities SET count = ? WHERE id = ?", (count, id_id))
             conn.commit()
+        result_cache.clear()
+        identity_index.invalidate()
         return {"status": "untagged", "name": name}
     except Exception as e: return {"status": "error", "msg": str(e)}
 
 @router.get("/search/seed")
-async def search_by_seed(path: str, threshold: float = 0.22):
-    with get_conn() as conn:
-        seed_row = conn.execute("SELECT vector FROM assets WHERE path = ?", (path,)).fetchone()
-        if not seed_row: return []
-        seed_vec = torch.tensor(np.frombuffer(seed_row['vector'], dtype=np.float32)).to(ai.device)
-        # 🛡️ SAFETY FIX: Filter NULL vectors
-        all_assets = conn.execute("SELECT * FROM assets WHERE is_captured = 0 AND vector IS NOT NULL").fetchall()
-    if not all_assets: return []
-    db_v = torch.tensor(np.array([np.frombuffer(r['vector'], dtype=np.float32) for r in all_assets])).to(ai.device)
-    scores = util.cos_sim(seed_vec, db_v)[0].cpu().tolist()
+async def search_by_seed(path: str, threshold: float = 0.22, nprobe: Optional[int] = None):
+    with read_conn() as conn:
+        seed_row = conn.execute("SELECT id, vector FROM assets WHERE path = ?", (path,)).fetchone()
+        if not seed_row or not seed_row['vector']: return []
+        seed_vec = vector_index.get(seed_row['id'])
+        if seed_vec is None: seed_vec = np.frombuffer(seed_row['vector'], dtype=np.float32)
+        hits = vector_index.search(seed_vec, 200, min_score=threshold, nprobe=nprobe)
+        rows = fetch_assets(conn, [i for i, _ in hits])
     results = []
-    for idx, r in enumerate(all_assets):
-        if scores[idx] < threshold: continue
-        item = map_asset(dict(r))
-        if item: item['score'] = float(scores[idx]); results.append(item)
-    results.sort(key=lambda x: x['score'], reverse=True)
-    return results[:200]
+    for asset_id, s in hits:
+        item = map_asset(rows[asset_id]) if asset_id in rows else None
+        if item: item['score'] = s; results.append(item)
+    return results
 
 @router.post("/identities/cluster/tag")
 async def tag_cluster(req: dict = Body(...)):
@@ -381,66 +635,76 @@ async def tag_cluster(req: dict = Body(...)):
     Mass-tags a cluster of assets with a name.
     """
     try:
-        name, anchors = req.get('name'), req.get('anchors', [])
+        name, anchors, cluster_id = req.get('name'), req.get('anchors', []), req.get('cluster_id')
         if not name or not anchors: return {"status": "error", "msg": "Missing data"}
         
         # Reuse teach logic (it handles insert/update/vector calc)
-        return await teach_identity({"name": name, "anchors": anchors})
+        res = await teach_identity({"name": name, "anchors": anchors})
+        if res.get("status") == "learned" and cluster_id is not None and cluster_id >= 0:
+            # Name the whole face cluster: every face, every photo, and its centroid as an exemplar
+            id_id = res["id"]
+            with read_conn() as conn:
+                c = conn.execute("SELECT centroid, space FROM face_clusters WHERE id = ?", (cluster_id,)).fetchone()
+            if c:
+                face_clusters.drop(cluster_id) # first, so no new face joins it unnamed behind these updates
+                db_writer.execute("UPDATE face_clusters SET identity_id = ? WHERE id = ?", (id_id, cluster_id))
+                db_writer.execute("UPDATE faces SET identity_id = ? WHERE cluster_id = ? AND identity_id IS NULL", (id_id, cluster_id))
+                db_writer.execute("INSERT OR IGNORE INTO identity_links (identity_id, asset_path) SELECT DISTINCT ?, asset_path FROM faces WHERE cluster_id = ?", (id_id, cluster_id))
+                db_writer.execute("INSERT INTO identity_exemplars (identity_id, vector, source_path, created_at, space) VALUES (?,?,NULL,?,?)", (id_id, c['centroid'], int(time.time()), c['space']))
+                db_writer.execute("UPDATE identities SET count = (SELECT count(*) FROM identity_links WHERE identity_id = ?) WHERE id = ?", (id_id, id_id))
+                await asyncio.to_thread(db_writer.flush)
+            result_cache.clear()
+            identity_index.invalidate()
+        return res
     except Exception as e: return {"status": "error", "msg": str(e)}
 
-from sklearn.cluster import DBSCAN
 
 @router.post("/weave")
 async def weave(req: dict = Body(...)): return []
 
 @router.get("/faces/unidentified")
-async def get_unidentified_faces():
+async def get_unidentified_faces(limit: int = FACE_CLUSTER_PAGE):
     """
-    Clusters unidentified faces using DBSCAN on asset vectors.
+    Biggest unnamed face clusters, straight from the incrementally maintained
+    face_clusters table (one indexed read + a few examples per cluster).
     """
     try:
-        with get_conn() as conn:
-            # 1. Get untagged assets that have faces
-            # (In simplified mode, we use the main vector as proxy)
+        with read_conn() as conn:
+            if not conn.execute("SELECT 1 FROM faces LIMIT 1").fetchone(): return legacy_face_clusters(conn)
             rows = conn.execute("""
-                SELECT id, path, vector, thumb_path 
-                FROM assets 
-                WHERE face_count > 0 
-                AND path NOT IN (SELECT asset_path FROM identity_links)
-                LIMIT 1000
-            """).fetchall()
-            
-            if not rows: return []
-
-            # 2. Prepare Vectors
-            ids = [r['id'] for r in rows]
-            vecs = np.array([np.frombuffer(r['vector'], dtype=np.float32) for r in rows])
-            
-            # 3. Cluster (DBSCAN is great for "unknown number of groups")
-            # eps=0.15 (similarity threshold), min_samples=3 (needs 3 photos to form a group)
-            clustering = DBSCAN(eps=0.15, min_samples=3, metric='cosine').fit(vecs)
-            labels = clustering.labels_
-
-            # 4. Group by Label
-            clusters = {}
-            for idx, label in enumerate(labels):
-                if label == -1: continue # Noise
-                if label not in clusters:
-                    clusters[label] = {
-                        "id": int(label),
-                        "count": 0,
-                        "thumb": f"/thumbs/{rows[idx]['thumb_path']}",
-                        "examples": []
-                    }
-                clusters[label]["count"] += 1
-                if len(clusters[label]["examples"]) < 5:
-                    clusters[label]["examples"].append(rows[idx]['path'])
-
-            # 5. Sort by size
-            result = sorted(clusters.values(), key=lambda x: x['count'], reverse=True)
+                SELECT id, size, cover_thumb FROM face_clusters
+                WHERE identity_id IS NULL AND space = ? AND size >= ?
+                ORDER BY size DESC LIMIT ?
+            """, (face_ai.space, FACE_CLUSTER_MIN_SIZE, limit)).fetchall()
+            result = []
+            for r in rows:
+                examples = [e[0] for e in conn.execute("SELECT DISTINCT asset_path FROM faces WHERE cluster_id = ? AND identity_id IS NULL LIMIT 5", (r['id'],)).fetchall()]
+                if not examples: continue
+                result.append({"id": r['id'], "count": r['size'], "thumb": f"/thumbs/{r['cover_thumb']}" if r['cover_thumb'] else None, "examples": examples})
             return result
-
     except Exception as e:
         print(f"Cluster Error: {e}")
         traceback.print_exc()
-        return []
\ No newline at end of file
+        return []
+
+def legacy_face_clusters(conn):
+    """Libraries scanned before per-face storage: DBSCAN over whole-image vectors as a proxy."""
+    from sklearn.cluster import DBSCAN
+    rows = conn.execute("""
+        SELECT id, path, vector, thumb_path 
+        FROM assets 
+        WHERE face_count > 0 AND vector IS NOT NULL
+        AND path NOT IN (SELECT asset_path FROM identity_links)
+        LIMIT 1000
+    """).fetchall()
+    if not rows: return []
+    vecs = np.array([np.frombuffer(r['vector'], dtype=np.float32) for r in rows])
+    # eps=0.15 (similarity threshold), min_samples=3 (needs 3 photos to form a group)
+    labels = DBSCAN(eps=0.15, min_samples=3, metric='cosine').fit(vecs).labels_
+    clusters = {}
+    for idx, label in enumerate(labels):
+        if label == -1: continue # Noise
+        c = clusters.setdefault(label, {"id": -1 - int(label), "count": 0, "thumb": f"/thumbs/{rows[idx]['thumb_path']}", "examples": []})
+        c["count"] += 1
+        if len(c["examples"]) < 5: c["examples"].append(rows[idx]['path'])
+    return sorted(clusters.values(), key=lambda x: x['count'], reverse=True)
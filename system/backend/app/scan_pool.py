@@ -0,0 +1,203 @@
+"""
+🧵 PROCESS-POOL SCAN (CPU-only hosts)
+The threaded AssetPipeline keeps EXIF parsing, mutagen, PIL resizes and JPEG/WebP saves on one
+GIL. Here N spawned workers each own a NeuralCore + face engine pinned to SCAN_PROCESS_THREADS
+torch threads and run load -> metadata -> thumbnails -> vectors -> face detection end to end.
+Workers write their content-addressed thumbnails straight into THUMB_DIR and hand vectors and
+face embeddings back in one shared-memory block per batch; the parent keeps the single DB writer,
+identity matching and face clustering.
+
+    paths ─▶ [worker 1..N: decode, thumbs, CLIP, faces] ─▶ shared memory ─▶ parent: faces + assets via db_writer
+"""
+import os
+import signal
+import time
+import traceback
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+import numpy as np
+
+from .config import SCAN_PROCESSES, SCAN_PROCESS_THREADS, WRITER_FLUSH_TIMEOUT_S
+from .db import db_writer
+from .models import ai
+from .face_engine import face_ai
+from .scanner import ScanContext, LoadStep, MetadataStep, ThumbnailStep, VectorStep, FaceIDStep, DatabaseStep, StageStats
+
+# --- 🧱 SHARED MEMORY: float32 rows out of the workers without pickling them ---
+def pack(arrays):
+    """float32 arrays -> (segment name, [(offset, length)]). The reader unlinks the segment."""
+    total = sum(a.size for a in arrays)
+    if not total: return None, []
+    shm = SharedMemory(create=True, size=total * 4)
+    buf = np.ndarray((total,), dtype=np.float32, buffer=shm.buf)
+    spans, off = [], 0
+    for a in arrays:
+        buf[off:off + a.size] = a.ravel()
+        spans.append((off, a.size))
+        off += a.size
+    del buf # the view must go before the mapping can close
+    shm.close()
+    return shm.name, spans
+
+def unpack(name, spans):
+    if not name: return []
+    shm = SharedMemory(name=name)
+    try:
+        buf = np.ndarray((shm.size // 4,), dtype=np.float32, buffer=shm.buf)
+        out = [buf[o:o + n].copy() for o, n in spans]
+        del buf
+    finally:
+        shm.close()
+        shm.unlink()
+    return out
+
+# --- 👷 WORKER SIDE ---
+_decode_steps, _vector_step, _face_step = [LoadStep(), MetadataStep(), ThumbnailStep()], VectorStep(), FaceIDStep()
+
+def init_worker(threads):
+    """Runs once per worker process: pin threads, then load this process's own models."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # Ctrl-C is the parent's to handle
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"): os.environ[var] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    try: torch.set_num_interop_threads(1)
+    except RuntimeError: pass # already fixed by an earlier parallel call
+    if hasattr(face_ai, "threads"): face_ai.threads = threads # onnxruntime intra-op threads
+    ai.lean = True # the text tower only loads if an audio file needs it
+    ai.load()
+
+def ping():
+    time.sleep(0.2) # long enough that every worker gets one
+    return os.getpid(), ai.state
+
+def scan_batch(items):
+    """
+    [(path, fingerprint)] -> {"items": [ScanContext | error str], "faces": [(ctx, frame, face)], "shm", "spans", "busy"}.
+    Contexts come back without pixels; their vectors and face embeddings live in the shared block.
+    """
+    t0 = time.perf_counter()
+    out = []
+    for p, fp in items:
+        try:
+            ctx = ScanContext(p, fp)
+            ok = all(step.process(ctx) for step in _decode_steps)
+            out.append(ctx if ok else (ctx.error or "Decode step rejected the file"))
+        except Exception as e:
+            print(f"❌ Decode Error {Path(p).name}: {e}")
+            out.append(f"Decode: {e}")
+    ctxs = [c for c in out if isinstance(c, ScanContext)]
+    found = []
+    if ctxs:
+        _vector_step.process_batch(ctxs)
+        try: found = _face_step.detect(ctxs)
+        except Exception as e: print(f"⚠️ FaceID Error: {e}"); traceback.print_exc()
+
+    vectored = [i for i, c in enumerate(out) if isinstance(c, ScanContext) and c.vector]
+    name, spans = pack([np.frombuffer(out[i].vector, dtype=np.float32) for i in vectored] +
+                       [np.asarray(face['embedding'], dtype=np.float32) for _, _, face in found])
+    for c in ctxs: c.pil_image, c.video_frames, c.vector = None, [], None
+    for _, _, face in found: face['embedding'] = None
+    return {"items": out, "faces": found, "vectored": vectored,
+            "shm": name, "spans": spans, "busy": time.perf_counter() - t0}
+
+# --- 🏭 PARENT SIDE ---
+_pool, _pool_key = None, None
+
+def executor(processes=None, threads=None, context=None):
+    """The shared worker pool; kept alive between scans so models load once per worker."""
+    global _pool, _pool_key
+    key = (processes or SCAN_PROCESSES or 1, threads or SCAN_PROCESS_THREADS)
+    if _pool is not None and (_pool_key != key or getattr(_pool, "_broken", False)): shutdown()
+    if _pool is None:
+        print(f"🧵 [SCAN] Spawning {key[0]} scan workers x {key[1]} threads")
+        resource_tracker.ensure_running() # one tracker shared with the workers: their segments are unlinked here
+        _pool = ProcessPoolExecutor(max_workers=key[0], mp_context=context or mp.get_context("spawn"),
+                                    initializer=init_worker, initargs=(key[1],))
+        _pool_key = key
+    return _pool
+
+def shutdown():
+    global _pool, _pool_key
+    if _pool is not None: _pool.shutdown(wait=True, cancel_futures=True)
+    _pool, _pool_key = None, None
+
+class ProcessPipeline:
+    """Drop-in for AssetPipeline.run() that fans batches out to worker processes."""
+    def __init__(self, processes=None, threads=None, batch_size=None, jobs=None, context=None):
+        self.processes = processes or SCAN_PROCESSES or 1
+        self.threads = threads or SCAN_PROCESS_THREADS
+        self.batch_size = batch_size or ai.batch_size
+        self.jobs = jobs
+        self.context = context # multiprocessing context (default: spawn, torch is not fork-safe)
+        self.face_step, self.db_step = FaceIDStep(), DatabaseStep(jobs)
+        self.stages = {}
+
+    def pool(self):
+        return executor(self.processes, self.threads, self.context)
+
+    def start(self):
+        """Spawn every worker and wait until each has its models loaded -> [(pid, state)]."""
+        pool = self.pool()
+        return sorted(set(f.result() for f in [pool.submit(ping) for _ in range(self.processes * 2)]))
+
+    def stage_report(self):
+        return {name: st.snapshot() for name, st in self.stages.items()}
+
+    def collect(self, batch, result):
+        """Parent side of one batch: rebuild vectors, then faces and assets through the single writer."""
+        t0 = time.perf_counter()
+        rows = iter(unpack(result["shm"], result["spans"]))
+        items = result["items"]
+        for i in result["vectored"]: items[i].vector = next(rows).tobytes()
+        for _, _, face in result["faces"]: face['embedding'] = next(rows)
+
+        ctxs, failed = [], 0
+        for p, item in zip(batch, items):
+            if isinstance(item, ScanContext): ctxs.append(item)
+            else:
+                failed += 1
+                if self.jobs: self.jobs.failed(p, item)
+        if result["faces"]:
+            try: self.face_step.record(result["faces"])
+            except Exception as e: print(f"⚠️ FaceID Error: {e}"); traceback.print_exc()
+        written = self.db_step.process_batch(ctxs) if ctxs else []
+        if self.jobs: self.jobs.finished(written)
+        self.stages["workers"].record(result["busy"], done=len(ctxs), failed=failed)
+        self.stages["write"].record(time.perf_counter() - t0, done=len(written), failed=len(ctxs) - len(written))
+
+    def run(self, paths, on_progress=None, fingerprints=None):
+        self.stages = {"workers": StageStats(), "write": StageStats()}
+        paths = list(paths)
+        batches = iter([paths[i:i + self.batch_size] for i in range(0, len(paths), self.batch_size)])
+        pending = {}
+
+        def submit():
+            batch = next(batches, None)
+            if batch is None: return
+            if self.jobs:
+                for p in batch: self.jobs.started(p)
+            items = [(str(p), fingerprints.get(p) if fingerprints else None) for p in batch]
+            try: fut = self.pool().submit(scan_batch, items)
+            except BrokenProcessPool: shutdown(); fut = self.pool().submit(scan_batch, items)
+            pending[fut] = batch
+
+        for _ in range(self.processes * 2): submit() # two batches in flight per worker
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                batch = pending.pop(fut)
+                try: self.collect(batch, fut.result())
+                except Exception as e:
+                    # a worker died (OOM, native crash): the batch fails and backs off, the pool is rebuilt
+                    print(f"❌ Scan worker error: {e}")
+                    if self.jobs:
+                        for p in batch: self.jobs.failed(p, f"Worker: {e}")
+                    self.stages["workers"].record(0, failed=len(batch))
+                if on_progress: on_progress(len(batch), self.stage_report(), Path(batch[-1]).name)
+                submit()
+        db_writer.flush(timeout=WRITER_FLUSH_TIMEOUT_S)
+        return self.stage_report()
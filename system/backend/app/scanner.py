@@ -1,99 +1,133 @@
+import math
 import os
 import time
 import json
 import numpy as np
 import threading
-import cv2
 import subprocess
 import traceback
 import io
 from pathlib import Path
+from queue import Queue, Empty
 from PIL import Image, ImageOps, ImageFile
 from PIL.ExifTags import TAGS
 from mutagen import File as MutagenFile
-import umap
-import torch
-from sklearn.cluster import KMeans
 from rich.console import Console
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
-from .config import DREAM_BOX, THUMB_DIR, IMAGE_EXTS, AUDIO_EXTS, VIDEO_EXTS, IGNORE_DIRS
-from .db import get_conn
+from .config import DREAM_BOX, THUMB_DIR, IMAGE_EXTS, AUDIO_EXTS, VIDEO_EXTS, IGNORE_DIRS, SCAN_DECODE_WORKERS, SCAN_QUEUE_BATCHES, SCAN_PROCESSES, WATCH_DEBOUNCE_S, RECONCILE_INTERVAL_S, PURGE_MAX_FRACTION, PURGE_GUARD_MIN_ROWS, SCAN_WORKING_SIZE, FACE_CROP_MIN_PX, WRITER_FLUSH_TIMEOUT_S
+from .db import get_conn, read_conn, db_writer
 from .models import ai
 from .face_engine import face_ai
+from .identity_index import identity_index
+from .face_clusters import face_clusters
+from .vector_index import vector_index
+from .galaxy import galaxy
+from .fingerprint import fingerprint, full_hash
+from .jobs import jobs
+from . import thumbs, video, lexical
 
 console = Console()
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
-scan_status = {"current": 0, "total": 0, "status": "idle", "last_event": "System Standby", "last_file": "", "dirty": False}
+scan_status = {"current": 0, "total": 0, "status": "idle", "last_event": "System Standby", "last_file": "", "dirty": False, "last_full_scan": 0}
 
 def get_backslash(): return os.sep
 def thumb_name(p):
     clean = str(p).replace(":", "").replace(os.sep, "_").replace("/", "_")
     return os.path.splitext(clean)[0] + ".jpg"
 
+def open_working(path, size=SCAN_WORKING_SIZE):
+    """
+    Decode once at working resolution -> (RGB image, full (w, h) after EXIF rotation).
+    JPEG draft picks the smallest DCT scale (1/2..1/8) that still covers `size`, so a
+    48 MP photo is never materialized at full size; other formats use reduce().
+    """
+    img = Image.open(path)
+    w, h = img.size
+    img.draft("RGB", (size * w // max(w, h), size * h // max(w, h))) # long edge >= size after scaling
+    if img.getexif().get(0x0112) in (5, 6, 7, 8): w, h = h, w # EXIF orientation rotates by 90°
+    img = ImageOps.exif_transpose(img).convert("RGB") # Fix RGBA issue
+    img.thumbnail((size, size), Image.BICUBIC, reducing_gap=2.0)
+    return img, (w, h)
+
+def full_res_crops(ctx, boxes, min_px=FACE_CROP_MIN_PX):
+    """Re-cut face boxes (working-image pixels) from a decode just large enough for min_px crops."""
+    scale_needed = max(min_px / max(1, min(x2 - x1, y2 - y1)) for x1, y1, x2, y2 in boxes)
+    long_edge = min(max(ctx.full_size), math.ceil(max(ctx.pil_image.size) * scale_needed))
+    with Image.open(ctx.path) as img:
+        w, h = img.size
+        img.draft("RGB", (long_edge * w // max(w, h), long_edge * h // max(w, h)))
+        img = ImageOps.exif_transpose(img).convert("RGB")
+    k = img.width / ctx.pil_image.width
+    return [img.crop((round(x1 * k), round(y1 * k), round(x2 * k), round(y2 * k))) for x1, y1, x2, y2 in boxes]
+
+def source_box(ctx, box):
+    """Working-image box -> original pixels (faces are stored in source coordinates)."""
+    if not ctx.full_size or ctx.type != "image": return list(box)
+    k = ctx.full_size[0] / ctx.pil_image.width
+    return [round(v * k) for v in box]
+
 # --- 🧱 COMPOSABLE STEPS ---
 
 class ScanContext:
-    def __init__(self, path):
+    def __init__(self, path, fingerprint=None):
         self.path = Path(path)
         self.rel_path = os.path.relpath(path, DREAM_BOX).replace(os.sep, "/")
+        st = os.stat(path)
+        self.size, self.mtime = st.st_size, st.st_mtime
+        self.fingerprint = fingerprint
         self.type = "unknown"
         self.meta = {}
         self.vector = None
         self.thumb_path = None
         self.ts_real = None
-        self.ts_inferred = int(os.path.getmtime(path))
+        self.ts_inferred = int(st.st_mtime)
         self.time_confidence = 0.1
         self.time_source = "os"
-        self.pil_image = None # Main Image (or Middle Frame)
+        self.pil_image = None # Main Image (or Middle Frame), at working resolution
+        self.full_size = None # source (w, h) when pil_image was decoded smaller
         self.video_frames = [] # Additional frames for video analysis
+        self.started_at = time.time()
+        self.error = None
 
 class BaseStep:
     def process(self, ctx: ScanContext) -> bool: return True
 
+    def process_batch(self, ctxs):
+        """Default: per-item. Steps that can share one model call override this. Returns survivors."""
+        return [ctx for ctx in ctxs if self.process(ctx)]
+
 class LoadStep(BaseStep):
     def process(self, ctx: ScanContext) -> bool:
         ext = ctx.path.suffix.lower()
         try:
             if ext in IMAGE_EXTS:
                 ctx.type = "image"
-                img = Image.open(ctx.path)
-                ctx.pil_image = ImageOps.exif_transpose(img).convert("RGB")
+                ctx.pil_image, ctx.full_size = open_working(ctx.path)
             elif ext in AUDIO_EXTS:
                 ctx.type = "audio"
             elif ext in VIDEO_EXTS:
                 ctx.type = "video"
-                cap = cv2.VideoCapture(str(ctx.path))
-                if cap.isOpened():
-                    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                    fps = cap.get(cv2.CAP_PROP_FPS) or 30
-                    ctx.meta["duration"] = frame_count / fps
-                    
-                    # 🎞️ Multi-Frame Extraction (Start, Middle, End)
-                    points = [frame_count // 6, frame_count // 2, (frame_count * 5) // 6]
-                    for i, p in enumerate(points):
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, p)
-                        ret, frame = cap.read()
-                        if ret:
-                            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                            pil = Image.fromarray(rgb)
-                            ctx.video_frames.append(pil)
-                            if i == 1: ctx.pil_image = pil # Use middle frame as main thumbnail
-                    
-                    cap.release()
+                # 🎞️ Keyframes by timestamp at working resolution, within a per-file budget
+                frames, duration = video.keyframes(ctx.path)
+                if duration: ctx.meta["duration"] = duration
+                ctx.video_frames = frames
+                if frames: ctx.pil_image = frames[len(frames) // 2] # Use middle frame as main thumbnail
             return True
         except Exception as e:
             print(f"❌ Load Error {ctx.path.name}: {e}")
+            ctx.error = f"Load: {e}"
             return False
 
 class MetadataStep(BaseStep):
     def process(self, ctx: ScanContext) -> bool:
-        ctx.meta["size_kb"] = round(os.path.getsize(ctx.path)/1024, 2)
+        ctx.meta["size_kb"] = round(ctx.size/1024, 2)
+        if ctx.fingerprint is None: ctx.fingerprint = fingerprint(ctx.path, ctx.size)
         try:
             if ctx.type == "image" and ctx.pil_image:
-                ctx.meta["res"] = f"{ctx.pil_image.width}x{ctx.pil_image.height}"
+                ctx.meta["res"] = "%dx%d" % (ctx.full_size or ctx.pil_image.size)
                 exif = ctx.pil_image.getexif()
                 if exif:
                     exif_data = {}
@@ -110,82 +144,120 @@ class MetadataStep(BaseStep):
                 if audio:
                     ctx.meta["title"] = str(audio.get("title", [ctx.path.name])[0])
                     ctx.meta["artist"] = str(audio.get("artist", ["Unknown Artist"])[0])
+                    if audio.get("album"): ctx.meta["album"] = str(audio.get("album")[0])
         except: pass
         return True
 
 class VectorStep(BaseStep):
     def process(self, ctx: ScanContext) -> bool:
-        try:
-            if ctx.pil_image:
-                # 🖼️ Main Visual Embedding
-                v_img = torch.tensor(ai.encode_image([ctx.pil_image])[0]).to(ai.device)
-                ctx.vector = v_img.cpu().numpy().tobytes()
+        self.process_batch([ctx])
+        return True
 
-            elif ctx.type == "audio":
-                # 🎵 Audio Embedding
-                query = f"{ctx.meta.get('title', '')} {ctx.meta.get('artist', '')}"
-                v_aud = ai.encode_text(query).squeeze(0)
-                ctx.vector = v_aud.cpu().numpy().tobytes()
+    def process_batch(self, ctxs):
+        visual = [c for c in ctxs if c.pil_image]
+        audio = [c for c in ctxs if not c.pil_image and c.type == "audio"]
+        try:
+            if visual:
+                # 🖼️ Main Visual Embedding (one encoder call per micro-batch)
+                vecs = ai.encode_image([c.pil_image for c in visual])
+                for c, v in zip(visual, vecs): c.vector = v.astype(np.float32).tobytes()
+            if audio:
+                # 🎵 Audio Embedding (title + artist as a text query)
+                queries = [f"{c.meta.get('title', '')} {c.meta.get('artist', '')}" for c in audio]
+                vecs = ai.encode_text(queries).cpu().numpy()
+                for c, v in zip(audio, vecs): c.vector = v.astype(np.float32).tobytes()
         except Exception as e:
             print(f"⚠️ Vector Error: {e}")
-        return True
+            if len(ctxs) > 1:
+                for c in ctxs: self.process_batch([c]) # isolate the bad file
+        return ctxs
 
 class FaceIDStep(BaseStep):
     def process(self, ctx: ScanContext) -> bool:
-        # Collect frames to scan (Image: [main], Video: [frame1, frame2, frame3])
-        frames_to_scan = []
-        if ctx.type == "image" and ctx.pil_image: frames_to_scan = [ctx.pil_image]
-        elif ctx.type == "video": frames_to_scan = ctx.video_frames
-
-        if not frames_to_scan: return True
+        self.process_batch([ctx])
+        return True
 
+    def process_batch(self, ctxs):
         try:
-            with get_conn() as conn:
-                id_rows = conn.execute("SELECT id, name, face_vector FROM identities WHERE face_vector IS NOT NULL").fetchall()
-                known_ids = []
-                for r in id_rows:
-                    if r['face_vector']:
-                        known_ids.append((r['id'], r['name'], np.frombuffer(r['face_vector'], dtype=np.float32)))
-
-                total_faces_found = 0
-                
-                for img_frame in frames_to_scan:
-                    img_np = np.array(img_frame)
-                    faces = face_ai.detect(img_np)
-                    if not faces: continue
-                    
-                    total_faces_found += len(faces)
-
-                    for face in faces:
-                        # ✂️ Crop & CLIP-Embed
-                        x1, y1, x2, y2 = face['bbox']
-                        if x2 > x1 and y2 > y1:
-                            face_crop = img_frame.crop((x1, y1, x2, y2))
-                            embedding = ai.encode_image([face_crop])[0]
-                            
-                            best_score = 0
-                            best_match = None
-
-                            for rid, name, id_vec in known_ids:
-                                score = np.dot(embedding, id_vec) / (np.linalg.norm(embedding) * np.linalg.norm(id_vec))
-                                if score > best_score:
-                                    best_score = score
-                                    best_match = (rid, name)
-                            
-                            if best_score > 0.65:
-                                rid, name = best_match
-                                conn.execute("INSERT OR IGNORE INTO identity_links (identity_id, asset_path) VALUES (?,?)", (rid, ctx.rel_path))
-                                conn.execute("UPDATE identities SET count = count + 1 WHERE id = ?", (rid,))
-                                print(f"🗿 [FACE] Matched {name} in {ctx.type} ({round(best_score*100)}%)")
-                                try: subprocess.run(["say", f"Found {name}"], check=False)
-                                except: pass
-                
-                ctx.meta["face_count"] = total_faces_found
-
+            found = self.detect(ctxs)
+            if found: self.record(found)
         except Exception as e:
             print(f"⚠️ FaceID Error: {e}")
             traceback.print_exc()
-        return True
+        return ctxs
+
+    def detect(self, ctxs):
+        """
+        Pixels -> [(ctx, frame index, face)]. Each face carries its embedding, its box in source
+        pixels ('box') and its crop thumb ('thumb'); nothing here touches the database.
+        """
+        # Collect frames to scan (Image: [main], Video: [frame1, frame2, frame3])
+        jobs = []
+        for ctx in ctxs:
+            if ctx.type == "image" and ctx.pil_image: jobs.append((ctx, [ctx.pil_image]))
+            elif ctx.type == "video" and ctx.video_frames: jobs.append((ctx, ctx.video_frames))
+        if not jobs: return []
+
+        # ✂️ Detect everywhere first. Backends that embed faces themselves (ArcFace) are used
+        # as-is; otherwise every crop of the batch is CLIP-embedded together
+        found = [] # (ctx, frame index, face, crop)
+        for ctx, frames in jobs:
+            total_faces_found = 0
+            for fi, (img_frame, faces) in enumerate(zip(frames, face_ai.detect_many([np.array(f) for f in frames]))):
+                for face in faces:
+                    x1, y1, x2, y2 = face['bbox']
+                    if x2 > x1 and y2 > y1:
+                        found.append((ctx, fi, face, img_frame.crop((x1, y1, x2, y2))))
+                        total_faces_found += 1
+            ctx.meta["face_count"] = total_faces_found
+        if not found: return []
+
+        # 🔍 Faces too small on the working image: re-cut them from a larger decode of the original
+        small = {}
+        for n, (ctx, fi, face, crop) in enumerate(found):
+            if ctx.type == "image" and ctx.full_size and max(ctx.full_size) > max(ctx.pil_image.size) and min(crop.size) < FACE_CROP_MIN_PX:
+                small.setdefault(ctx, []).append(n)
+        for ctx, idx in small.items():
+            try:
+                for n, crop in zip(idx, full_res_crops(ctx, [found[n][2]['bbox'] for n in idx])): found[n] = (*found[n][:3], crop)
+            except Exception as e: print(f"⚠️ Full-res face crop failed {ctx.path.name}: {e}")
+
+        need_clip = [i for i, (_, _, face, _) in enumerate(found) if face.get('embedding') is None]
+        if need_clip:
+            for i, e in zip(need_clip, ai.encode_image([found[i][3] for i in need_clip])): found[i][2]['embedding'] = e
+
+        # 🙂 Keep every face: crop thumb + source box (feeds the Hall of Faces)
+        per_asset = {}
+        for ctx, fi, face, crop in found:
+            k = per_asset[ctx] = per_asset.get(ctx, -1) + 1
+            try: face['thumb'] = thumbs.render_face(crop, ctx.fingerprint or fingerprint(ctx.path, ctx.size), k)
+            except Exception: face['thumb'] = None
+            face['box'] = source_box(ctx, face['bbox'])
+        return [(ctx, fi, face) for ctx, fi, face, _ in found]
+
+    def record(self, found):
+        """Faces from detect() -> identity match, cluster, faces rows and identity links (the writer's side)."""
+        embeddings = np.stack([np.asarray(face['embedding'], dtype=np.float32) for _, _, face in found])
+        hits = identity_index.match(embeddings, face_ai.match_threshold) if len(identity_index) else [None] * len(found)
+
+        unnamed = [n for n, hit in enumerate(hits) if not hit]
+        clusters = dict(zip(unnamed, face_clusters.assign(embeddings[unnamed], [found[n][2]['thumb'] for n in unnamed]))) if unnamed else {}
+        db_writer.executemany("""
+            INSERT INTO faces (asset_path, frame, x1, y1, x2, y2, score, embedding, space, identity_id, cluster_id, thumb)
+            VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
+        """, [(ctx.rel_path, fi, *face['box'], face.get('score'), embeddings[n].tobytes(), face_ai.space, hits[n][0] if hits[n] else None, clusters.get(n), face['thumb'])
+              for n, (ctx, fi, face) in enumerate(found)])
+
+        matched = {} # (ctx, identity) -> best score: one link per asset however many faces match
+        for (ctx, _, _), hit in zip(found, hits):
+            if hit and hit[2] > matched.get((ctx, hit[0]), (None, 0))[1]: matched[(ctx, hit[0])] = (hit[1], hit[2])
+
+        for (ctx, rid), (name, score) in matched.items():
+            db_writer.execute("INSERT OR IGNORE INTO identity_links (identity_id, asset_path) VALUES (?,?)", (rid, ctx.rel_path))
+            db_writer.execute("UPDATE identities SET count = count + 1 WHERE id = ?", (rid,))
+            print(f"🗿 [FACE] Matched {name} in {ctx.type} ({round(score*100)}%)")
+            try: subprocess.run(["say", f"Found {name}"], check=False)
+            except: pass
 
 class ThumbnailStep(BaseStep):
     def process(self, ctx: ScanContext) -> bool:
@@ -216,122 +288,594 @@ class ThumbnailStep(BaseStep):
         # Save if we have an image
         if thumb_img:
             try:
-                tname = thumb_name(ctx.path)
-                ctx.thumb_path = tname
-                thumb_img = thumb_img.convert("RGB") # Fix RGBA issue
-                thumb_img.thumbnail((400, 400))
-                thumb_img.save(THUMB_DIR / tname, "JPEG", quality=60)
+                # Content-addressed: copies share one pyramid and names never need renaming
+                ctx.thumb_path = thumbs.render(thumb_img, ctx.fingerprint or fingerprint(ctx.path, ctx.size))
             except Exception as e:
                 print(f"⚠️ Thumb Error: {e}")
         
         return True
 
 class DatabaseStep(BaseStep):
+    INSERT_SQL = """
+        INSERT INTO assets 
+        (path, type, vector, ts_real, ts_inferred, time_confidence, time_source, metadata, thumb_path, is_captured, face_count, size, mtime, fingerprint) 
+        VALUES (?,?,?,?,?,?,?,?,?,0,?,?,?,?)
+    """
+
+    def __init__(self, jobs=None):
+        self.jobs = jobs # rows the writer rejects are marked failed instead of done
+
     def process(self, ctx: ScanContext) -> bool:
-        try:
-            with get_conn() as conn:
-                conn.execute("""
-                    INSERT INTO assets 
-                    (path, type, vector, ts_real, ts_inferred, time_confidence, time_source, metadata, thumb_path, is_captured, face_count) 
-                    VALUES (?,?,?,?,?,?,?,?,?,0,?)
-                """, (
-                    ctx.rel_path, ctx.type, ctx.vector, ctx.ts_real, ctx.ts_inferred, 
-                    ctx.time_confidence, ctx.time_source, json.dumps(ctx.meta), ctx.thumb_path, ctx.meta.get("face_count", 0)
-                ))
-                conn.commit()
-        except Exception as e:
-            print(f"❌ DB Error: {e}")
-            return False
-        return True
+        return bool(self.process_batch([ctx]))
+
+    def process_batch(self, ctxs):
+        """Queue one executemany on the shared writer; the vector index catches up once it commits."""
+        rows = [(
+            ctx.rel_path, ctx.type, ctx.vector, ctx.ts_real, ctx.ts_inferred, 
+            ctx.time_confidence, ctx.time_source, json.dumps(ctx.meta), ctx.thumb_path, ctx.meta.get("face_count", 0),
+            ctx.size, ctx.mtime, ctx.fingerprint
+        ) for ctx in ctxs]
+
+        def index_rows(conn):
+            by_path = {ctx.rel_path: ctx for ctx in ctxs}
+            marks = ",".join("?" * len(by_path))
+            for r in conn.execute(f"SELECT id, path FROM assets WHERE path IN ({marks})", list(by_path)).fetchall():
+                ctx = by_path[r['path']]
+                vector_index.add(r['id'], ctx.rel_path, ctx.type, ctx.vector, ts=ctx.ts_real or ctx.ts_inferred, face_count=ctx.meta.get("face_count", 0))
+
+        def row_failed(params, error):
+            if self.jobs: self.jobs.failed(params[0], f"DB: {error}")
+
+        db_writer.executemany(self.INSERT_SQL, rows, on_commit=index_rows, on_error=row_failed)
+        lexical.index([ctx.rel_path for ctx in ctxs])
+        return ctxs
 
 # --- 🏭 THE FACTORY ---
+_STOP = object()
+
+class StageStats:
+    def __init__(self, queue=None):
+        self.queue = queue
+        self.done = 0
+        self.failed = 0
+        self.busy = 0.0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, seconds, done=0, failed=0):
+        with self._lock:
+            self.busy += seconds
+            self.done += done
+            self.failed += failed
+
+    def snapshot(self):
+        elapsed = max(time.time() - self.started, 1e-6)
+        return {
+            "done": self.done, "failed": self.failed,
+            "per_sec": round(self.done / elapsed, 2),
+            "busy_sec": round(self.busy, 2),
+            "queue": self.queue.qsize() if self.queue is not None else 0,
+        }
+
+def _drain(q, first, limit, wait=0.05):
+    """Gather up to `limit` items starting with `first`, waiting briefly for stragglers. -> (batch, stopped)"""
+    batch, deadline = [first], time.monotonic() + wait
+    while len(batch) < limit:
+        try: item = q.get(timeout=max(0.0, deadline - time.monotonic()))
+        except Empty: break
+        if item is _STOP: return batch, True
+        batch.append(item)
+    return batch, False
+
 class AssetPipeline:
-    def __init__(self):
-        self.steps = [LoadStep(), MetadataStep(), VectorStep(), FaceIDStep(), ThumbnailStep(), DatabaseStep()]
+    """
+    paths ─▶ decode pool (load/EXIF/thumbnail, N threads) ─▶ infer_q ─▶ inference thread (sole model owner,
+    micro-batched) ─▶ write_q ─▶ writer thread (batched commits). Bounded queues provide the backpressure:
+    decoders block while inference lags, so only a few batches of decoded images are ever alive.
+    """
+    def __init__(self, decode_workers=None, batch_size=None, jobs=None):
+        self.decode_steps = [LoadStep(), MetadataStep(), ThumbnailStep()]
+        self.infer_steps = [VectorStep(), FaceIDStep()]
+        self.write_steps = [DatabaseStep(jobs)]
+        self.steps = self.decode_steps + self.infer_steps + self.write_steps
+        self.decode_workers = decode_workers or SCAN_DECODE_WORKERS
+        self.batch_size = batch_size or ai.batch_size
+        self.jobs = jobs  # optional JobQueue: durable per-file state
+        self.stages = {}
 
-    def run(self, path):
-        ctx = ScanContext(path)
+    def run_batch(self, paths):
+        """Synchronous single-thread path: push a micro-batch through every step."""
+        ctxs = []
+        for p in paths:
+            try: ctxs.append(ScanContext(p))
+            except OSError as e: print(f"❌ Load Error {Path(p).name}: {e}")
         for step in self.steps:
-            if not step.process(ctx): return False
+            if not ctxs: break
+            ctxs = step.process_batch(ctxs)
+        return ctxs
+
+    def stage_report(self):
+        return {name: st.snapshot() for name, st in self.stages.items()}
+
+    def run(self, paths, on_progress=None, fingerprints=None):
+        depth = self.batch_size * SCAN_QUEUE_BATCHES
+        path_q, infer_q, write_q = Queue(maxsize=depth), Queue(maxsize=depth), Queue(maxsize=depth)
+        self.stages = {"decode": StageStats(path_q), "infer": StageStats(infer_q), "write": StageStats(write_q)}
+
+        def report(n, last_file):
+            if on_progress: on_progress(n, self.stage_report(), last_file)
+
+        def decode_worker():
+            while True:
+                p = path_q.get()
+                if p is _STOP: return
+                t0, ok, error = time.perf_counter(), False, None
+                if self.jobs: self.jobs.started(p)
+                try:
+                    ctx = ScanContext(p, fingerprints.get(p) if fingerprints else None)
+                    ok = all(step.process(ctx) for step in self.decode_steps)
+                    error = ctx.error
+                except Exception as e: print(f"❌ Decode Error {Path(p).name}: {e}"); error = f"Decode: {e}"
+                self.stages["decode"].record(time.perf_counter() - t0, done=int(ok), failed=int(not ok))
+                if ok: infer_q.put(ctx) # blocks while inference is behind
+                else:
+                    if self.jobs: self.jobs.failed(p, error or "Decode step rejected the file")
+                    report(1, Path(p).name)
+
+        def infer_worker():
+            stopped = False
+            try:
+                while not stopped:
+                    first = infer_q.get()
+                    if first is _STOP: break
+                    batch, stopped = _drain(infer_q, first, self.batch_size)
+                    t0 = time.perf_counter()
+                    try:
+                        for step in self.infer_steps: batch = step.process_batch(batch)
+                    except Exception as e: print(f"⚠️ Inference Error: {e}"); traceback.print_exc()
+                    self.stages["infer"].record(time.perf_counter() - t0, done=len(batch))
+                    for ctx in batch:
+                        ctx.pil_image, ctx.video_frames = None, [] # pixels are done; free them before the writer
+                        write_q.put(ctx)
+            finally:
+                write_q.put(_STOP) # the writer always gets its stop, or run() would wait on it forever
+
+        def write_worker():
+            stopped = False
+            while not stopped:
+                first = write_q.get()
+                if first is _STOP: break
+                batch, stopped = _drain(write_q, first, self.batch_size * 4, wait=0.25)
+                t0 = time.perf_counter()
+                try:
+                    written = batch
+                    for step in self.write_steps: written = step.process_batch(written)
+                    if self.jobs: self.jobs.finished(written)
+                except Exception as e:
+                    # one bad batch must not kill the writer: upstream queues would fill and the scan would hang
+                    print(f"❌ Write Error: {e}"); traceback.print_exc()
+                    written = []
+                    if self.jobs:
+                        for ctx in batch: self.jobs.failed(ctx.path, f"Write: {e}")
+                self.stages["write"].record(time.perf_counter() - t0, done=len(written), failed=len(batch) - len(written))
+                report(len(batch), batch[-1].path.name)
+
+        decoders = [threading.Thread(target=decode_worker, daemon=True, name=f"decode-{i}") for i in range(self.decode_workers)]
+        inferer = threading.Thread(target=infer_worker, daemon=True, name="infer")
+        writer = threading.Thread(target=write_worker, daemon=True, name="db-writer")
+        for t in decoders + [inferer, writer]: t.start()
+
+        for p in paths: path_q.put(p)
+        for _ in decoders: path_q.put(_STOP)
+        for t in decoders: t.join()
+        infer_q.put(_STOP)
+        inferer.join()
+        writer.join()
+        db_writer.flush(timeout=WRITER_FLUSH_TIMEOUT_S)
+        return self.stage_report()
+
+# --- 🧬 FILE IDENTITY (renames, duplicates, orphans) ---
+ASSET_ROW = "id, path, type, vector, thumb_path, size, fingerprint, content_hash, dup_of, x, y, z, cluster_id, ts_real, ts_inferred, face_count"
+
+def move_asset(row, new_rel):
+    """A known file reappeared under a new path: re-point the row instead of re-embedding it."""
+    old_rel, old_thumb, new_thumb = row['path'], row['thumb_path'], row['thumb_path']
+    if old_thumb and not thumbs.is_addressed(old_thumb):
+        tname = thumb_name(DREAM_BOX / new_rel)
+        try:
+            (THUMB_DIR / old_thumb).rename(THUMB_DIR / tname)
+            new_thumb = tname
+            db_writer.execute("UPDATE assets SET thumb_path = ? WHERE thumb_path = ?", (new_thumb, old_thumb)) # duplicates share it
+        except OSError: pass
+    db_writer.execute("UPDATE assets SET path = ?, thumb_path = ? WHERE id = ?", (new_rel, new_thumb, row['id']))
+    db_writer.execute("UPDATE OR IGNORE identity_links SET asset_path = ? WHERE asset_path = ?", (new_rel, old_rel))
+    db_writer.execute("UPDATE identities SET cover_path = ? WHERE cover_path = ?", (new_rel, old_rel))
+    db_writer.execute("UPDATE identity_exemplars SET source_path = ? WHERE source_path = ?", (new_rel, old_rel))
+    db_writer.execute("UPDATE faces SET asset_path = ? WHERE asset_path = ?", (new_rel, old_rel))
+    vector_index.rename(row['id'], new_rel)
+    lexical.index([new_rel])
+    print(f"🔀 [SCAN] Moved {old_rel} -> {new_rel}")
+
+def same_content(canon, path):
+    """Fingerprints matched; settle it with a full hash (cached on the canonical row)."""
+    canon_hash = canon['content_hash']
+    if not canon_hash:
+        try: canon_hash = full_hash(DREAM_BOX / canon['path'])
+        except OSError: return None
+        db_writer.execute("UPDATE assets SET content_hash = ? WHERE id = ?", (canon_hash, canon['id']))
+    new_hash = full_hash(path)
+    return new_hash if new_hash == canon_hash else None
+
+def link_duplicate(canon, path, fp, content_hash):
+    """Exact copy of an indexed file: share its metadata/thumb, skip embedding, group via dup_of."""
+    rel = os.path.relpath(path, DREAM_BOX).replace(os.sep, "/")
+    st = os.stat(path)
+    db_writer.execute("""
+        INSERT OR IGNORE INTO assets
+        (path, type, ts_real, ts_inferred, time_confidence, time_source, metadata, thumb_path, is_captured, face_count, size, mtime, fingerprint, content_hash, dup_of)
+        SELECT ?, type, ts_real, ?, time_confidence, time_source, metadata, thumb_path, is_captured, face_count, ?, ?, ?, ?, id FROM assets WHERE id = ?
+    """, (rel, int(st.st_mtime), st.st_size, st.st_mtime, fp, content_hash, canon['id']))
+    db_writer.execute("INSERT OR IGNORE INTO identity_links (identity_id, asset_path) SELECT identity_id, ? FROM identity_links WHERE asset_path = ?", (rel, canon['path']))
+    print(f"👯 [SCAN] {rel} is a copy of {canon['path']}")
+
+def purge_assets(rows, keep_links=False):
+    """Forget files that left DreamBox: rows, links, thumbs, index entries. A surviving copy is promoted."""
+    if not rows: return
+    gone = {r['id'] for r in rows}
+    with read_conn() as conn:
+        for r in rows:
+            if r['dup_of'] is not None: continue
+            heirs = [h for h in conn.execute(f"SELECT {ASSET_ROW} FROM assets WHERE dup_of = ? ORDER BY id", (r['id'],)).fetchall() if h['id'] not in gone]
+            if not heirs: continue
+            heir = heirs[0]
+            db_writer.execute("UPDATE assets SET vector = ?, x = ?, y = ?, z = ?, cluster_id = ?, dup_of = NULL WHERE id = ?", (r['vector'], r['x'], r['y'], r['z'], r['cluster_id'], heir['id']))
+            db_writer.execute("UPDATE assets SET dup_of = ? WHERE dup_of = ?", (heir['id'], r['id']))
+            vector_index.add(heir['id'], heir['path'], heir['type'], r['vector'], ts=heir['ts_real'] or heir['ts_inferred'], cluster_id=r['cluster_id'], face_count=heir['face_count'])
+            lexical.index([heir['path']])
+        for r in rows:
+            shared = r['thumb_path'] and conn.execute("SELECT 1 FROM assets WHERE thumb_path = ? AND id != ? LIMIT 1", (r['thumb_path'], r['id'])).fetchone()
+            if r['thumb_path'] and not shared: thumbs.remove(r['thumb_path'])
+            vector_index.remove(r['id'])
+    db_writer.executemany("DELETE FROM assets WHERE id = ?", [(r['id'],) for r in rows])
+    lexical.forget(gone)
+    if not keep_links: db_writer.executemany("DELETE FROM identity_links WHERE asset_path = ?", [(r['path'],) for r in rows])
+    face_clusters.forget([r['path'] for r in rows])
+    jobs.forget([r['path'] for r in rows])
+    print(f"🧹 [SCAN] Purged {len(rows)} {'stale' if keep_links else 'vanished'} assets")
+
+def resolve_new_files(new, vanished_rows, find_canonical, purge=True):
+    """
+    new: {rel_path: Path} not yet indexed. vanished_rows: rows whose files are gone (rename candidates).
+    find_canonical(fp) -> canonical row or None. Unclaimed vanished rows are purged (kept when purge=False).
+    Returns (paths that still need the full pipeline, {path: fingerprint}, deferred in-batch copies).
+    """
+    missing = {r['path']: r for r in vanished_rows}
+    vanished = {}
+    for r in vanished_rows:
+        if r['fingerprint']: vanished.setdefault(r['fingerprint'], []).append(r)
+
+    to_embed, fps, deferred, seen = [], {}, [], set()
+    for rel, p in new.items():
+        try: fp = fingerprint(p)
+        except OSError: continue
+        if vanished.get(fp):
+            row = vanished[fp].pop()
+            move_asset(row, rel)
+            missing.pop(row['path'], None)
+            continue
+        canon = find_canonical(fp)
+        if canon and canon['path'] not in missing:
+            try: content_hash = same_content(canon, p)
+            except OSError: content_hash = None
+            if content_hash:
+                link_duplicate(canon, p, fp, content_hash)
+                continue
+        if fp in seen: deferred.append((p, fp)); continue
+        seen.add(fp)
+        fps[p] = fp
+        to_embed.append(p)
+
+    if purge: purge_assets(list(missing.values()))
+    db_writer.flush(timeout=WRITER_FLUSH_TIMEOUT_S)
+    return to_embed, fps, deferred
+
+# --- 🛡️ PURGE GUARD: an unmounted or unreadable DreamBox walks as empty, which looks like "everything was deleted" ---
+_held_purge = set() # paths a full walk wanted to purge but the guard kept; the next walk confirms or clears them
+
+def dreambox_mounted():
+    """The root exists, is listable and holds at least one entry the scanner would look at."""
+    try: return any(not e.name.startswith('.') and e.name not in IGNORE_DIRS for e in os.scandir(DREAM_BOX))
+    except OSError: return False
+
+def purge_allowed(vanished, total, walked):
+    """Sanity check before a full walk purges `vanished` of `total` rows after finding `walked` files."""
+    global _held_purge
+    if not vanished: _held_purge = set(); return True
+    if not walked or not dreambox_mounted():
+        print(f"🛡️ [SCAN] DreamBox looks empty or unmounted: keeping {len(vanished)} rows until it is back")
+        return False
+    paths = {r['path'] for r in vanished}
+    if len(paths) < PURGE_GUARD_MIN_ROWS or len(paths) <= PURGE_MAX_FRACTION * total or paths <= _held_purge:
+        _held_purge = set()
         return True
+    print(f"🛡️ [SCAN] {len(paths)}/{total} assets vanished at once: keeping them until the next full walk confirms")
+    _held_purge = paths
+    return False
+
+def reconcile(disk):
+    """Full walk result {rel_path: Path} vs. the whole DB: renames, duplicates, orphans."""
+    with read_conn() as conn:
+        db_rows = {r['path']: r for r in conn.execute(f"SELECT {ASSET_ROW} FROM assets").fetchall()}
+
+    # One-time backfill for rows indexed before fingerprints existed
+    present = {}
+    for rel, r in db_rows.items():
+        if rel not in disk: continue
+        fp = r['fingerprint']
+        if not fp:
+            try: fp = fingerprint(disk[rel])
+            except OSError: continue
+            db_writer.execute("UPDATE assets SET fingerprint = ?, size = ? WHERE id = ?", (fp, disk[rel].stat().st_size, r['id']))
+        if r['dup_of'] is None: present.setdefault(fp, r)
+
+    new = {rel: p for rel, p in disk.items() if rel not in db_rows}
+    vanished = [r for rel, r in db_rows.items() if rel not in disk]
+    return resolve_new_files(new, vanished, present.get, purge=purge_allowed(vanished, len(db_rows), len(disk)))
+
+def find_canonical(fp):
+    with read_conn() as conn:
+        return conn.execute(f"SELECT {ASSET_ROW} FROM assets WHERE fingerprint = ? AND dup_of IS NULL LIMIT 1", (fp,)).fetchone()
+
+def link_deferred_duplicates(deferred):
+    """Copies that arrived in the same scan as their original: link once the original is indexed."""
+    for p, fp in deferred:
+        canon = find_canonical(fp)
+        content_hash = canon and same_content(canon, p)
+        if content_hash: link_duplicate(canon, p, fp, content_hash)
+    db_writer.flush(timeout=WRITER_FLUSH_TIMEOUT_S)
+
+# --- 📓 CHANGE JOURNAL ---
+def rel_of(path):
+    """DreamBox-relative '/' path, or None for anything the scanner must ignore (thumbs, dotfiles, outside)."""
+    try: rel = Path(os.fsdecode(path)).resolve().relative_to(DREAM_BOX)
+    except (ValueError, OSError): return None
+    if not rel.parts or any(part in IGNORE_DIRS or part.startswith('.') for part in rel.parts): return None
+    return rel.as_posix()
+
+class ChangeJournal:
+    """
+    Debounced watcher events. Files: rel_path -> 'upsert' | 'delete' (last event wins).
+    Moves are kept as (src, dest, is_dir) so renames never cost a re-embed.
+    Directory-level creates/deletes are expanded when the journal is applied.
+    """
+    def __init__(self, debounce=WATCH_DEBOUNCE_S):
+        self.debounce = debounce
+        self._lock = threading.Lock()
+        self._timer = None
+        self.files, self.dirs, self.moves = {}, {}, []
+
+    def __len__(self):
+        with self._lock: return len(self.files) + len(self.dirs) + len(self.moves)
+
+    def record(self, kind, rel, dest=None, is_dir=False):
+        with self._lock:
+            if kind == "move": self.moves.append((rel, dest, is_dir))
+            elif is_dir: self.dirs[rel] = kind
+            else: self.files[rel] = kind
+        self.schedule()
+
+    def schedule(self):
+        with self._lock:
+            if self._timer: self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, kick_scan)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def drain(self):
+        with self._lock:
+            out = (self.files, self.dirs, self.moves)
+            self.files, self.dirs, self.moves = {}, {}, []
+            return out
+
+journal = ChangeJournal()
+
+def _rows_under(conn, rel):
+    return conn.execute(f"SELECT {ASSET_ROW} FROM assets WHERE path LIKE ? ESCAPE '\\'", (rel.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "/%",)).fetchall()
+
+def _walk(rel_dir):
+    for root, dirs, files in os.walk(DREAM_BOX / rel_dir):
+        dirs[:] = [d for d in dirs if d not in IGNORE_DIRS and not d.startswith('.')]
+        for f in files:
+            if f.startswith('.'): continue
+            p = Path(root) / f
+            yield os.path.relpath(p, DREAM_BOX).replace(os.sep, "/"), p
+
+def apply_journal(files, dirs, moves):
+    """Turn drained watcher events into DB updates; returns the same triple as reconcile()."""
+    upserts, deletes = {}, set()
+    with read_conn() as conn:
+        # 1. Moves: re-point rows (files and whole folders) without touching pixels
+        dir_moves = [src + "/" for src, _, is_dir in moves if is_dir]
+        for src, dest, is_dir in moves:
+            if not is_dir and any(src.startswith(d) for d in dir_moves): continue # carried by its folder's move
+            rows = _rows_under(conn, src) if is_dir else conn.execute(f"SELECT {ASSET_ROW} FROM assets WHERE path = ?", (src,)).fetchall()
+            taken = lambda rel: conn.execute("SELECT 1 FROM assets WHERE path = ?", (rel,)).fetchone()
+            for r in rows:
+                new_rel = dest + r['path'][len(src):] if is_dir else dest
+                if taken(new_rel): deletes.add(r['path'])
+                else: move_asset(r, new_rel)
+            if is_dir: upserts.update({rel: DREAM_BOX / rel for rel, _ in _walk(dest)})
+            elif not rows: upserts[dest] = DREAM_BOX / dest
+        db_writer.flush(timeout=WRITER_FLUSH_TIMEOUT_S)
+
+        # 2. Folder-level events
+        for rel, kind in dirs.items():
+            if kind == "delete": deletes.update(r['path'] for r in _rows_under(conn, rel))
+            else: upserts.update(dict(_walk(rel)))
+
+        # 3. File events
+        for rel, kind in files.items():
+            if kind == "delete": deletes.add(rel)
+            else: upserts[rel] = DREAM_BOX / rel
+
+        # 4. Classify upserts: unchanged / modified / new
+        vanished, new = [], {}
+        for rel, p in upserts.items():
+            if not p.is_file(): deletes.add(rel); continue
+            deletes.discard(rel)
+            row = conn.execute(f"SELECT {ASSET_ROW}, mtime FROM assets WHERE path = ?", (rel,)).fetchone()
+            if row is None: new[rel] = p; continue
+            st = p.stat()
+            if row['size'] == st.st_size and row['mtime'] == st.st_mtime: continue
+            fp = fingerprint(p, st.st_size)
+            if fp == row['fingerprint']:
+                db_writer.execute("UPDATE assets SET size = ?, mtime = ? WHERE id = ?", (st.st_size, st.st_mtime, row['id']))
+                continue
+            print(f"✏️ [SCAN] Content changed: {rel}")
+            purge_assets([row], keep_links=True) # edited in place: re-embed, keep who is in it
+            new[rel] = p
+
+        for rel in deletes:
+            if (DREAM_BOX / rel).exists(): continue
+            row = conn.execute(f"SELECT {ASSET_ROW} FROM assets WHERE path = ?", (rel,)).fetchone()
+            if row: vanished.append(row)
+
+    return resolve_new_files(new, vanished, find_canonical)
 
 # --- 🌌 GALAXY ENGINE ---
-def recalculate_galaxy():
+def recalculate_galaxy(full=False):
     global scan_status
-    scan_status["last_event"] = "🌌 Re-mapping Spacetime..."
-    try:
-        with get_conn() as conn:
-            rows = conn.execute("SELECT id, vector FROM assets WHERE vector IS NOT NULL").fetchall()
-            if len(rows) < 10: return
-            ids, vecs = [r['id'] for r in rows], np.array([np.frombuffer(r['vector'], dtype=np.float32) for r in rows])
-            reducer = umap.UMAP(n_components=3, n_neighbors=min(len(rows)-1, 15), min_dist=0.1, metric='cosine')
-            projs = reducer.fit_transform(vecs)
-            kmeans = KMeans(n_clusters=min(12, len(rows) // 20), n_init='auto').fit(vecs)
-            for i, db_id in enumerate(ids):
-                conn.execute("UPDATE assets SET x=?, y=?, z=?, cluster_id=? WHERE id=?", 
-                             (float(projs[i][0])*15, float(projs[i][1])*15, float(projs[i][2])*15, int(kmeans.labels_[i]), db_id))
-            conn.commit()
-            print(f"✅ [GALAXY] Mapped {len(ids)} stars.")
-    except Exception as e: print(f"Galaxy Error: {e}")
+    scan_status["last_event"] = "🌌 Re-mapping Spacetime..." if full else "🌌 Placing New Stars..."
+    try: galaxy.update(full=full)
+    except Exception as e: print(f"Galaxy Error: {e}"); traceback.print_exc()
 
 # --- 🧠 DREAM LOOP ---
+_unmounted_warned = False
+
+def reconcile_due():
+    """Interval elapsed and the root passes the purge guard's mount check; no walk yet only counts once it does."""
+    global _unmounted_warned
+    last = scan_status.get("last_full_scan", 0)
+    if last and time.time() - last <= RECONCILE_INTERVAL_S: return False
+    if dreambox_mounted(): _unmounted_warned = False; return True
+    if not _unmounted_warned: print(f"🛡️ [DREAM] {DREAM_BOX} is empty or unmounted: reconcile walk postponed")
+    _unmounted_warned = True
+    return False
+
 def dream_loop():
-    pass
+    """Background housekeeping: periodic full reconcile walks and deferred off-peak relayouts."""
+    while True:
+        time.sleep(60)
+        try:
+            if RECONCILE_INTERVAL_S and scan_status["status"] == "idle" and reconcile_due():
+                print("🌙 [DREAM] Scheduled reconcile walk...")
+                process_scan(full=True)
+            if galaxy.pending_full and galaxy.is_offpeak() and scan_status["status"] == "idle":
+                print("🌙 [DREAM] Off-peak relayout...")
+                recalculate_galaxy(full=True)
+                scan_status["last_event"] = "System Standby"
+        except Exception as e: print(f"Dream Loop Error: {e}")
 
 # --- 🚀 MAIN PROCESS ---
-def process_scan():
-    global scan_status
+_scan_lock = threading.Lock()
+
+def kick_scan():
+    """Debounce timer target: drain the journal now, or let the running scan pick it up."""
     if scan_status["status"] == "indexing": scan_status["dirty"] = True; return
+    threading.Thread(target=process_scan, kwargs={"full": False}, daemon=True).start()
 
-    pipeline = AssetPipeline()
+def full_walk():
+    disk = {}
+    for rel, p in _walk("."):
+        disk[rel] = p
+    return disk
 
-    while True:
-        scan_status["dirty"] = False
-        scan_status["status"] = "indexing"
-        print("🚀 [SCAN] Factory Started...")
-        THUMB_DIR.mkdir(parents=True, exist_ok=True)
-        
-        try:
-            with get_conn() as conn:
-                all_db = {r['path'] for r in conn.execute("SELECT path FROM assets").fetchall()}
-            
-            all_files = []
-            for root, dirs, files in os.walk(DREAM_BOX):
-                dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
-                for f in files:
-                    if f.startswith('.'): continue
-                    p = Path(root) / f
-                    rel = os.path.relpath(p, DREAM_BOX).replace(os.sep, "/")
-                    if rel not in all_db: all_files.append(p)
-            
-            scan_status.update({"current": 0, "total": len(all_files)})
-            
-            for p in all_files:
-                scan_status["last_file"] = p.name
-                pipeline.run(p)
-                scan_status["current"] += 1
-            
-            if len(all_files) > 0: recalculate_galaxy()
-
-        except Exception as e: print(f"Scan Crash: {e}"); traceback.print_exc()
-        
-        if not scan_status["dirty"]:
-            scan_status["status"] = "idle"
-            scan_status["last_event"] = "System Standby"
-            break
-        else: print("🔄 Factory Reloading...")
+def process_scan(full=True):
+    """full=True: reconcile walk of the whole DreamBox. full=False: only what the watcher journaled."""
+    global scan_status
+    if full: scan_status["full_pending"] = True
+    if not _scan_lock.acquire(blocking=False): scan_status["dirty"] = True; return
+
+    if not ai.loaded.is_set():
+        scan_status["last_event"] = "Waiting for Neural Cores"
+        ai.loaded.wait() # startup scans queue behind the background model load
+    if SCAN_PROCESSES:
+        from .scan_pool import ProcessPipeline # imports this module; only needed in process mode
+        pipeline = ProcessPipeline(jobs=jobs)
+    else: pipeline = AssetPipeline(jobs=jobs)
+    try:
+        while True:
+            scan_status["dirty"] = False
+            scan_status["status"] = "indexing"
+            THUMB_DIR.mkdir(parents=True, exist_ok=True)
+
+            try:
+                changes = journal.drain()
+                if scan_status.pop("full_pending", False):
+                    print("🚀 [SCAN] Factory Started (full reconcile)...")
+                    all_files, fingerprints, deferred = reconcile(full_walk())
+                    scan_status["last_full_scan"] = int(time.time())
+                elif any(changes):
+                    print(f"🚀 [SCAN] Factory Started ({sum(map(len, changes))} journaled changes)...")
+                    all_files, fingerprints, deferred = apply_journal(*changes)
+                else:
+                    all_files, fingerprints, deferred = [], {}, []
+
+                all_files = jobs.admit(all_files)
+                scan_status.update({"current": 0, "total": len(all_files), "stages": {}})
+
+                def on_progress(n, stages, last_file):
+                    scan_status["current"] += n
+                    scan_status["stages"] = stages
+                    scan_status["last_file"] = last_file
+
+                if all_files:
+                    pipeline.run(all_files, on_progress=on_progress, fingerprints=fingerprints)
+                    print(f"🏭 [SCAN] Stages: {pipeline.stage_report()}")
+                if deferred: link_deferred_duplicates(deferred)
+
+                if len(all_files) > 0:
+                    recalculate_galaxy()
+                    threading.Thread(target=vector_index.build_ann, daemon=True).start()
+
+            except Exception as e: print(f"Scan Crash: {e}"); traceback.print_exc()
+
+            if not scan_status["dirty"] and not len(journal) and not scan_status.get("full_pending"):
+                break
+            print("🔄 Factory Reloading...")
+    finally:
+        scan_status["status"] = "idle"
+        scan_status["last_event"] = "System Standby"
+        _scan_lock.release()
+    if len(journal): journal.schedule() # events that raced the shutdown of this pass
 
 # --- 👀 WATCHER ---
 class DreamHandler(FileSystemEventHandler):
     def on_any_event(self, event):
-        if event.is_directory: return
-        print(f"👀 [WATCHER] Change: {event.src_path}")
-        scan_status["dirty"] = True
-        if scan_status["status"] == "idle": threading.Thread(target=process_scan, daemon=True).start()
+        kind = event.event_type
+        if kind not in ("created", "modified", "deleted", "moved", "closed"): return
+        if event.is_directory and kind in ("modified", "closed"): return
+        rel = rel_of(event.src_path)
+        if kind == "moved":
+            dest = rel_of(event.dest_path)
+            if rel and dest: journal.record("move", rel, dest, event.is_directory)
+            elif rel: journal.record("delete", rel, is_dir=event.is_directory)    # moved out of DreamBox
+            elif dest: journal.record("upsert", dest, is_dir=event.is_directory)  # moved in
+            else: return
+            print(f"👀 [WATCHER] Move: {rel} -> {dest}")
+            return
+        if rel is None: return
+        journal.record("delete" if kind == "deleted" else "upsert", rel, is_dir=event.is_directory)
+        print(f"👀 [WATCHER] {kind.title()}: {rel}")
 
 def start_watcher():
+    scan_status["watcher"] = True
     observer = Observer()
     observer.schedule(DreamHandler(), str(DREAM_BOX), recursive=True)
     observer.start()
     threading.Thread(target=dream_loop, daemon=True).start()
+    pending = jobs.resumable()
+    if pending:
+        print(f"♻️ [JOBS] Resuming {len(pending)} unfinished scan jobs")
+        for rel in pending: journal.record("upsert", rel)
     return observer
@@ -0,0 +1,60 @@
+import re
+
+from .config import THUMB_DIR, THUMB_WIDTHS, THUMB_FALLBACK_WIDTH, THUMB_WEBP_QUALITY, THUMB_JPEG_QUALITY, FACE_THUMB_SIZE
+
+# "<32 hex fingerprint>.jpg" -> pyramid siblings "<fingerprint>_<w>.webp" exist
+_ADDRESSED = re.compile(r"^[0-9a-f]{32}\.jpg$")
+
+def is_addressed(name):
+    return bool(name and _ADDRESSED.match(name))
+
+def variant_name(name, width):
+    return f"{name[:-4]}_{width}.webp"
+
+def nearest_width(w):
+    """Smallest pyramid level that still covers w pixels (largest if none does)."""
+    if not w: return THUMB_FALLBACK_WIDTH
+    return next((tw for tw in THUMB_WIDTHS if tw >= w), THUMB_WIDTHS[-1])
+
+def render(img, key):
+    """
+    Write the pyramid for one source image: every THUMB_WIDTHS level as WebP plus the
+    THUMB_FALLBACK_WIDTH JPEG (the legacy `thumb_path`). Levels are downscaled from the
+    previous one, so each source pixel is only resampled once at full size.
+    Returns the JPEG name stored in assets.thumb_path.
+    """
+    name = f"{key}.jpg"
+    level = img.convert("RGB") # Fix RGBA issue
+    for w in sorted(THUMB_WIDTHS, reverse=True):
+        level.thumbnail((w, w))
+        level.save(THUMB_DIR / variant_name(name, w), "WEBP", quality=THUMB_WEBP_QUALITY, method=4)
+        if w == THUMB_FALLBACK_WIDTH: level.save(THUMB_DIR / name, "JPEG", quality=THUMB_JPEG_QUALITY)
+    return name
+
+def render_face(crop, key, index):
+    """Square-ish face crop for the Hall of Faces -> '<fingerprint>_face<i>.webp'."""
+    name = f"{key}_face{index}.webp"
+    crop = crop.convert("RGB")
+    crop.thumbnail((FACE_THUMB_SIZE, FACE_THUMB_SIZE))
+    crop.save(THUMB_DIR / name, "WEBP", quality=THUMB_WEBP_QUALITY)
+    return name
+
+def files(name):
+    """Every file on disk belonging to a thumb_path (pyramid levels only for addressed names)."""
+    if not name: return []
+    out = [THUMB_DIR / name]
+    if is_addressed(name): out += [THUMB_DIR / variant_name(name, w) for w in THUMB_WIDTHS]
+    return out
+
+def remove(name):
+    for f in files(name):
+        try: f.unlink()
+        except OSError: pass
+
+def pick(name, w=None, webp=True):
+    """Best file on disk for a requested width -> (path, media_type), falling back to the JPEG."""
+    if webp and is_addressed(name):
+        f = THUMB_DIR / variant_name(name, nearest_width(w))
+        if f.exists(): return f, "image/webp"
+    f = THUMB_DIR / name
+    return (f, "image/jpeg") if f.exists() else (None, None)
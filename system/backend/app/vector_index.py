@@ -0,0 +1,269 @@
+import threading
+import time
+import numpy as np
+
+from .config import ANN_PATH, ANN_MIN_SIZE, ANN_NPROBE
+from .db import read_conn
+from .ann_index import IVFIndex
+
+VECTOR_DIM = 512
+GATHER_MAX_FRACTION = 0.3  # filters keeping more rows than this score the full matrix and mask instead (gathering costs more)
+
+class VectorIndex:
+    """
+    Resident, pre-normalized float32 matrix of every searchable asset vector.
+    Rows are kept dense (swap-with-last on delete) with id/path/type side arrays,
+    so a query is one matmul + argpartition instead of a full-table decode.
+    Filter columns (time, galaxy cluster, face count) sit beside the matrix: a filtered
+    query masks rows first and only scores the survivors.
+    Large libraries additionally get an IVF coarse quantizer (see ann_index).
+    """
+    def __init__(self, dim=VECTOR_DIM):
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._building = threading.Lock()
+        self._reset(0)
+        self.ann = None
+        self.loaded = False
+        self.version = 0  # bumped on every change that can alter a ranking (result-cache key)
+
+    def _reset(self, capacity):
+        capacity = max(capacity, 1024)
+        self.matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.types = np.zeros(capacity, dtype="<U8")
+        self.labels = np.full(capacity, -1, dtype=np.int32)  # IVF cell per row, -1 = unassigned (always scanned)
+        self.ts = np.zeros(capacity, dtype=np.int64)  # COALESCE(ts_real, ts_inferred)
+        self.clusters = np.full(capacity, -1, dtype=np.int32)  # galaxy cluster_id, -1 = not placed yet
+        self.faces = np.zeros(capacity, dtype=np.int32)  # face_count
+        self.paths = [None] * capacity
+        self.pos = {}  # asset id -> row
+        self.size = 0
+
+    def _grow(self, needed):
+        capacity = len(self.ids)
+        if needed <= capacity: return
+        while capacity < needed: capacity *= 2
+        extra = capacity - len(self.ids)
+        self.matrix = np.vstack([self.matrix, np.zeros((extra, self.dim), dtype=np.float32)])
+        self.ids = np.concatenate([self.ids, np.zeros(extra, dtype=np.int64)])
+        self.types = np.concatenate([self.types, np.zeros(extra, dtype="<U8")])
+        self.labels = np.concatenate([self.labels, np.full(extra, -1, dtype=np.int32)])
+        self.ts = np.concatenate([self.ts, np.zeros(extra, dtype=np.int64)])
+        self.clusters = np.concatenate([self.clusters, np.full(extra, -1, dtype=np.int32)])
+        self.faces = np.concatenate([self.faces, np.zeros(extra, dtype=np.int32)])
+        self.paths.extend([None] * extra)
+
+    @staticmethod
+    def _normalize(vec):
+        vec = np.asarray(vec, dtype=np.float32).reshape(-1)
+        return vec / (np.linalg.norm(vec) + 1e-10)
+
+    # --- 🏗️ BUILD ---
+    def load(self):
+        with read_conn() as conn:
+            rows = conn.execute("""
+                SELECT id, path, type, vector, COALESCE(ts_real, ts_inferred, 0) AS ts, COALESCE(cluster_id, -1) AS cluster_id, COALESCE(face_count, 0) AS face_count
+                FROM assets WHERE is_captured = 0 AND vector IS NOT NULL
+            """).fetchall()
+        rows = [r for r in rows if r['vector'] and len(r['vector']) == self.dim * 4]
+        mat = np.frombuffer(b"".join(r['vector'] for r in rows), dtype=np.float32).reshape(len(rows), self.dim)
+        self.fill([r['id'] for r in rows], [r['path'] for r in rows], [r['type'] for r in rows], mat,
+                  ts=[r['ts'] for r in rows], clusters=[r['cluster_id'] for r in rows], faces=[r['face_count'] for r in rows])
+        self.load_ann()
+        print(f"🧭 [INDEX] {self.size} vectors resident ({self.matrix[:self.size].nbytes // (1024*1024)} MB)")
+
+    def fill(self, ids, paths, types, matrix, ts=None, clusters=None, faces=None):
+        """Bulk (re)initialise from parallel arrays; vectors need not be normalized."""
+        n = len(ids)
+        with self._lock:
+            self._reset(n * 2)
+            if n:
+                self.matrix[:n] = matrix / (np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-10)
+                self.ids[:n] = ids
+                self.types[:n] = types
+                self.paths[:n] = list(paths)
+                if ts is not None: self.ts[:n] = ts
+                if clusters is not None: self.clusters[:n] = clusters
+                if faces is not None: self.faces[:n] = faces
+                self.pos = {int(i): row for row, i in enumerate(ids)}
+                self.size = n
+            self.ann = None
+            self.loaded = True
+            self.version += 1
+
+    def ensure_loaded(self):
+        if not self.loaded: self.load()
+
+    # --- ✏️ INCREMENTAL UPDATES ---
+    def add(self, asset_id, path, type, vector, ts=None, cluster_id=None, face_count=None):
+        if vector is None: return
+        if isinstance(vector, (bytes, bytearray, memoryview)): vector = np.frombuffer(vector, dtype=np.float32)
+        if vector.size != self.dim: return
+        with self._lock:
+            row = self.pos.get(asset_id)
+            if row is None:
+                row = self.size
+                self._grow(row + 1)
+                self.size += 1
+                self.pos[asset_id] = row
+            self.matrix[row] = self._normalize(vector)
+            self.ids[row] = asset_id
+            self.types[row] = type
+            self.paths[row] = path
+            self.ts[row] = ts or 0
+            self.clusters[row] = -1 if cluster_id is None else cluster_id
+            self.faces[row] = face_count or 0
+            self.labels[row] = self.ann.assign(self.matrix[row])[0] if self.ann else -1
+            self.version += 1
+
+    def remove(self, asset_id):
+        with self._lock:
+            row = self.pos.pop(asset_id, None)
+            if row is None: return
+            last = self.size - 1
+            if row != last:
+                self.matrix[row] = self.matrix[last]
+                self.ids[row] = self.ids[last]
+                self.types[row] = self.types[last]
+                self.labels[row] = self.labels[last]
+                self.ts[row], self.clusters[row], self.faces[row] = self.ts[last], self.clusters[last], self.faces[last]
+                self.paths[row] = self.paths[last]
+                self.pos[int(self.ids[row])] = row
+            self.paths[last] = None
+            self.size = last
+            self.version += 1
+
+    def rename(self, asset_id, path):
+        with self._lock:
+            row = self.pos.get(asset_id)
+            if row is not None: self.paths[row] = path
+            self.version += 1 # the path is also a lexical search term
+
+    def set_clusters(self, ids, cluster_ids):
+        """Galaxy placement wrote new cluster_ids: mirror them into the filter column."""
+        with self._lock:
+            for asset_id, c in zip(ids, cluster_ids):
+                row = self.pos.get(int(asset_id))
+                if row is not None: self.clusters[row] = c
+            self.version += 1
+
+    # --- 🕸️ APPROXIMATE NEAREST NEIGHBOURS ---
+    def build_ann(self, nlist=None, save=True):
+        """Train IVF cells on a snapshot; rows added meanwhile stay unassigned (-1) and are always scanned."""
+        if not self._building.acquire(blocking=False): return
+        try:
+            with self._lock:
+                n = self.size
+                if n < ANN_MIN_SIZE:
+                    self.ann = None
+                    self.labels[:n] = -1
+                    return
+                snapshot, ids = self.matrix[:n].copy(), self.ids[:n].copy()
+            t0 = time.time()
+            ann = IVFIndex.train(snapshot, nlist=nlist)
+            labels = ann.assign(snapshot)
+            self.attach_ann(ann, ids, labels)
+            if save: ann.save(ANN_PATH, ids, labels)
+            print(f"🕸️ [ANN] IVF{ann.nlist} built over {n} vectors in {time.time() - t0:.1f}s")
+        except Exception as e: print(f"⚠️ [ANN] Build failed: {e}")
+        finally: self._building.release()
+
+    def attach_ann(self, ann, ids, labels):
+        with self._lock:
+            self.labels[:self.size] = -1
+            for asset_id, label in zip(ids.tolist(), labels.tolist()):
+                row = self.pos.get(asset_id)
+                if row is not None: self.labels[row] = label
+            self.ann = ann
+            stale = np.flatnonzero(self.labels[:self.size] < 0)
+            if len(stale): self.labels[stale] = ann.assign(self.matrix[stale])
+            self.version += 1
+
+    def load_ann(self):
+        saved = IVFIndex.load(ANN_PATH)
+        if saved and self.size >= ANN_MIN_SIZE:
+            self.attach_ann(*saved)
+            print(f"🕸️ [ANN] Restored IVF{self.ann.nlist} from {ANN_PATH.name}")
+
+    # --- 🔎 QUERY ---
+    def get(self, asset_id):
+        with self._lock:
+            row = self.pos.get(asset_id)
+            return None if row is None else self.matrix[row].copy()
+
+    def type_of(self, asset_id):
+        with self._lock:
+            row = self.pos.get(asset_id)
+            return None if row is None else str(self.types[row])
+
+    def _mask(self, n, types=None, ts_range=None, cluster_id=None, faces=None, ids=None):
+        """Filter columns -> boolean row mask over the first n rows (None = no filter). Caller holds the lock."""
+        mask = None
+        def both(m):
+            return m if mask is None else mask & m
+        if ids is not None:
+            m = np.zeros(n, dtype=bool)
+            rows = [r for r in map(self.pos.get, ids) if r is not None]
+            m[rows] = True
+            mask = m
+        if types is not None:
+            m = np.zeros(n, dtype=bool)
+            for t in types: m |= self.types[:n] == t
+            mask = both(m)
+        if ts_range is not None:
+            lo, hi = ts_range
+            if lo is not None: mask = both(self.ts[:n] >= lo)
+            if hi is not None: mask = both(self.ts[:n] <= hi)
+        if cluster_id is not None: mask = both(self.clusters[:n] == cluster_id)
+        if faces is not None:
+            lo, hi = faces
+            if lo is not None: mask = both(self.faces[:n] >= lo)
+            if hi is not None: mask = both(self.faces[:n] <= hi)
+        return mask
+
+    def search(self, query, k=500, min_score=None, types=None, boost=None, nprobe=None, ts_range=None, cluster_id=None, faces=None, ids=None):
+        """
+        query: 1-D vector (any norm). types: iterable of asset types to keep.
+        boost: {type: multiplier} applied before thresholding/ranking.
+        nprobe: IVF cells to scan (None = ANN_NPROBE, 0 = force exact).
+        Filters, applied to the side columns before anything is scored:
+        ts_range: (lo, hi) epoch seconds, either may be None. cluster_id: galaxy cluster.
+        faces: (min, max) face count. ids: only these asset ids (e.g. one person's photos).
+        Returns [(asset_id, score)] sorted by score desc.
+        """
+        self.ensure_loaded()
+        q = self._normalize(query)
+        nprobe = ANN_NPROBE if nprobe is None else nprobe
+        with self._lock:
+            n = self.size
+            if n == 0: return []
+            mask = self._mask(n, types, ts_range, cluster_id, faces, ids)
+            kept = n if mask is None else int(mask.sum())
+            if kept == 0: return []
+            rows, late_mask = None, None
+            # a selective filter leaves few enough rows to score exactly; IVF only prunes big candidate sets
+            if self.ann is not None and nprobe > 0 and kept >= ANN_MIN_SIZE:
+                cells = np.zeros(self.ann.nlist + 1, dtype=bool)
+                cells[self.ann.probe(q, nprobe)] = True
+                cells[-1] = True  # label -1 -> unassigned rows
+                rows = np.flatnonzero(cells[self.labels[:n]] & (True if mask is None else mask))
+            elif mask is not None and kept <= GATHER_MAX_FRACTION * n: rows = np.flatnonzero(mask)
+            else: late_mask = mask
+            scores = self.matrix[:n] @ q if rows is None else self.matrix[rows] @ q
+            kinds = self.types[:n] if rows is None else self.types[rows]
+            if late_mask is not None: scores[~late_mask] = -np.inf
+            if boost:
+                for t, w in boost.items(): scores[kinds == t] *= w
+            if min_score is not None:
+                scores[scores < min_score] = -np.inf
+            m = len(scores)
+            if m == 0: return []
+            k = min(k, m)
+            top = np.argpartition(-scores, k - 1)[:k] if k < m else np.arange(m)
+            top = top[np.argsort(-scores[top])]
+            top = top[np.isfinite(scores[top])]
+            ids = self.ids[top] if rows is None else self.ids[rows[top]]
+            return [(int(i), float(s)) for i, s in zip(ids, scores[top])]
+
+vector_index = VectorIndex()
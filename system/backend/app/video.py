@@ -0,0 +1,109 @@
+import json
+import shutil
+import subprocess
+import time
+from io import BytesIO
+import numpy as np
+from PIL import Image
+
+from .config import VIDEO_BACKEND, VIDEO_FRAMES, VIDEO_FRAME_WIDTH, VIDEO_BUDGET_S, VIDEO_SCENES, VIDEO_SCENE_THRESHOLD
+
+FFMPEG, FFPROBE = shutil.which("ffmpeg"), shutil.which("ffprobe")
+
+def backend():
+    if VIDEO_BACKEND == "cv2" or not (FFMPEG and FFPROBE): return "cv2"
+    return "ffmpeg"
+
+def timestamps(duration, n):
+    """n evenly spread sample points, centred in their slice (n=3 -> 1/6, 1/2, 5/6)."""
+    return [duration * (2 * i + 1) / (2 * n) for i in range(n)] if duration and duration > 0 else [0.0]
+
+def downscale(img, width=VIDEO_FRAME_WIDTH):
+    if img.width > width: img = img.resize((width, max(2, round(img.height * width / img.width))), Image.BILINEAR)
+    return img
+
+def split_bmps(data):
+    """image2pipe BMP stream -> PIL images (each BMP carries its own byte length at offset 2)."""
+    out, pos = [], 0
+    while pos + 6 <= len(data) and data[pos:pos + 2] == b"BM":
+        size = int.from_bytes(data[pos + 2:pos + 6], "little")
+        if size <= 0 or pos + size > len(data): break
+        out.append(Image.open(BytesIO(data[pos:pos + size])).convert("RGB"))
+        pos += size
+    return out
+
+def pick_diverse(frames, n):
+    """Greedy scene sampling for the cv2 path: keep the n candidates that differ most from each other."""
+    if len(frames) <= n: return frames
+    sigs = [np.asarray(f.convert("L").resize((16, 16)), dtype=np.float32).ravel() / 255 for f in frames]
+    chosen = [len(frames) // 2]
+    while len(chosen) < n:
+        dist = [min(np.abs(s - sigs[c]).mean() for c in chosen) if i not in chosen else -1 for i, s in enumerate(sigs)]
+        chosen.append(int(np.argmax(dist)))
+    return [frames[i] for i in sorted(chosen)]
+
+# --- 🎬 FFMPEG: timestamp seeks that only decode keyframes ---
+def _ffprobe(path, timeout):
+    """Container duration in seconds; 0 when ffprobe is too slow (callers then take the single t=0 sample)."""
+    try: res = subprocess.run([FFPROBE, "-v", "error", "-select_streams", "v:0", "-show_entries", "format=duration",
+                               "-of", "json", str(path)], capture_output=True, timeout=timeout)
+    except subprocess.TimeoutExpired: return 0.0
+    info = json.loads(res.stdout or b"{}")
+    return float(info.get("format", {}).get("duration") or 0)
+
+def _ffmpeg_frames(path, args, timeout, width):
+    cmd = [FFMPEG, "-v", "error", "-nostdin", "-skip_frame", "nokey", *args[0], "-i", str(path),
+           *args[1], "-vf", f"{args[2]}scale='min({width},iw)':-2", "-f", "image2pipe", "-c:v", "bmp", "-"]
+    res = subprocess.run(cmd, capture_output=True, timeout=max(0.1, timeout))
+    return split_bmps(res.stdout)
+
+def _extract_ffmpeg(path, n, width, deadline, scenes):
+    duration = _ffprobe(path, max(0.1, (deadline - time.monotonic()) / 2)) # a stuck probe leaves time for a frame
+    if scenes:
+        # keyframes only, keep the ones that open a new scene; falls back to even sampling if too few
+        try:
+            frames = _ffmpeg_frames(path, ([], ["-vsync", "vfr", "-frames:v", str(n)], f"select='gt(scene,{VIDEO_SCENE_THRESHOLD})',"), deadline - time.monotonic(), width)
+            if len(frames) >= n: return frames, duration
+        except subprocess.TimeoutExpired: pass
+    frames = []
+    for t in timestamps(duration, n):
+        left = deadline - time.monotonic()
+        if left <= 0: break
+        # -ss before -i: demuxer jumps to the keyframe at/before t; -skip_frame nokey never decodes the GOP after it
+        try: frames += _ffmpeg_frames(path, (["-noaccurate_seek", "-ss", f"{t:.3f}"], ["-frames:v", "1"], ""), left, width)
+        except subprocess.TimeoutExpired: break
+    return frames, duration
+
+# --- 🎥 OPENCV fallback: timestamp seeks, hardware decode when available ---
+def _extract_cv2(path, n, width, deadline, scenes):
+    import cv2
+    params = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY] if hasattr(cv2, "VIDEO_ACCELERATION_ANY") else []
+    cap = cv2.VideoCapture(str(path), cv2.CAP_FFMPEG, params) if params else cv2.VideoCapture(str(path))
+    if not cap.isOpened(): cap = cv2.VideoCapture(str(path))
+    frames, duration = [], 0.0
+    try:
+        if not cap.isOpened(): return frames, duration
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        duration = (cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0) / fps
+        for t in timestamps(duration, n * 3 if scenes else n):
+            if time.monotonic() > deadline: break
+            cap.set(cv2.CAP_PROP_POS_MSEC, t * 1000)
+            ret, frame = cap.read()
+            if not ret: continue
+            h, w = frame.shape[:2]
+            if w > width: frame = cv2.resize(frame, (width, max(2, round(h * width / w))), interpolation=cv2.INTER_AREA)
+            frames.append(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+    finally:
+        cap.release()
+    return (pick_diverse(frames, n) if scenes else frames), duration
+
+def keyframes(path, n=VIDEO_FRAMES, width=VIDEO_FRAME_WIDTH, budget_s=VIDEO_BUDGET_S, scenes=VIDEO_SCENES, using=None):
+    """
+    -> (frames, duration_s). At most n RGB frames no wider than `width`, in time order,
+    from whatever could be decoded within budget_s. scenes=True samples by scene change
+    instead of evenly. using: "ffmpeg" | "cv2" (default: ffmpeg when installed).
+    """
+    deadline = time.monotonic() + budget_s
+    extract = _extract_ffmpeg if (using or backend()) == "ffmpeg" else _extract_cv2
+    frames, duration = extract(path, n, width, deadline, scenes)
+    return [downscale(f, width) for f in frames[:n]], duration
@@ -0,0 +1,12 @@
+"""Helpers shared by the benchmark scripts."""
+import resource
+import sys
+
+def peak_rss_mb():
+    """High-water RSS of this process. Linux: VmHWM (ru_maxrss survives exec, so a heavy parent would leak in)."""
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(l.split()[1]) for l in f if l.startswith("VmHWM")) / 1024
+    except (OSError, StopIteration): pass
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return r / (1024 * 1024) if sys.platform == "darwin" else r / 1024 # bytes on macOS, KiB elsewhere
@@ -0,0 +1,65 @@
+"""
+🕸️ ANN RECALL BENCHMARK
+Compares IVF search against the exact brute-force path of VectorIndex.
+
+    python -m benchmarks.bench_ann                 # synthetic 200k x 512
+    python -m benchmarks.bench_ann --n 1000000
+    python -m benchmarks.bench_ann --db            # real vectors from dream_sorter.db
+"""
+import argparse
+import time
+import numpy as np
+
+from app.vector_index import VectorIndex, VECTOR_DIM
+from app.ann_index import IVFIndex
+
+def synthetic(n, dim, clusters=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    return centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=100)
+    ap.add_argument("--nlist", type=int, default=None)
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    ap.add_argument("--db", action="store_true", help="use vectors from the live database")
+    args = ap.parse_args()
+
+    index = VectorIndex()
+    if args.db:
+        index.load()
+    else:
+        vecs = synthetic(args.n, VECTOR_DIM)
+        index.fill(np.arange(1, args.n + 1), [None] * args.n, ["image"] * args.n, vecs)
+    n = index.size
+    print(f"📦 {n} vectors | k={args.k} | {args.queries} queries")
+
+    rng = np.random.default_rng(1)
+    queries = index.matrix[rng.choice(n, args.queries, replace=False)]
+    queries = queries + 0.02 * rng.standard_normal(queries.shape).astype(np.float32)
+
+    t0 = time.perf_counter()
+    truth = [{i for i, _ in index.search(q, args.k, nprobe=0)} for q in queries]
+    exact_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+    print(f"🎯 exact          {exact_ms:8.2f} ms/query   recall@{args.k} 1.000")
+
+    t0 = time.perf_counter()
+    ann = IVFIndex.train(index.matrix[:n], nlist=args.nlist)
+    index.attach_ann(ann, index.ids[:n].copy(), ann.assign(index.matrix[:n]))
+    print(f"🏗️  IVF{ann.nlist} trained + assigned in {time.perf_counter() - t0:.1f}s")
+
+    import app.vector_index as vi
+    vi.ANN_MIN_SIZE = 0  # benchmark ANN even on small sets
+    for nprobe in args.nprobe:
+        t0 = time.perf_counter()
+        found = [{i for i, _ in index.search(q, args.k, nprobe=nprobe)} for q in queries]
+        ms = (time.perf_counter() - t0) * 1000 / len(queries)
+        recall = np.mean([len(f & t) / max(1, len(t)) for f, t in zip(found, truth)])
+        print(f"🕸️  nprobe={nprobe:<4} {ms:8.2f} ms/query   recall@{args.k} {recall:.3f}   speedup {exact_ms / ms:5.1f}x")
+
+if __name__ == "__main__":
+    main()
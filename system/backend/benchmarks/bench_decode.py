@@ -0,0 +1,79 @@
+"""
+🖼️ DECODE BENCHMARK
+Images/sec and peak RSS of the scan loader: full-resolution decode (the old LoadStep)
+against open_working() (JPEG draft to SCAN_WORKING_SIZE), each in its own interpreter.
+Downstream work is simulated the way the pipeline uses the image: a 224 px CLIP input,
+the thumbnail pyramid and a numpy copy for face detection.
+
+    python -m benchmarks.bench_decode                        # 12 synthetic 48 MP JPEGs
+    python -m benchmarks.bench_decode --mp 12 --count 40
+    python -m benchmarks.bench_decode --dir ~/DreamBox/phone
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+from benchmarks._util import peak_rss_mb
+
+def make_corpus(folder, count, mp, rng):
+    from PIL import Image
+    w = int((mp * 1e6 * 4 / 3) ** 0.5); h = int(w * 3 / 4)
+    base = np.linspace(0, 255, w, dtype=np.float32)[None, :, None].repeat(h, 0).repeat(3, 2)
+    for i in range(count):
+        noise = rng.normal(0, 25, (h // 8, w // 8, 3)).repeat(8, 0).repeat(8, 1)[:h, :w]
+        Image.fromarray(np.clip(base + noise + i * 7, 0, 255).astype(np.uint8)).save(folder / f"img{i}.jpg", quality=90)
+
+def child(mode, files):
+    from PIL import Image, ImageOps
+    from app.config import THUMB_WIDTHS
+    from app.scanner import open_working
+    t0 = time.perf_counter()
+    for f in files:
+        if mode == "full":
+            img = ImageOps.exif_transpose(Image.open(f)).convert("RGB")
+        else:
+            img, _ = open_working(f)
+        img.resize((224, 224), Image.BICUBIC) # CLIP preprocess
+        level = img.copy()
+        for w in sorted(THUMB_WIDTHS, reverse=True): level.thumbnail((w, w))
+        np.array(img) # face detection input
+    dt = time.perf_counter() - t0
+    print(json.dumps({"img_per_s": round(len(files) / dt, 2), "ms_per_img": round(dt / len(files) * 1000, 1), "rss_peak_mb": round(peak_rss_mb())}))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dir")
+    ap.add_argument("--count", type=int, default=12)
+    ap.add_argument("--mp", type=float, default=48)
+    ap.add_argument("--child", choices=["full", "working"])
+    ap.add_argument("files", nargs="*")
+    args = ap.parse_args()
+    if args.child: return child(args.child, args.files)
+
+    if args.dir:
+        from app.config import IMAGE_EXTS
+        files = sorted(str(p) for p in Path(args.dir).expanduser().rglob("*") if p.suffix.lower() in IMAGE_EXTS)[:args.count]
+    else:
+        tmp = Path(tempfile.mkdtemp(prefix="bench_decode_"))
+        make_corpus(tmp, args.count, args.mp, np.random.default_rng(0))
+        files = sorted(str(p) for p in tmp.glob("*.jpg"))
+        print(f"🖼️ Corpus: {len(files)} synthetic {args.mp:g} MP JPEGs in {tmp}")
+
+    backend = Path(__file__).resolve().parents[1]
+    print(f"\n{'loader':<10}{'img/s':>9}{'ms/img':>10}{'peak RSS MB':>13}")
+    for mode in ("full", "working"):
+        res = subprocess.run([sys.executable, "-m", "benchmarks.bench_decode", "--child", mode, *files], cwd=backend, capture_output=True, text=True)
+        lines = [l for l in res.stdout.splitlines() if l.startswith("{")]
+        if not lines:
+            print(f"{mode:<10} failed: {(res.stderr.strip().splitlines() or ['?'])[-1]}")
+            continue
+        r = json.loads(lines[-1])
+        print(f"{mode:<10}{r['img_per_s']:>9}{r['ms_per_img']:>10}{r['rss_peak_mb']:>13}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+🗿 FACE BACKEND BENCHMARK
+Throughput (faces/sec) and identification accuracy of the MediaPipe+CLIP path
+against the buffalo_l SCRFD+ArcFace path (onnxruntime).
+
+    python -m benchmarks.bench_faces --images ~/DreamBox/party            # throughput only
+    python -m benchmarks.bench_faces --people ~/faces                     # + accuracy, layout: <person>/<photo>.jpg
+    python -m benchmarks.bench_faces --people ~/faces --backend onnx --threads 1 2 4 8
+"""
+import argparse
+import time
+from pathlib import Path
+import numpy as np
+from PIL import Image, ImageOps
+
+from app.config import IMAGE_EXTS
+from app.face_engine import FaceEngine, OnnxFaceEngine
+
+def load_images(folder, limit):
+    paths = sorted(p for p in Path(folder).expanduser().rglob("*") if p.suffix.lower() in IMAGE_EXTS)[:limit]
+    return [(p, np.array(ImageOps.exif_transpose(Image.open(p)).convert("RGB"))) for p in paths]
+
+def largest(faces):
+    return max(faces, key=lambda f: (f['bbox'][2]-f['bbox'][0]) * (f['bbox'][3]-f['bbox'][1])) if faces else None
+
+def embed_faces(engine, imgs):
+    """-> (per-image face lists with 'embedding' filled in, seconds). CLIP fills in for detector-only backends."""
+    t0 = time.perf_counter()
+    detections = engine.detect_many(imgs)
+    missing = [(img, f) for img, faces in zip(imgs, detections) for f in faces if f.get("embedding") is None]
+    if missing:
+        from app.models import ai
+        if ai.vision_model is None: ai.load()
+        crops = [Image.fromarray(img).crop(tuple(f['bbox'])) for img, f in missing]
+        for (_, f), e in zip(missing, ai.encode_image(crops)): f["embedding"] = e / (np.linalg.norm(e) + 1e-10)
+    return detections, time.perf_counter() - t0
+
+def throughput(name, engine, imgs):
+    engine.detect_many(imgs[:2]) # warm up sessions / lazy loads
+    detections, secs = embed_faces(engine, imgs)
+    n = sum(len(d) for d in detections)
+    print(f"⚡ {name:<22} {len(imgs) / secs:7.1f} img/s  {n / secs:7.1f} faces/s  ({n} faces)")
+
+def accuracy(name, engine, people):
+    labels, vecs = [], []
+    detections, _ = embed_faces(engine, [img for _, _, img in people])
+    for (person, _, _), faces in zip(people, detections):
+        f = largest(faces)
+        if f is None: continue
+        labels.append(person); vecs.append(np.asarray(f["embedding"], dtype=np.float32))
+    if len(vecs) < 2:
+        print(f"🎯 {name:<22} not enough detected faces"); return
+    labels, vecs = np.array(labels), np.stack(vecs)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-10
+    sims = vecs @ vecs.T
+    np.fill_diagonal(sims, -np.inf)
+    top1 = (labels[sims.argmax(axis=1)] == labels).mean()  # leave-one-out nearest neighbour
+    same = labels[:, None] == labels[None, :]
+    iu = np.triu_indices(len(labels), 1)
+    genuine, impostor = sims[iu][same[iu]], sims[iu][~same[iu]]
+    th = engine.match_threshold
+    tar = (genuine > th).mean() if len(genuine) else float("nan")
+    far = (impostor > th).mean() if len(impostor) else float("nan")
+    print(f"🎯 {name:<22} top-1 {top1:.3f}  TAR {tar:.3f} / FAR {far:.4f} @ {th}  ({len(labels)} faces, {len(set(labels))} people)")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--images", help="folder of photos for throughput")
+    ap.add_argument("--people", help="folder of <person>/<photo> for accuracy (also used for throughput)")
+    ap.add_argument("--limit", type=int, default=200)
+    ap.add_argument("--backend", nargs="+", default=["mediapipe", "onnx"], choices=["mediapipe", "onnx"])
+    ap.add_argument("--threads", type=int, nargs="+", default=[None], help="onnxruntime intra-op threads to sweep")
+    args = ap.parse_args()
+    if not args.images and not args.people: ap.error("pass --images and/or --people")
+
+    people = []
+    if args.people:
+        for p, img in load_images(args.people, args.limit):
+            people.append((p.parent.name, p, img))
+    imgs = [img for _, img in load_images(args.images, args.limit)] if args.images else [img for _, _, img in people]
+    print(f"📦 {len(imgs)} images" + (f" | {len(people)} labelled" if people else ""))
+
+    engines = []
+    if "mediapipe" in args.backend: engines.append(("mediapipe+clip", FaceEngine()))
+    if "onnx" in args.backend:
+        problem = OnnxFaceEngine.problem()
+        if problem: print(f"⚠️ onnx backend unavailable: {problem}")
+        else:
+            for t in args.threads:
+                engine = OnnxFaceEngine(threads=t) if t else OnnxFaceEngine()
+                engines.append((f"scrfd+arcface x{engine.threads}", engine))
+
+    for name, engine in engines:
+        throughput(name, engine, imgs)
+        if people: accuracy(name, engine, people)
+
+if __name__ == "__main__":
+    main()
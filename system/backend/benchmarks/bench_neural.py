@@ -0,0 +1,111 @@
+"""
+🧠 NEURAL CORE BENCHMARK
+Images/sec, peak RSS and retrieval agreement with the fp32 baseline for each
+precision / text-tower setting. Every configuration runs in its own interpreter,
+so RSS is not polluted by the previous one.
+
+    python -m benchmarks.bench_neural --images ~/DreamBox/2019 --limit 256
+    python -m benchmarks.bench_neural --images ~/DreamBox/2019 --configs fp32 int8 int8-shared fp32-lean
+
+Quality: mean cosine of each image embedding against fp32, and recall@k of the
+fp32 top-k images per query (QUERIES below, Thai included).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+from benchmarks._util import peak_rss_mb
+
+QUERIES = ["a dog", "a cat sleeping", "beach at sunset", "birthday cake with candles", "city street at night",
+           "people smiling at the camera", "a plate of food", "snow on mountains", "a car", "flowers in a garden",
+           "a baby", "a group photo", "ทะเล", "ภูเขา", "อาหาร", "งานวันเกิด", "a document or screenshot",
+           "children playing", "a wedding", "the sky with clouds"]
+
+CONFIGS = {
+    "fp32": {"DREAM_PRECISION": "fp32"},
+    "fp16": {"DREAM_PRECISION": "fp16"},
+    "int8": {"DREAM_PRECISION": "int8"},
+    "int8-shared": {"DREAM_PRECISION": "int8", "DREAM_TEXT_TOWER": "shared"},
+    "fp32-shared": {"DREAM_PRECISION": "fp32", "DREAM_TEXT_TOWER": "shared"},
+    "fp32-lean": {"DREAM_PRECISION": "fp32", "DREAM_LEAN": "1"},
+}
+
+def child(out, images, limit, batch):
+    """Runs inside the configured interpreter: load, embed, report."""
+    from PIL import Image, ImageOps
+    from app.config import IMAGE_EXTS
+    from app.models import ai
+    paths = sorted(p for p in Path(images).expanduser().rglob("*") if p.suffix.lower() in IMAGE_EXTS)[:limit]
+    imgs = []
+    for p in paths:
+        with Image.open(p) as im:
+            im.draft("RGB", (448, 448))
+            imgs.append(ImageOps.exif_transpose(im).convert("RGB"))
+    t0 = time.perf_counter(); ai.load(); load_s = time.perf_counter() - t0
+    rss_loaded = peak_rss_mb()
+    ai.encode_image(imgs[:batch]) # warm-up
+    t0 = time.perf_counter()
+    vecs = np.concatenate([ai.encode_image(imgs[i:i + batch]) for i in range(0, len(imgs), batch)])
+    img_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    qvecs = np.stack([np.asarray(ai.encode_text(q).detach().float().cpu().numpy(), dtype=np.float32) for q in QUERIES])
+    txt_s = time.perf_counter() - t0
+    np.savez(out, images=vecs.astype(np.float32), queries=qvecs)
+    print(json.dumps({"info": ai.info(), "n": len(imgs), "load_s": round(load_s, 2), "img_per_s": round(len(imgs) / img_s, 1),
+                      "query_ms": round(txt_s / len(QUERIES) * 1000, 1), "rss_loaded_mb": round(rss_loaded), "rss_peak_mb": round(peak_rss_mb())}))
+
+def normalize(m):
+    return m / (np.linalg.norm(m, axis=1, keepdims=True) + 1e-10)
+
+def quality(base, run, k):
+    """(mean image cosine vs baseline, recall@k of the baseline's top-k per query)."""
+    bi, ri = normalize(base["images"]), normalize(run["images"])
+    cos = float(np.mean(np.sum(bi * ri, axis=1)))
+    k = min(k, len(bi))
+    bq, rq = normalize(base["queries"]), normalize(run["queries"])
+    truth = np.argsort(-(bq @ bi.T), axis=1)[:, :k]
+    got = np.argsort(-(rq @ ri.T), axis=1)[:, :k]
+    recall = float(np.mean([len(set(t) & set(g)) / k for t, g in zip(truth, got)]))
+    return cos, recall
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--images", default=str(Path(__file__).resolve().parents[3] / "DreamBox"))
+    ap.add_argument("--limit", type=int, default=256)
+    ap.add_argument("--batch", type=int, default=16)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--configs", nargs="+", default=["fp32", "fp16", "int8", "int8-shared", "fp32-lean"], choices=list(CONFIGS))
+    ap.add_argument("--child")
+    args = ap.parse_args()
+    if args.child: return child(args.child, args.images, args.limit, args.batch)
+
+    backend = Path(__file__).resolve().parents[1]
+    configs = ["fp32"] + [c for c in args.configs if c != "fp32"] # baseline first
+    results, tmp = {}, tempfile.mkdtemp(prefix="bench_neural_")
+    for name in configs:
+        out = os.path.join(tmp, f"{name}.npz")
+        env = {**os.environ, "DREAM_PRECISION": "auto", "DREAM_TEXT_TOWER": "multilingual", "DREAM_LEAN": "0", **CONFIGS[name]}
+        res = subprocess.run([sys.executable, "-m", "benchmarks.bench_neural", "--child", out, "--images", args.images,
+                              "--limit", str(args.limit), "--batch", str(args.batch)], cwd=backend, env=env, capture_output=True, text=True)
+        lines = [l for l in res.stdout.splitlines() if l.startswith("{")]
+        if res.returncode != 0 or not lines:
+            print(f"❌ {name}: {(res.stderr.strip().splitlines() or ['failed'])[-1]}")
+            continue
+        results[name] = (json.loads(lines[-1]), dict(np.load(out)))
+
+    if "fp32" not in results: return print("❌ fp32 baseline failed; nothing to compare against")
+    base = results["fp32"][1]
+    print(f"\n{'config':<13}{'precision':>10}{'img/s':>9}{'query ms':>10}{'load s':>8}{'RSS load':>10}{'RSS peak':>10}{'cos':>8}{f'R@{args.k}':>8}")
+    for name, (stats, vecs) in results.items():
+        cos, recall = quality(base, vecs, args.k)
+        print(f"{name:<13}{stats['info']['precision']:>10}{stats['img_per_s']:>9}{stats['query_ms']:>10}{stats['load_s']:>8}{stats['rss_loaded_mb']:>10}{stats['rss_peak_mb']:>10}{cos:>8.4f}{recall:>8.3f}")
+    print(f"\n{results['fp32'][0]['n']} images, {len(QUERIES)} queries | device {results['fp32'][0]['info']['device']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+🧵 SCAN SCALING BENCHMARK
+Files/sec of the process-pool scan (app.scan_pool) for 1..16 worker processes, each pinned
+to cores // N torch threads. Workers do the full per-file job (decode, EXIF, thumbnail
+pyramid, CLIP, face detection) and hand vectors back through shared memory; the database
+side is left out so only the parallel part is measured. Model load is timed separately.
+
+    python -m benchmarks.bench_scaling                         # 96 synthetic 12 MP JPEGs
+    python -m benchmarks.bench_scaling --procs 1 2 4 --threads 1
+    python -m benchmarks.bench_scaling --dir ~/DreamBox/2019 --count 400
+
+Thumbnails written during the run are removed afterwards.
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import as_completed
+from pathlib import Path
+import numpy as np
+
+from benchmarks.bench_decode import make_corpus
+
+def run(files, procs, threads, batch):
+    from app import scan_pool, thumbs
+    pipeline = scan_pool.ProcessPipeline(processes=procs, threads=threads, batch_size=batch)
+    t0 = time.perf_counter()
+    workers = pipeline.start()
+    load_s = time.perf_counter() - t0
+
+    t0, done, faces, written = time.perf_counter(), 0, 0, []
+    pool = pipeline.pool()
+    futures = [pool.submit(scan_pool.scan_batch, [(str(f), None) for f in files[i:i + batch]]) for i in range(0, len(files), batch)]
+    for fut in as_completed(futures):
+        r = fut.result()
+        scan_pool.unpack(r["shm"], r["spans"])
+        ctxs = [c for c in r["items"] if not isinstance(c, str)]
+        done += len(ctxs); faces += len(r["faces"])
+        written += [c.thumb_path for c in ctxs] + [face.get("thumb") for _, _, face in r["faces"]]
+    dt = time.perf_counter() - t0
+    scan_pool.shutdown()
+    for name in filter(None, written): thumbs.remove(name)
+    return {"workers": len(workers), "load_s": load_s, "files_s": done / dt, "done": done, "faces": faces}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dir")
+    ap.add_argument("--count", type=int, default=96)
+    ap.add_argument("--mp", type=float, default=12)
+    ap.add_argument("--procs", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    ap.add_argument("--threads", type=int, default=0, help="torch threads per worker (default: cores // procs)")
+    ap.add_argument("--batch", type=int, default=8)
+    args = ap.parse_args()
+
+    if args.dir:
+        from app.config import IMAGE_EXTS
+        files = sorted(p for p in Path(args.dir).expanduser().rglob("*") if p.suffix.lower() in IMAGE_EXTS)[:args.count]
+    else:
+        tmp = Path(tempfile.mkdtemp(prefix="bench_scaling_"))
+        make_corpus(tmp, args.count, args.mp, np.random.default_rng(0))
+        files = sorted(tmp.glob("*.jpg"))
+        print(f"🖼️ Corpus: {len(files)} synthetic {args.mp:g} MP JPEGs in {tmp}")
+
+    cores = os.cpu_count() or 1
+    procs = [n for n in args.procs if n <= cores] or [1]
+    if len(procs) < len(args.procs): print(f"(skipping {sorted(set(args.procs) - set(procs))}: only {cores} cores)")
+
+    print(f"\n{'procs':>6}{'thr/proc':>10}{'load s':>8}{'files/s':>9}{'speedup':>9}{'effic.':>8}{'faces':>7}")
+    base = None
+    for n in procs:
+        threads = args.threads or max(1, cores // n)
+        r = run(files, n, threads, args.batch)
+        base = base or r["files_s"]
+        speedup = r["files_s"] / base
+        print(f"{n:>6}{threads:>10}{r['load_s']:>8.1f}{r['files_s']:>9.2f}{speedup:>8.2f}x{speedup / n:>8.0%}{r['faces']:>7}")
+    print(f"\n{len(files)} files, batch {args.batch}, {cores} cores")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+⏱️ STARTUP BENCHMARK
+Cold-start cost broken into phases, each import timed in a fresh interpreter.
+
+    python -m benchmarks.bench_startup                 # per-module import cost + app.main import
+    python -m benchmarks.bench_startup --load          # + init_db and the two CLIP loads
+    python -m benchmarks.bench_startup --server        # + real uvicorn: first answer vs /api/health ready
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+MODULES = ["numpy", "PIL.Image", "fastapi", "httpx", "watchdog.observers", "cv2", "torch",
+           "sentence_transformers", "sklearn.cluster", "umap", "mediapipe", "onnxruntime"]
+
+def timed_import(module, repeat):
+    """Best-of-n wall time of `import module` in a brand new interpreter (seconds, or None if missing)."""
+    code = f"import time; t=time.perf_counter(); import {module}; print(time.perf_counter()-t)"
+    best = None
+    for _ in range(repeat):
+        res = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if res.returncode != 0: return None
+        best = min(best or 1e9, float(res.stdout.strip().splitlines()[-1]))
+    return best
+
+def heavy_modules_after(module):
+    """Which of MODULES an import drags in as a side effect."""
+    code = f"import sys; import {module}; print(','.join(m for m in {MODULES!r} if m.split('.')[0] in sys.modules))"
+    res = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    return res.stdout.strip().splitlines()[-1] if res.returncode == 0 and res.stdout.strip() else f"failed: {res.stderr.strip().splitlines()[-1:]}"
+
+def load_phases():
+    code = """
+import time, json
+t = time.perf_counter(); import app.main; imp = time.perf_counter() - t
+from app.db import init_db
+from app.models import ai
+t = time.perf_counter(); init_db(); db = time.perf_counter() - t
+ai.load()
+print(json.dumps({"import_app_s": round(imp, 2), "init_db_s": round(db, 2), **ai.timings, "state": ai.state}))
+"""
+    res = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    return res.stdout.strip().splitlines()[-1] if res.returncode == 0 else res.stderr.strip().splitlines()[-1]
+
+def serve(port, timeout):
+    """Spawn uvicorn and poll /api/health: seconds to the first answer and to ready."""
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    t0, first, ready = time.perf_counter(), None, None
+    try:
+        while time.perf_counter() - t0 < timeout and ready is None:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1): ready = time.perf_counter() - t0
+            except urllib.error.HTTPError as e:
+                if e.code == 503 and first is None: first = time.perf_counter() - t0
+            except OSError: pass
+            time.sleep(0.05)
+    finally:
+        proc.terminate()
+        proc.wait(10)
+    return first or ready, ready
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--load", action="store_true", help="also time init_db and the model loads")
+    ap.add_argument("--server", action="store_true", help="also time a real uvicorn boot")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--timeout", type=float, default=300)
+    args = ap.parse_args()
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    print("📦 Import cost (fresh interpreter, best of", args.repeat, ")")
+    for m in MODULES + ["app.main"]:
+        t = timed_import(m, args.repeat)
+        print(f"   {m:<22} {'missing' if t is None else f'{t * 1000:8.0f} ms'}")
+    print(f"🧳 Heavy modules loaded by `import app.main`: {heavy_modules_after('app.main') or 'none'}")
+
+    if args.load:
+        print(f"🧠 Phases: {load_phases()}")
+    if args.server:
+        first, ready = serve(args.port, args.timeout)
+        print(f"🌐 uvicorn: first answer {first and round(first, 2)} s | ready {ready and round(ready, 2)} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+🎞️ VIDEO KEYFRAME BENCHMARK
+Per-file extraction time of the old LoadStep (three CAP_PROP_POS_FRAMES seeks at full
+resolution) against app.video.keyframes on each backend, over a synthetic corpus.
+
+    python -m benchmarks.bench_video                          # 6 clips, 20-120 s, 1280x720
+    python -m benchmarks.bench_video --seconds 600 --count 3  # long files
+    python -m benchmarks.bench_video --dir ~/DreamBox/videos  # a real corpus instead
+
+The corpus is written with ffmpeg (H.264, 10 s GOP) when it is installed, else with
+OpenCV's mp4v writer. Each clip cuts between a few coloured scenes so scene sampling has
+something to find.
+"""
+import argparse
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+from app import video
+from app.config import VIDEO_EXTS, VIDEO_BUDGET_S
+
+def make_clip(path, seconds, fps, size, scenes, rng):
+    w, h = size
+    if shutil.which("ffmpeg"):
+        seg = seconds / scenes
+        inputs, filters = [], []
+        for i in range(scenes):
+            color = "#%02x%02x%02x" % tuple(rng.integers(0, 255, 3))
+            inputs += ["-f", "lavfi", "-i", f"color=c={color}:s={w}x{h}:r={fps}:d={seg:.2f}"]
+            filters.append(f"[{i}:v]noise=alls=20:allf=t[v{i}]")
+        graph = ";".join(filters) + ";" + "".join(f"[v{i}]" for i in range(scenes)) + f"concat=n={scenes}:v=1:a=0[out]"
+        subprocess.run(["ffmpeg", "-v", "error", "-y", *inputs, "-filter_complex", graph, "-map", "[out]",
+                        "-c:v", "libx264", "-preset", "ultrafast", "-g", str(fps * 10), str(path)], check=True)
+        return
+    import cv2
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+    per_scene = int(seconds * fps / scenes)
+    for s in range(scenes):
+        base = np.full((h, w, 3), rng.integers(0, 255, 3), dtype=np.uint8)
+        for f in range(per_scene):
+            frame = base.copy()
+            x = (f * 8) % (w - 80)
+            frame[h // 2 - 40:h // 2 + 40, x:x + 80] = 255 - base[0, 0] # a moving block
+            out.write(frame)
+    out.release()
+
+def legacy(path):
+    """The pre-keyframe LoadStep: three frame-index seeks, full-resolution frames."""
+    import cv2
+    from PIL import Image
+    cap = cv2.VideoCapture(str(path))
+    frames = []
+    if cap.isOpened():
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        for p in [frame_count // 6, frame_count // 2, (frame_count * 5) // 6]:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, p)
+            ret, frame = cap.read()
+            if ret: frames.append(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+    cap.release()
+    return frames
+
+def run(name, fn, files):
+    times, sizes, counts = [], set(), []
+    for f in files:
+        t0 = time.perf_counter()
+        frames = fn(f)
+        times.append(time.perf_counter() - t0)
+        counts.append(len(frames))
+        sizes.update(fr.size for fr in frames)
+    t = np.array(times) * 1000
+    over = int(np.sum(t > VIDEO_BUDGET_S * 1000))
+    print(f"{name:<16}{t.mean():>9.0f}{np.median(t):>9.0f}{t.max():>9.0f}{np.mean(counts):>8.1f}{over:>8}   {sorted(sizes)[:2]}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dir", help="existing videos instead of a synthetic corpus")
+    ap.add_argument("--count", type=int, default=6)
+    ap.add_argument("--seconds", type=float, default=120)
+    ap.add_argument("--fps", type=int, default=30)
+    ap.add_argument("--width", type=int, default=1280)
+    ap.add_argument("--height", type=int, default=720)
+    ap.add_argument("--scenes", type=int, default=4)
+    args = ap.parse_args()
+
+    if args.dir:
+        files = sorted(p for p in Path(args.dir).expanduser().rglob("*") if p.suffix.lower() in VIDEO_EXTS)
+    else:
+        tmp, rng = Path(tempfile.mkdtemp(prefix="bench_video_")), np.random.default_rng(0)
+        files = []
+        for i in range(args.count):
+            seconds = args.seconds * (i + 1) / args.count
+            f = tmp / f"clip{i}_{int(seconds)}s.mp4"
+            make_clip(f, seconds, args.fps, (args.width, args.height), args.scenes, rng)
+            files.append(f)
+        print(f"🎬 Corpus: {len(files)} clips up to {args.seconds:.0f}s at {args.width}x{args.height} in {tmp}")
+
+    print(f"\n{'strategy':<16}{'mean ms':>9}{'p50 ms':>9}{'max ms':>9}{'frames':>8}{'>budget':>8}   frame sizes")
+    run("legacy", legacy, files)
+    backends = ["cv2"] + (["ffmpeg"] if video.FFMPEG and video.FFPROBE else [])
+    for b in backends:
+        run(f"{b}", lambda f: video.keyframes(f, using=b, scenes=False)[0], files)
+        run(f"{b}+scenes", lambda f: video.keyframes(f, using=b, scenes=True)[0], files)
+    if "ffmpeg" not in backends: print("\n(ffmpeg/ffprobe not installed: keyframe-only path skipped)")
+
+if __name__ == "__main__":
+    main()
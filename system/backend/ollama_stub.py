@@ -0,0 +1,81 @@
+"""
+🦙 OLLAMA STUB
+Stand-in for a local Ollama server (stdlib only) so the async client, streaming and
+concurrency limits can be exercised without a GPU or model download.
+
+    python ollama_stub.py --port 11435 --delay 0.05
+    DREAM_OLLAMA_URL=http://localhost:11435 python -m app.main
+
+Serves /api/tags, /api/chat and /api/generate. Answers stream as NDJSON, one word every
+--delay seconds; /api/generate reports the size of the image it received.
+"""
+import argparse
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODELS = ["llama3:stub", "llava:stub"]
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.05
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args): pass
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags": return self.send_json({"models": [{"name": m} for m in MODELS]})
+        if self.path == "/stub/stats": return self.send_json({"in_flight": StubHandler.in_flight, "peak": StubHandler.peak})
+        self.send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path == "/api/chat":
+            text, wrap = f"You said: {req['messages'][-1]['content']}", lambda t: {"message": {"role": "assistant", "content": t}}
+        elif self.path == "/api/generate":
+            sizes = [len(base64.b64decode(i)) for i in req.get("images", [])]
+            text, wrap = f"I see an image of {sizes[0] if sizes else 0} bytes. {req.get('prompt', '')}", lambda t: {"response": t}
+        else: return self.send_json({"error": "not found"}, 404)
+
+        with StubHandler.lock:
+            StubHandler.in_flight += 1
+            StubHandler.peak = max(StubHandler.peak, StubHandler.in_flight)
+        try:
+            words = [w + " " for w in text.split()]
+            if not req.get("stream", True):
+                time.sleep(self.delay * len(words))
+                return self.send_json({**wrap("".join(words)), "model": req.get("model"), "done": True})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for w in words + [None]:
+                time.sleep(self.delay)
+                msg = {**wrap(w or ""), "model": req.get("model"), "done": w is None}
+                line = (json.dumps(msg) + "\n").encode()
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        finally:
+            with StubHandler.lock: StubHandler.in_flight -= 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds per streamed word")
+    args = parser.parse_args()
+    StubHandler.delay = args.delay
+    print(f"🦙 [STUB] Ollama stand-in on http://localhost:{args.port} | models: {MODELS}")
+    ThreadingHTTPServer(("", args.port), StubHandler).serve_forever()
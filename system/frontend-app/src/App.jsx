@@ -37,7 +37,7 @@ export default function App() {
 
   // Logic Hooks
   const { stats, identities, discovery, refresh } = useDreamSystem(API_BASE)
-  const { items, setItems, query, setQuery, threshold, setThreshold, handleSearch } = useSearchEngine(API_BASE, setStatus, setIsStoryMode, setCurrentTrack, setIsPlaying)
+  const { items, setItems, query, setQuery, threshold, setThreshold, handleSearch, loadMore, hasMore } = useSearchEngine(API_BASE, setStatus, setIsStoryMode, setCurrentTrack, setIsPlaying)
 
   const [galaxyData, setGalaxyData] = useState([])
   const fetchGalaxy = useCallback(async () => {
@@ -122,6 +122,7 @@ export default function App() {
                 discovery={discovery} 
                 onSearch={(v) => { setIsGalaxyView(false); setIsFacesView(false); handleSearch(v); }}
                 apiBase={API_BASE} currentTrack={currentTrack} isPlaying={isPlaying} onPlay={playTrack} 
+                onLoadMore={loadMore} hasMore={hasMore}
              />
           )}
         </div>
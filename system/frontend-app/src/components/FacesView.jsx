@@ -34,7 +34,8 @@ export default function FacesView({ apiBase, onTeach }) {
     try {
       await axios.post(`${apiBase}/api/identities/cluster/tag`, {
         name: name,
-        anchors: cluster.examples
+        anchors: cluster.examples,
+        cluster_id: clusterId
       })
       if(onTeach) onTeach() // Refresh system stats
     } catch (e) {
@@ -3,6 +3,8 @@ import { Canvas, useFrame, useThree } from '@react-three/fiber'
 import { OrbitControls, Stars, Html, Text } from '@react-three/drei'
 import { motion, AnimatePresence } from 'framer-motion'
 import * as THREE from 'three'
+import axios from 'axios'
+import { useGalaxyPoints } from '../hooks/useGalaxyPoints'
 
 // --- 🌟 THE INDIVIDUAL STAR NODE (The Soul) ---
 function MemoryStar({ item, position, onClick, apiBase }) {
@@ -36,7 +38,7 @@ function MemoryStar({ item, position, onClick, apiBase }) {
   })
 
   const showPopup = hovered || dreaming
-  const imgUrl = item.thumb ? `${apiBase}${item.thumb}` : `${apiBase}/raw/${item.display_path}`
+  const imgUrl = item.thumb_url ? `${apiBase}${item.thumb_url}?w=200` : item.thumb ? `${apiBase}${item.thumb}` : `${apiBase}/raw/${item.display_path}`
 
   return (
     <group position={position} onClick={onClick} onPointerOver={() => setHovered(true)} onPointerOut={() => setHovered(false)}>
@@ -99,7 +101,38 @@ function MemoryGalaxy({ items, apiBase, onSelectNode }) {
   )
 }
 
+// --- ✨ THE FULL STAR FIELD (every placed asset, one draw call) ---
+function StarField({ points, apiBase, onSelectNode }) {
+  const geometry = useMemo(() => {
+    const SCALE = 1.2 // Same spread as MemoryGalaxy
+    const pos = new Float32Array(points.positions.length)
+    for (let i = 0; i < pos.length; i++) pos[i] = (points.positions[i] - 5) * SCALE
+    const g = new THREE.BufferGeometry()
+    g.setAttribute('position', new THREE.BufferAttribute(pos, 3))
+    return g
+  }, [points])
+
+  useEffect(() => () => geometry.dispose(), [geometry])
+
+  // Metadata is lazy: only the clicked star is hydrated
+  const handleClick = async (e) => {
+    e.stopPropagation()
+    try {
+      const res = await axios.get(`${apiBase}/api/galaxy/star/${points.ids[e.index]}`)
+      onSelectNode(res.data)
+    } catch (err) { }
+  }
+
+  return (
+    <points geometry={geometry} onClick={handleClick}>
+      <pointsMaterial color="#9ecbff" size={0.06} sizeAttenuation transparent opacity={0.5} depthWrite={false} />
+    </points>
+  )
+}
+
 export default function GalaxyView({ items, apiBase, onSelectNode }) {
+  const points = useGalaxyPoints(apiBase)
+
   return (
     <div className="fixed inset-0 z-0 bg-black">
       <Canvas camera={{ position: [0, 0, 20], fov: 50 }}>
@@ -107,6 +140,7 @@ export default function GalaxyView({ items, apiBase, onSelectNode }) {
         <ambientLight intensity={1.5} />
         <pointLight position={[10, 10, 10]} intensity={2} />
         
+        {points && points.count > 0 && <StarField points={points} apiBase={apiBase} onSelectNode={onSelectNode} />}
         <MemoryGalaxy items={items} apiBase={apiBase} onSelectNode={onSelectNode} />
 
         <OrbitControls 
@@ -2,8 +2,17 @@ import React, { useState, useEffect, useRef } from 'react'
 import { motion, AnimatePresence } from 'framer-motion'
 import { Play, Pause, Music, Disc, Aperture, Hash } from 'lucide-react'
 
-export default function GridView({ items, selected, onSelect, onPreview, apiBase, currentTrack, isPlaying, onPlay, discovery, onSearch }) {
+export default function GridView({ items, selected, onSelect, onPreview, apiBase, currentTrack, isPlaying, onPlay, discovery, onSearch, onLoadMore, hasMore }) {
   const [columns, setColumns] = useState(5)
+  const sentinel = useRef(null)
+
+  // 📑 Infinite scroll: fetch the next page when the bottom comes into view
+  useEffect(() => {
+    if (!hasMore || !onLoadMore || !sentinel.current) return
+    const io = new IntersectionObserver(([e]) => { if (e.isIntersecting) onLoadMore() }, { rootMargin: '600px' })
+    io.observe(sentinel.current)
+    return () => io.disconnect()
+  }, [hasMore, onLoadMore, items.length])
   
   // Responsive Columns
   useEffect(() => {
@@ -97,12 +106,12 @@ export default function GridView({ items, selected, onSelect, onPreview, apiBase
       <div className="grid gap-4" style={{ gridTemplateColumns: `repeat(${columns}, 1fr)` }}>
         {visualItems.map((item, index) => {
           const isSelected = selected.has(item.path)
-          const thumbUrl = item.thumb ? `${apiBase}${item.thumb}` : `${apiBase}/raw/${encodeURIComponent(item.display_path)}`
+          const thumbUrl = item.thumb_url ? `${apiBase}${item.thumb_url}?w=400` : item.thumb ? `${apiBase}${item.thumb}` : `${apiBase}/raw/${encodeURIComponent(item.display_path)}`
           
           return (
             <motion.div
               key={item.id} layout
-              initial={{ opacity: 0, y: 20 }} animate={{ opacity: 1, y: 0 }} transition={{ delay: index * 0.02 }}
+              initial={{ opacity: 0, y: 20 }} animate={{ opacity: 1, y: 0 }} transition={{ delay: Math.min(index, 60) * 0.02 }}
               className={`
                 aspect-[3/4] relative rounded-2xl overflow-hidden cursor-pointer group
                 ${isSelected ? 'ring-2 ring-white scale-95 shadow-2xl' : 'hover:scale-[1.02]'}
@@ -135,6 +144,8 @@ export default function GridView({ items, selected, onSelect, onPreview, apiBase
         })}
       </div>
 
+      {hasMore && <div ref={sentinel} className="h-16" />}
+
       {items.length === 0 && (
         <div className="flex flex-col items-center justify-center h-64 text-white/20">
           <div className="w-16 h-16 rounded-full border-2 border-white/10 flex items-center justify-center mb-4">
@@ -31,10 +31,29 @@ export default function LightBox({ item, onClose, onLoom, apiBase, onQuickTeach,
           const res = await fetch(`${apiBase}/api/ai/ask`, {
               method: 'POST',
               headers: {'Content-Type': 'application/json'},
-              body: JSON.stringify({ prompt: finalPrompt, image_path: item.path })
+              body: JSON.stringify({ prompt: finalPrompt, image_path: item.path, stream: true })
           })
-          const data = await res.json()
-          setAiResponse(data.response)
+          if (!(res.headers.get('content-type') || '').includes('text/event-stream')) {
+              const data = await res.json()
+              setAiResponse(data.response)
+          } else {
+              // 🌊 Token stream: render the answer as it is generated
+              const reader = res.body.getReader()
+              const decoder = new TextDecoder()
+              let buffer = '', text = ''
+              while (true) {
+                  const { done, value } = await reader.read()
+                  if (done) break
+                  buffer += decoder.decode(value, { stream: true })
+                  const events = buffer.split('\n\n')
+                  buffer = events.pop()
+                  for (const ev of events) {
+                      if (!ev.startsWith('data: ')) continue
+                      const msg = JSON.parse(ev.slice(6))
+                      if (msg.token) { text += msg.token; setAiResponse(text); setAiLoading(false) }
+                  }
+              }
+          }
       } catch (e) { setAiResponse("AI Brain Offline.") }
       setAiLoading(false)
   }
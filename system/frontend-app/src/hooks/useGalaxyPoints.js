@@ -0,0 +1,40 @@
+import { useState, useEffect } from 'react'
+import axios from 'axios'
+
+// 🌠 /api/galaxy/points record: x,y,z f32 | id u32 | cluster u16 | type u8 | flags u8 (20 bytes)
+const RECORD = 20
+
+export function decodePoints(buffer) {
+  const n = Math.floor(buffer.byteLength / RECORD)
+  const f32 = new Float32Array(buffer, 0, n * 5)
+  const u32 = new Uint32Array(buffer, 0, n * 5)
+  const u16 = new Uint16Array(buffer, 0, n * 10)
+  const u8 = new Uint8Array(buffer)
+  const positions = new Float32Array(n * 3)
+  const ids = new Uint32Array(n)
+  const clusters = new Uint16Array(n)
+  const types = new Uint8Array(n)
+  const flags = new Uint8Array(n)
+  for (let i = 0; i < n; i++) {
+    positions[i * 3] = f32[i * 5]; positions[i * 3 + 1] = f32[i * 5 + 1]; positions[i * 3 + 2] = f32[i * 5 + 2]
+    ids[i] = u32[i * 5 + 3]
+    clusters[i] = u16[i * 10 + 8]
+    types[i] = u8[i * RECORD + 18]
+    flags[i] = u8[i * RECORD + 19]
+  }
+  return { count: n, positions, ids, clusters, types, flags }
+}
+
+export function useGalaxyPoints(apiBase, lod = 200000) {
+  const [points, setPoints] = useState(null)
+
+  useEffect(() => {
+    let alive = true
+    axios.get(`${apiBase}/api/galaxy/points?lod=${lod}`, { responseType: 'arraybuffer' })
+      .then(res => { if (alive) setPoints(decodePoints(res.data)) })
+      .catch(() => { })
+    return () => { alive = false }
+  }, [apiBase, lod])
+
+  return points
+}
@@ -1,10 +1,12 @@
-import { useState, useCallback } from 'react'
+import { useState, useCallback, useRef } from 'react'
 import axios from 'axios'
 
 export function useSearchEngine(apiBase, setStatus, setIsStoryMode, setCurrentTrack, setIsPlaying) {
   const [items, setItems] = useState([])
   const [query, setQuery] = useState('')
   const [threshold, setThreshold] = useState(0.15)
+  const [hasMore, setHasMore] = useState(false)
+  const page = useRef({ q: '', cursor: null, loading: false }) // cursor continues the server-side ranking
 
   const handleSearch = useCallback(async (val, isAuto = false) => {
     const q = (typeof val === 'string') ? val : query
@@ -16,6 +18,9 @@ export function useSearchEngine(apiBase, setStatus, setIsStoryMode, setCurrentTr
     
     try {
       const res = await axios.get(`${apiBase}/api/search?q=${encodeURIComponent(cleanQ)}&threshold=${threshold}`)
+      const total = Number(res.headers['x-total-count'] || res.data.length)
+      page.current = { q: cleanQ, cursor: res.headers['x-next-cursor'] || null, loading: false }
+      setHasMore(!!page.current.cursor)
       setItems(res.data)
       setIsStoryMode(false)
       
@@ -25,12 +30,29 @@ export function useSearchEngine(apiBase, setStatus, setIsStoryMode, setCurrentTr
         setIsPlaying(true)
       }
       
-      setStatus(cleanQ === '' ? `Restored ${res.data.length} scenes` : `Found ${res.data.length} matches`)
+      setStatus(cleanQ === '' ? `Restored ${total} scenes` : `Found ${total} matches`)
     } catch (err) { 
       setStatus('Recall Failed')
       console.error(err)
     }
   }, [query, threshold, apiBase, setStatus, setIsStoryMode, setCurrentTrack, setIsPlaying])
 
-  return { items, setItems, query, setQuery, threshold, setThreshold, handleSearch }
+  // 📑 Next page of the same ranking (no re-scoring server-side)
+  const loadMore = useCallback(async () => {
+    const { q, cursor, loading } = page.current
+    if (!cursor || loading) return
+    page.current.loading = true
+    try {
+      const res = await axios.get(`${apiBase}/api/search?q=${encodeURIComponent(q)}&threshold=${threshold}&cursor=${encodeURIComponent(cursor)}`)
+      if (page.current.cursor !== cursor) return // a new search started meanwhile
+      page.current = { q, cursor: res.headers['x-next-cursor'] || null, loading: false }
+      setHasMore(!!page.current.cursor)
+      setItems(prev => [...prev, ...res.data])
+    } catch (err) {
+      page.current.loading = false
+      console.error(err)
+    }
+  }, [threshold, apiBase])
+
+  return { items, setItems, query, setQuery, threshold, setThreshold, handleSearch, loadMore, hasMore }
 }